@@ -0,0 +1,51 @@
+"""Symulacja warsztatu samochodowego jako pakiet.
+
+Publiczne nazwy są ładowane leniwie przy pierwszym użyciu, dlatego samo "import projekt2" nie wczytuje numpy
+ani asyncio, a "from projekt2 import Garage" wczytuje tylko moduły potrzebne do symulacji - bez matplotlib,
+colorama i multiprocessing. Moduły pakietu importują się względnie, więc "projekt2.main" to jedyna kopia
+modułu main, a pakiet nie dodaje nic do sys.path.
+
+    from projekt2 import Scenario, run_replications
+    python -m projekt2 --help
+"""
+import importlib
+
+# Public name -> module it lives in
+_EXPORTS = {
+    **dict.fromkeys(['simulate', 'simulate_day', 'run', 'Car', 'ObjectClass', 'PriorityQueue', 'STATIONS',
+                     'DEFAULT_ROSTER', 'ROUTING'], 'main'),
+    **dict.fromkeys(['VirtualEventLoop'], 'clock'),
+    **dict.fromkeys(['CarStore'], 'carstore'),
+    **dict.fromkeys(['RandomStreams'], 'rng'),
+    **dict.fromkeys(['RoutingTable', 'load_routing'], 'routing'),
+    **dict.fromkeys(['event_log', 'EventType'], 'events'),
+    **dict.fromkeys(['SimulationStats'], 'stats'),
+    **dict.fromkeys(['ResultsWriter', 'load_results', 'export_npz', 'export_parquet'], 'results'),
+    **dict.fromkeys(['POLICIES', 'PriorityPolicy', 'ShortestProcessingTime', 'EarliestDeadline', 'ClassWeighted',
+                     'ShiftAware', 'compare_policies'], 'policies'),
+    **dict.fromkeys(['Garage', 'daily_calendar', 'load_snapshot'], 'garage'),
+    **dict.fromkeys(['LocalFleet', 'ProcessFleet'], 'fleet'),
+    **dict.fromkeys(['read_trace', 'write_trace', 'trace_calendar'], 'replay'),
+    **dict.fromkeys(['Scenario', 'replication_seeds', 'collect_replications', 'run_replications',
+                     'compare_scenarios'], 'replications'),
+    **dict.fromkeys(['ResultCache'], 'cache'),
+    **dict.fromkeys(['batch_means_run', 'sequential_replications', 'mser'], 'adaptive'),
+    **dict.fromkeys(['simulate_batch', 'simulate_parallel'], 'vectorized'),
+    **dict.fromkeys(['solve'], 'jackson'),
+    **dict.fromkeys(['render_report'], 'report'),
+    **dict.fromkeys(['profiler'], 'profiling'),
+}
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value  # later lookups do not come back here
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,81 @@
+"""Wspólny punkt wejścia: python -m projekt2 KOMENDA [ARGUMENTY].
+
+"run" uruchamia jeden dzień symulacji (main.run) z opcjami z wiersza poleceń. Pozostałe komendy to
+narzędzia z poszczególnych modułów - proces jest zastępowany (os.execve) uruchomieniem "python -m
+projekt2.<moduł>" z tymi samymi argumentami, więc działają dokładnie tak jak uruchomione bezpośrednio,
+także z procesami roboczymi.
+"""
+import argparse
+import os
+import sys
+
+_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Command -> (module of the package or script relative to it, help)
+TOOLS = {
+    'replications': ('.replications', 'seeded replications with confidence intervals (N | compare N, --cache)'),
+    'vectorized': ('.vectorized', 'replications on the vectorized engine (N | validate N)'),
+    'adaptive': ('.adaptive', 'warm-up detection and run length by precision ([PRECISION] [--replications N])'),
+    'garage': ('.garage', 'multi-day garage (DAYS [SNAPSHOT])'),
+    'fleet': ('.fleet', 'many garages exchanging cars (SITES DAYS [PROCESSES])'),
+    'replay': ('.replay', 'replay recorded arrivals day by day (TRACE [DAYS])'),
+    'policies': ('.policies', 'compare dispatch policies (REPLICATIONS DAYS CARS)'),
+    'routing': ('.routing', 'print the routing matrix ([ROUTING.json])'),
+    'jackson': ('.jackson', 'analytic Jackson network estimate ([check HOURS])'),
+    'optimize': ('.optimize', 'staffing optimizer (OBJECTIVE TARGET)'),
+    'report': ('.report', 'draw the report of saved results (RESULTS [OUTPUT])'),
+    'profile': ('.profiling', 'profile the hot paths ([NUM_CARS] [FOLDED])'),
+    'bench': ('benchmarks/suite.py', 'benchmark suite ([SCENARIO ...] [--compare OLD.json])'),
+    'bench-import': ('benchmarks/bench_import.py', 'cold start of the package and of a worker'),
+}
+
+
+def run_command(argv):
+    parser = argparse.ArgumentParser(prog='python -m projekt2 run', description='Simulate one day of the garage')
+    parser.add_argument('--seed', type=int, help='random seed of a reproducible run')
+    parser.add_argument('--live', action='store_true', help='real time (one simulated hour per second)')
+    parser.add_argument('--results', help='directory for the columnar results tables')
+    parser.add_argument('--report', default='report', help='directory for the figures (default: report)')
+    parser.add_argument('--no-report', action='store_true', help='skip the figures (no matplotlib needed)')
+    parser.add_argument('--routing', help='JSON routing table')
+    parser.add_argument('--trace', help='CSV or Parquet file with recorded arrivals')
+    parser.add_argument('--quiet', action='store_true', help='nothing on the console, neither events nor the summary')
+    args = parser.parse_args(argv)
+
+    from .main import run  # the engine is loaded only for this command
+
+    run(simulated_time=not args.live, random_seed=args.seed, sinks=[] if args.quiet else None,
+        results_path=args.results, report_dir=None if args.no_report else args.report,
+        routing_path=args.routing, trace_path=args.trace)
+    return 0
+
+
+def usage():
+    lines = ['usage: python -m projekt2 COMMAND [ARGS]', '', 'commands:',
+             f"  {'run':<14} simulate one day (run --help for the options)"]
+    lines += [f'  {command:<14} {description}' for command, (_, description) in TOOLS.items()]
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+    command, args = argv[0], argv[1:]
+    if command == 'run':
+        return run_command(args)
+    if command not in TOOLS:
+        print(f"unknown command {command!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+    target = TOOLS[command][0]
+    if target.endswith('.py'):
+        os.execv(sys.executable, [sys.executable, os.path.join(_DIRECTORY, target), *args])
+    # The package has to be importable by the new interpreter wherever it was started from
+    environment = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [os.path.dirname(_DIRECTORY),
+                                                                            os.environ.get('PYTHONPATH')]))}
+    os.execve(sys.executable, [sys.executable, '-m', f'{__package__}{target}', *args], environment)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
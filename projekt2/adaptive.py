@@ -0,0 +1,274 @@
+"""Adaptacyjna długość symulacji: automatyczne wykrywanie końca rozbiegu i sekwencyjne zatrzymanie.
+
+Rozbieg (stan przejściowy od pustego warsztatu) jest wykrywany regułą MSER-5: szereg jest uśredniany w paczkach
+po 5 obserwacji i obcinany w miejscu, które minimalizuje wariancję średniej z reszty, SS(d) / (n - d)^2,
+szukanym w pierwszej połowie szeregu. Reguła jest stosowana osobno do czasów w systemie (Car.delta_time) kolejnych
+samochodów i do łącznej długości kolejek uśrednionej w przedziałach godzinowych; koniec rozbiegu to późniejszy
+z tych dwóch punktów. Minimum na granicy połowy oznacza, że przebieg był za krótki, żeby rozbieg wykryć.
+
+Po odrzuceniu rozbiegu symulacja trwa, aż względna połowa szerokości przedziału ufności średniego czasu
+w systemie spadnie poniżej `precision` dla każdej klasy (ObjectClass):
+
+- batch_means_run - jeden długi przebieg, średnie z BATCHES równych paczek samochodów danej klasy; gdy precyzja
+  nie wystarcza, przebieg jest powtarzany dla większej liczby samochodów, oszacowanej z osiągniętej szerokości,
+- sequential_replications - niezależne replikacje, dokładane partiami aż do osiągnięcia precyzji; rozbieg jest
+  wykrywany na szeregach uśrednionych po replikacjach (jak w metodzie Welcha) i odrzucany w każdej z nich.
+
+Mechanicy pracują do ostatniego samochodu (zmiana kończy się dobę po ostatnim przyjeździe), tak jak
+w scenariuszach cars_10k benchmarków.
+
+    python -m projekt2.adaptive [PRECISION] [--replications [NUM_CARS]] [--max-cars N]
+"""
+import asyncio
+import os
+import sys
+from math import ceil
+from time import perf_counter
+
+import numpy as np
+
+from .clock import VirtualEventLoop
+from .main import DEFAULT_ROSTER, STATIONS, simulate
+from .replications import REPORTED_CLASSES, Scenario, confidence_interval, process_pool, replication_seeds
+from .results import ResultsWriter
+from .rng import RandomStreams
+from .stats import resample
+
+MSER_BATCH = 5  # observations per batch mean of MSER-5
+BATCHES = 20  # batch means per class in the batch means method
+BIN_HOURS = 1.0  # queue lengths are averaged over bins this wide before MSER
+MAX_GROWTH = 8.0  # a longer run or a new round of replications is at most this many times the previous one
+
+
+def long_scenario(num_cars, roster=DEFAULT_ROSTER, routing=None):
+    # Cars arrive once an hour on average; the shifts last until a day after the last arrival
+    return Scenario(num_cars, roster, shift_hours=num_cars + 24, routing=routing)
+
+
+def mser(values, batch=MSER_BATCH):
+    """Punkt obcięcia MSER: (liczba odrzucanych obserwacji, czy minimum leży przed połową szeregu)."""
+    values = np.asarray(values, dtype=float)
+    count = len(values) // batch
+    if count < 4:
+        return 0, False
+    means = values[:count * batch].reshape(count, batch).mean(axis=1)
+    # Sums over every suffix means[d:], from the shortest one; SS(d) = sum x^2 - (sum x)^2 / n
+    tail = means[::-1]
+    lengths = np.arange(1, count + 1)
+    sums, squares = np.cumsum(tail), np.cumsum(tail ** 2)
+    statistic = ((squares - sums ** 2 / lengths) / lengths ** 2)[::-1]
+    half = count // 2
+    truncated = int(np.argmin(statistic[:half + 1]))
+    return truncated * batch, truncated < half
+
+
+def observe(scenario, seed, bin_hours=BIN_HOURS):
+    """Jedna symulacja: ukończone samochody w kolejności przyjazdu i łączna długość kolejek w przedziałach."""
+    results = ResultsWriter(chunk_rows=1 << 16)
+    with asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+        store, _, results, _, start, _ = runner.run(simulate(scenario.num_cars, scenario.roster, results=results,
+                                                             streams=RandomStreams(seed, STATIONS), routing=scenario.routing))
+    times = store.end - store.arrival
+    finished = ~np.isnan(times)
+    # Only up to the last arrival: afterwards the queues drain, which is a transient of its own
+    edges = start + bin_hours * np.arange(int((store.arrival.max() - start) // bin_hours) + 1)
+    changes = results.table('queue_changes')
+    codes = np.asarray(changes['station'])
+    queue_length = sum((resample(changes['time'][codes == code], changes['length'][codes == code], edges)
+                        for code in np.unique(codes)), np.zeros(max(len(edges) - 1, 0)))
+    return {
+        'start': start,
+        'arrival': store.arrival[finished].copy(),
+        'time_in_system': times[finished],
+        'object_class': store.original_class[finished].copy(),
+        'queue_length': queue_length,
+    }
+
+
+def warmup(arrival, time_in_system, queue_length, start, bin_hours=BIN_HOURS):
+    """Koniec rozbiegu w godzinach zegara symulacji, osobno z obu szeregów i łącznie (późniejszy)."""
+    cars, cars_found = mser(time_in_system)
+    bins, bins_found = mser(queue_length)
+    by_cars = float(arrival[cars]) if cars else start
+    by_queue = start + bins * bin_hours
+    return {
+        'time_in_system': by_cars,
+        'queue_length': by_queue,
+        'end': max(by_cars, by_queue),
+        'detected': cars_found and bins_found,
+    }
+
+
+def batch_means(values, batches=BATCHES, level=0.95):
+    # The first values (closest to the warm-up) are dropped so that every batch has the same size
+    size = len(values) // batches
+    if size == 0:
+        return np.nan, np.nan, np.nan
+    return confidence_interval(values[len(values) - size * batches:].reshape(batches, size).mean(axis=1), level)
+
+
+def relative_half_width(interval):
+    mean, low, high = interval
+    return (high - low) / 2 / abs(mean) if mean else np.nan
+
+
+def _precision(intervals, precision):
+    widths = {object_class: relative_half_width(interval) for object_class, interval in intervals.items()}
+    # nan (too few observations) counts as not precise enough
+    worst = max((np.inf if np.isnan(width) else width) for width in widths.values())
+    return widths, worst, worst <= precision
+
+
+def _grow(current, worst, precision, minimum):
+    # Half-widths shrink with the square root of the sample, 10% extra against an optimistic estimate
+    wanted = current * (worst / precision) ** 2 * 1.1 if np.isfinite(worst) else current * MAX_GROWTH
+    return int(ceil(min(max(wanted, current * 1.5, minimum), current * MAX_GROWTH)))
+
+
+def batch_means_run(precision=0.05, level=0.95, num_cars=1000, max_cars=200_000, seed=0, roster=DEFAULT_ROSTER,
+                    routing=None):
+    """Jeden długi przebieg wydłużany do osiągnięcia precyzji; zwraca słownik z decyzją, rozbiegiem i przedziałami."""
+    runs = []
+    while True:
+        run = observe(long_scenario(num_cars, roster, routing), seed)
+        point = warmup(run['arrival'], run['time_in_system'], run['queue_length'], run['start'])
+        kept = run['arrival'] >= point['end']
+        intervals = {object_class: batch_means(run['time_in_system'][kept & (run['object_class'] == object_class.value)],
+                                               level=level)
+                     for object_class in REPORTED_CLASSES}
+        widths, worst, reached = _precision(intervals, precision)
+        runs.append(num_cars)
+        # Without a detected warm-up the run is too short to trust, whatever the width
+        if (reached and point['detected']) or num_cars >= max_cars:
+            break
+        num_cars = min(_grow(num_cars, worst, precision, num_cars * 2 if not point['detected'] else 0), max_cars)
+    return {
+        'method': 'batch_means',
+        'precision': precision,
+        'level': level,
+        'reached': reached and point['detected'],
+        'runs': runs,
+        'cars': num_cars,
+        'warmup': {**point, 'deleted': int((~kept).sum())},
+        'time_in_system': intervals,
+        'relative_half_width': widths,
+    }
+
+
+def _observe_chunk(args):
+    scenario, seeds = args
+    return [observe(scenario, seed) for seed in seeds]
+
+
+def _observe_many(scenario, seeds, processes):
+    processes = min(processes or os.cpu_count(), len(seeds))
+    if processes <= 1:
+        return _observe_chunk((scenario, seeds))
+    chunk_size = max(1, len(seeds) // (processes * 4))
+    chunks = [(scenario, seeds[i:i + chunk_size]) for i in range(0, len(seeds), chunk_size)]
+    with process_pool(processes) as executor:
+        return [run for chunk in executor.map(_observe_chunk, chunks) for run in chunk]
+
+
+def _averaged(series):
+    # Mean over the replications of every position all of them reach (Welch's averaged series)
+    length = min(len(values) for values in series)
+    return np.mean([values[:length] for values in series], axis=0)
+
+
+def sequential_replications(num_cars=200, precision=0.05, level=0.95, pilot=10, max_replications=10_000, max_cars=200_000,
+                            base_seed=0, roster=DEFAULT_ROSTER, routing=None, processes=None):
+    """Replikacje dokładane partiami do osiągnięcia precyzji; rozbieg z szeregów uśrednionych po replikacjach.
+
+    Gdy precyzja jest osiągnięta, ale rozbiegu nie da się wykryć, replikacje są za krótkie: seria zaczyna się
+    od nowa z dwa razy dłuższymi replikacjami (najwyżej max_cars samochodów).
+    """
+    lengths = []
+    while True:
+        scenario = long_scenario(num_cars, roster, routing)
+        lengths.append(num_cars)
+        runs = []
+        rounds = []
+        replications = pilot
+        while True:
+            # replication_seeds gives the same first seeds for a longer series, so only the new ones are simulated
+            runs += _observe_many(scenario, replication_seeds(base_seed, replications)[len(runs):], processes)
+            rounds.append(replications)
+            point = warmup(_averaged([run['arrival'] for run in runs]), _averaged([run['time_in_system'] for run in runs]),
+                           _averaged([run['queue_length'] for run in runs]), np.mean([run['start'] for run in runs]))
+            intervals = {}
+            for object_class in REPORTED_CLASSES:
+                means = []
+                for run in runs:
+                    times = run['time_in_system'][(run['arrival'] >= point['end']) & (run['object_class'] == object_class.value)]
+                    means.append(times.mean() if len(times) else np.nan)
+                intervals[object_class] = confidence_interval(means, level)
+            widths, worst, reached = _precision(intervals, precision)
+            if reached or replications >= max_replications:
+                break
+            replications = min(_grow(replications, worst, precision, replications + 1), max_replications)
+        # Without a detected warm-up the estimate may still carry the transient, whatever the width
+        if point['detected'] or not reached or num_cars >= max_cars:
+            break
+        num_cars = min(num_cars * 2, max_cars)
+    return {
+        'method': 'replications',
+        'precision': precision,
+        'level': level,
+        'reached': reached and point['detected'],
+        'runs': rounds,
+        'lengths': lengths,
+        'cars': num_cars,
+        'warmup': {**point, 'deleted': int(np.mean([(run['arrival'] < point['end']).sum() for run in runs]))},
+        'time_in_system': intervals,
+        'relative_half_width': widths,
+    }
+
+
+def print_adaptive(result):
+    point = result['warmup']
+    if result['method'] == 'batch_means':
+        print(f"Batch means, run lengths tried: {', '.join(map(str, result['runs']))} cars")
+    else:
+        print(f"Replications of {result['cars']} cars (lengths tried: {', '.join(map(str, result['lengths']))}), "
+              f"rounds: {', '.join(map(str, result['runs']))} replications")
+    print(f"Warm-up: ends at {point['end']:.1f} h (time in system {point['time_in_system']:.1f} h, "
+          f"queue length {point['queue_length']:.1f} h), {point['deleted']} cars deleted"
+          f"{'' if point['detected'] else ' - not detected, the run is too short'}")
+    target = result['precision']
+    print(f"Time in system (hours), {result['level']:.0%} intervals, target relative half-width {target:.1%}:")
+    for object_class, (mean, low, high) in result['time_in_system'].items():
+        width = result['relative_half_width'][object_class]
+        print(f"  {str(object_class):<16} {mean:8.3f}  [{low:8.3f}, {high:8.3f}]  {width:7.2%}"
+              f"{'' if width <= target else '  above target'}")
+    stopped = 'precision reached' if result['reached'] else \
+        'limit reached before the precision' if point['detected'] else 'limit reached without a detected warm-up'
+    print(f"Stopped: {stopped} "
+          f"after {result['runs'][-1]} {'cars' if result['method'] == 'batch_means' else 'replications'}")
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    max_cars = 200_000
+    if '--max-cars' in arguments:
+        position = arguments.index('--max-cars')
+        max_cars = int(arguments[position + 1])
+        del arguments[position:position + 2]
+    replications_mode = '--replications' in arguments
+    if replications_mode:
+        position = arguments.index('--replications')
+        num_cars = int(arguments[position + 1]) if len(arguments) > position + 1 else 200
+        del arguments[position:position + 2]
+    precision = float(arguments[0]) if arguments else 0.05
+
+    from .jackson import solve  # an unstable station has no steady state to converge to
+    unstable = solve()['unstable']
+    if unstable:
+        print(f"Warning: unstable stations (rho >= 1) in steady state: {', '.join(unstable)}")
+    start = perf_counter()
+    if replications_mode:
+        result = sequential_replications(num_cars, precision, max_cars=max_cars)
+    else:
+        result = batch_means_run(precision, max_cars=max_cars)
+    print_adaptive(result)
+    print(f"{perf_counter() - start:.1f} s")
@@ -0,0 +1,87 @@
+"""Zimny start: ile trwa import pakietu i silnika w świeżym interpreterze oraz pierwsza replikacja w nowym
+procesie roboczym (fork i spawn), w porównaniu z samym interpreterem, numpy i asyncio.
+
+Każdy pomiar to najkrótszy z kilku czasów uruchomienia osobnego procesu. Dla importu silnika podany jest też
+czas własny modułów projektu (z -X importtime) i sprawdzane jest, że nie wczytuje on matplotlib, colorama
+ani multiprocessing. Procesy robocze startują tak jak w pulach symulatora (replications.worker_context).
+"""
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from time import perf_counter
+
+PACKAGE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PACKAGE.parent))
+
+CASES = {
+    'python': 'pass',
+    'numpy': 'import numpy',
+    'asyncio': 'import asyncio',
+    'projekt2': 'import projekt2',
+    'projekt2 engine': 'from projekt2 import simulate, Garage, run_replications',
+}
+HEAVY = ['matplotlib', 'colorama', 'multiprocessing', 'concurrent.futures.process']
+
+
+def cold_start(code, repeat=7):
+    # Whole process from exec to exit, the fastest of repeat runs
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, cwd=PACKAGE.parent)
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def own_import_ms(code):
+    # Self time of the project's modules in -X importtime (microseconds per module on stderr)
+    modules = {f'projekt2.{path.stem}' for path in PACKAGE.glob('*.py') if path.stem != '__init__'} | {'projekt2'}
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], check=True, cwd=PACKAGE.parent,
+                            capture_output=True, text=True).stderr
+    total = 0
+    for line in output.splitlines():
+        if line.startswith('import time:') and line.split('|')[-1].strip() in modules:
+            total += int(line.split('|')[0].split(':')[1])
+    return total / 1e3
+
+
+def loaded_heavy(code):
+    check = f"{code}\nimport sys\nprint(','.join(name for name in {HEAVY!r} if name in sys.modules))"
+    return subprocess.run([sys.executable, '-c', check], check=True, cwd=PACKAGE.parent,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def first_replication(method, repeat=5):
+    # A new worker process and its first replication of the default scenario, as replications.py runs them
+    from projekt2.replications import Scenario, run_replication, worker_context
+
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        with ProcessPoolExecutor(1, mp_context=worker_context() if method is None else get_context(method)) as executor:
+            executor.submit(run_replication, Scenario(), 0).result()
+            times.append(perf_counter() - start)
+    return min(times)
+
+
+def main():
+    print(f"{'import':<18} {'cold start ms':>14}")
+    for name, code in CASES.items():
+        print(f"{name:<18} {cold_start(code) * 1e3:14.1f}")
+    engine = CASES['projekt2 engine']
+    print(f"project modules in the engine import: {own_import_ms(engine):.1f} ms, "
+          f"heavy modules loaded: {loaded_heavy(engine) or 'none'}")
+
+    from projekt2.replications import Scenario, run_replication
+    from projekt2.replications import worker_context
+
+    run_replication(Scenario(), 0)  # forked workers inherit a warm engine
+    for method in (None, 'spawn'):
+        name = f'{worker_context().get_start_method()}, as the pools' if method is None else method
+        print(f"worker + first replication ({name}): {first_replication(method) * 1e3:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
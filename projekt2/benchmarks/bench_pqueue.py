@@ -0,0 +1,99 @@
+"""Porównuje kolejki priorytetowe przy 1e6 operacjach (na przemian wstawienie i pobranie, przy stałej
+długości kolejki) i liczy, ile razy samochód wyprzedził wcześniejszy samochód o tym samym priorytecie."""
+import sys
+from asyncio import PriorityQueue as AsyncioPriorityQueue
+from itertools import count
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+
+from projekt2.main import PRIORITY_LEVELS, PriorityQueue
+from projekt2.pqueue import StableHeap, BucketQueue
+
+
+class Item:
+    # Stand-in for Car: priority, entry time and the old comparison on priority only
+    __slots__ = ('priority', 'queue_entry_time', 'sequence')
+
+    def __init__(self, priority, time, sequence):
+        self.priority = priority
+        self.queue_entry_time = time
+        self.sequence = sequence
+
+    def __lt__(self, other):
+        return self.priority > other.priority
+
+
+def asyncio_items():
+    queue = AsyncioPriorityQueue()
+    return queue.put_nowait, queue.get_nowait
+
+
+def asyncio_tuples():
+    queue, sequence = AsyncioPriorityQueue(), count()
+    return (lambda item: queue.put_nowait((-item.priority, next(sequence), item)),
+            lambda: queue.get_nowait()[2])
+
+
+def structure(queue):
+    return (lambda item: queue.push(item, item.priority, item.queue_entry_time)), queue.pop
+
+
+def station_queue(aging=0.0):
+    queue = PriorityQueue('Warsztat', aging=aging)
+    return queue.put_nowait, queue.get_nowait
+
+
+CANDIDATES = {
+    'asyncio.PriorityQueue (Car.__lt__)': asyncio_items,
+    'asyncio.PriorityQueue (tuples)': asyncio_tuples,
+    'StableHeap': lambda: structure(StableHeap()),
+    'StableHeap, aging': lambda: structure(StableHeap(aging=0.5)),
+    'BucketQueue': lambda: structure(BucketQueue(PRIORITY_LEVELS)),
+    'BucketQueue, aging': lambda: structure(BucketQueue(PRIORITY_LEVELS, aging=0.5)),
+    'main.PriorityQueue': station_queue,
+    'main.PriorityQueue, aging': lambda: station_queue(0.5),
+}
+
+
+def bench(make, operations=1_000_000, length=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    pushes = length + operations // 2
+    items = [Item(int(priority), float(time), sequence) for sequence, (priority, time) in
+             enumerate(zip(rng.integers(PRIORITY_LEVELS, size=pushes), np.arange(pushes) * 0.01))]
+    put, get = make()
+    for item in items[:length]:
+        put(item)
+    last = [-1] * PRIORITY_LEVELS
+    overtaken = 0
+    start = perf_counter()
+    for item in items[length:]:
+        put(item)
+        get()
+    elapsed = perf_counter() - start
+    # Order check on a separate pass, so it is not timed
+    put, get = make()
+    for item in items[:length]:
+        put(item)
+    for item in items[length:length + operations // 20]:
+        put(item)
+        served = get()
+        if served.sequence < last[served.priority]:
+            overtaken += 1
+        last[served.priority] = served.sequence
+    return elapsed / operations * 1e9, overtaken / (operations // 20)
+
+
+def main(operations=1_000_000, length=1000):
+    print(f"{operations} operations, queue length {length}")
+    print(f"{'queue':<36} {'ns/op':>7} {'overtaken':>10}")
+    for name, make in CANDIDATES.items():
+        ns, overtaken = bench(make, operations, length)
+        print(f"{name:<36} {ns:7.0f} {overtaken:10.2%}")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,73 @@
+"""Odtwarzanie zapisu przyjazdów: szybkość czytania pliku i szczyt pamięci (tracemalloc) przy rosnącej
+długości zapisu oraz czas CPU na samochód przy odtwarzaniu roku w warsztacie wielodniowym
+w porównaniu z losowaniem tych samych samochodów.
+"""
+import csv
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import process_time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+
+from projekt2.garage import DAY_HOURS, Garage, daily_calendar
+from projekt2.main import DEFAULT_ROSTER, ObjectClass
+from projekt2.replay import COLUMNS, read_trace, trace_calendar
+
+
+def synthetic_trace(path, rows, cars_per_day=15, seed=0):
+    # Same distributions as Car.__init__, cars_per_day on average over the whole week
+    rng = np.random.default_rng(seed)
+    times = np.cumsum(rng.exponential(DAY_HOURS / cars_per_day, rows))
+    classes = rng.integers(len(ObjectClass), size=rows) + 1
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+        for time, priority, object_class in zip(times, rng.integers(3, size=rows), classes):
+            stages = ObjectClass.PINK.value - object_class
+            writer.writerow([f'{time:.6f}', priority, ObjectClass(object_class).name,
+                             *(f'{value:.6f}' for value in rng.exponential(2, stages)), *[''] * (3 - stages)])
+
+
+def read_speed(path):
+    tracemalloc.start()
+    start = process_time()
+    rows = sum(1 for _ in read_trace(path))
+    cpu = process_time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, cpu, peak
+
+
+def replay_speed(path, days):
+    start = process_time()
+    garage = Garage(seed=0).run(trace_calendar(read_trace(path), DEFAULT_ROSTER, days_off=(5, 6)), days)
+    replay = process_time() - start
+    start = process_time()
+    generated = Garage(seed=0).run(daily_calendar(days))
+    synthetic = process_time() - start
+    return len(garage.store), replay, synthetic / len(generated.store), garage.store.nbytes()
+
+
+def main(max_rows=1_000_000, days=365):
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'rows':>9} {'file MB':>8} {'rows/s':>10} {'peak KB':>8}")
+        for rows in (10_000, 100_000, max_rows):
+            path = os.path.join(directory, f'trace{rows}.csv')
+            synthetic_trace(path, rows)
+            rows, cpu, peak = read_speed(path)
+            print(f"{rows:9d} {os.path.getsize(path) / 1e6:8.1f} {rows / cpu:10.0f} {peak / 1024:8.0f}")
+
+        path = os.path.join(directory, 'year.csv')
+        synthetic_trace(path, days * 15)
+        cars, replay, synthetic, store_bytes = replay_speed(path, days)
+        print(f"{days} days, {cars} cars: replay {replay / cars * 1e6:.0f} us per car, "
+              f"synthetic {synthetic * 1e6:.0f} us per car, car store {store_bytes / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
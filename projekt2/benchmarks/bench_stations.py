@@ -0,0 +1,82 @@
+"""Duży warsztat: 50 stanowisk po 10 mechaników (500 mechaników) i losowa tablica tras.
+
+Mierzy czas CPU na samochód, iteracje pętli zdarzeń i liczbę zadań asyncio w trakcie dnia -
+mechanicy nie mają własnych zadań, więc tych jest kilka niezależnie od liczby mechaników.
+"""
+import asyncio
+import sys
+from pathlib import Path
+from time import process_time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+
+from projekt2.carstore import CarStore
+from projekt2.clock import VirtualEventLoop
+from projekt2.main import ObjectClass, simulate_day
+from projekt2.routing import RoutingTable
+from projekt2.rng import RandomStreams
+from projekt2.stats import SimulationStats
+
+
+def random_routing(stations, seed=0):
+    # Every class enters a random station; RED and ORANGE cars move on to one of three others after a repair
+    rng = np.random.default_rng(seed)
+    routing = {'parking': {name: {station: 1 / len(stations) for station in stations} for name in ('RED', 'ORANGE', 'GREEN')}}
+    routing['parking']['PINK'] = {'left': 1.0}
+    for station in stations:
+        others = rng.choice([other for other in stations if other != station], 3, replace=False)
+        routing[station] = {name: {str(other): 1 / 3 for other in others} for name in ('RED', 'ORANGE')}
+    return routing
+
+
+async def count_tasks(samples, every=10):
+    # Number of tasks alive (without this one), sampled while the day runs
+    while True:
+        await asyncio.sleep(every)
+        samples.append(len(asyncio.all_tasks()) - 1)
+
+
+def bench(num_stations=50, mechanics_per_station=10, num_cars=2000, seed=0):
+    stations = [f'stanowisko{number}' for number in range(num_stations)]
+    routing = RoutingTable(random_routing(stations, seed), stations, [object_class.name for object_class in ObjectClass])
+    roster = [{'id': number + 1, 'efficiency': 1, 'work_hours': num_cars + 24, 'name': f'{station.capitalize()}-{i}', 'station': station}
+              for number, (station, i) in enumerate((station, i) for station in stations for i in range(mechanics_per_station))]
+    streams = RandomStreams(seed, stations)
+    store = CarStore(station.capitalize() for station in stations)
+    stats = SimulationStats()
+    tasks = []
+
+    async def day():
+        counter = asyncio.create_task(count_tasks(tasks))
+        mechanics = await simulate_day({}, store, roster, num_cars, None, streams, routing, stats=stats)
+        counter.cancel()
+        return mechanics
+
+    with asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+        loop = runner.get_loop()
+        start = process_time()
+        mechanics = runner.run(day())
+        cpu = process_time() - start
+    return {
+        'mechanics': len(mechanics),
+        'repairs': sum(mechanic.total_repairs for mechanic in mechanics),
+        'cpu': cpu,
+        'iterations': loop.iterations,
+        'max_tasks': max(tasks),
+        'simulated_hours': loop.time(),
+    }
+
+
+def main(num_stations=50, mechanics_per_station=10, num_cars=2000):
+    result = bench(num_stations, mechanics_per_station, num_cars)
+    print(f"Stations x mechanics:     {num_stations} x {mechanics_per_station} = {result['mechanics']}")
+    print(f"Cars, repairs:            {num_cars}, {result['repairs']} in {result['simulated_hours']:.0f} simulated hours")
+    print(f"Tasks alive (max):        {result['max_tasks']}")
+    print(f"Loop iterations:          {result['iterations']} ({result['iterations'] / num_cars:.1f} per car)")
+    print(f"CPU time:                 {result['cpu']:.2f} s ({result['cpu'] / num_cars * 1e6:.0f} us per car)")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,34 @@
+"""Liczy iteracje pętli zdarzeń i czas CPU na jeden symulowany dzień (16 godzin)."""
+import asyncio
+import sys
+from pathlib import Path
+from time import process_time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+
+from projekt2.clock import VirtualEventLoop
+from projekt2.main import STATIONS, simulate
+from projekt2.rng import RandomStreams
+
+
+def bench_day(random_seed, num_cars=15):
+    streams = RandomStreams(random_seed, STATIONS)
+    with asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+        loop = runner.get_loop()
+        start = process_time()
+        runner.run(simulate(num_cars, streams=streams))  # no event sinks attached, so nothing is printed
+        return loop.iterations, process_time() - start
+
+
+def main(days=50):
+    results = np.array([bench_day(day) for day in range(days)])
+    iterations, cpu = results[:, 0], results[:, 1]
+    print(f"Simulated days:           {days}")
+    print(f"Loop iterations per day:  {iterations.mean():.0f} (min {iterations.min():.0f}, max {iterations.max():.0f})")
+    print(f"CPU time per day:         {cpu.mean() * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,256 @@
+"""Zestaw benchmarków symulatora na stałych scenariuszach, z wynikami w JSON do porównywania commitów.
+
+Scenariusze (silnik asyncio z main.simulate i, gdzie ma sens, zwektoryzowany z vectorized.py):
+
+- baseline - obecna sieć, 15 samochodów, jeden dzień (czas na replikację),
+- cars_10k, cars_1m - ta sama sieć z 10 tys. i milionem samochodów, zmiany trwają do ostatniego przyjazdu,
+- saturated - jeden wolniejszy mechanik w Warsztacie (obciążenie ok. 1.6), kolejka rośnie przez cały dzień,
+- queues - put/get kolejki stanowiska (main.PriorityQueue) przy 1000 czekających samochodach,
+- report - rysowanie raportu (report.render_report) dla dnia z baseline, gdy jest matplotlib.
+
+Zdarzenia symulowane to przyjazdy plus naprawy (każda to jedno zdarzenie, w obu silnikach tak samo).
+Każdy przypadek działa w osobnym procesie, więc szczyt RSS (getrusage) dotyczy tylko jego. Czasy to czas CPU
+najszybszego z kilku powtórzeń (repeat).
+
+    python projekt2/benchmarks/suite.py [SCENARIO ...] [--output FILE] [--compare OLD.json] [--threshold 0.2]
+
+Bez --output wynik trafia do benchmarks/results/<commit>.json (katalog jest w .gitignore).
+Z --compare drukuje zmiany względem starszego pliku i kończy się kodem 1, gdy któraś metryka pogorszyła się o więcej niż threshold.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from time import perf_counter, process_time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+
+from projekt2.main import DEFAULT_ROSTER, STATIONS
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'  # local results, ignored by git
+
+
+def long_shifts(roster, hours):
+    # Everyone works until the last car has arrived (cars come once an hour on average) and a day after
+    return [{**entry, 'work_hours': hours} for entry in roster]
+
+
+SATURATED_ROSTER = [entry for entry in DEFAULT_ROSTER if entry['station'] != 'warsztat'] + [
+    {'id': 6, 'efficiency': 0.7, 'work_hours': 16, 'name': 'Warsztat', 'station': 'warsztat'}]
+
+# repeat: timed runs per case, the fastest one is kept (like timeit), so a busy machine does not look like a slowdown
+SCENARIOS = {
+    'baseline': {'num_cars': 15, 'roster': DEFAULT_ROSTER, 'replications': {'asyncio': 200, 'vectorized': 20_000}, 'repeat': 5},
+    'cars_10k': {'num_cars': 10_000, 'roster': long_shifts(DEFAULT_ROSTER, 10_024), 'replications': {'asyncio': 1}, 'repeat': 3},
+    'cars_1m': {'num_cars': 1_000_000, 'roster': long_shifts(DEFAULT_ROSTER, 1_000_024), 'replications': {'asyncio': 1}, 'repeat': 1},
+    'saturated': {'num_cars': 2000, 'roster': long_shifts(SATURATED_ROSTER, 2024), 'replications': {'asyncio': 1, 'vectorized': 20},
+                  'repeat': 3},
+}
+CASES = [*((name, engine) for name, scenario in SCENARIOS.items() for engine in scenario['replications']),
+         ('queues', 'main.PriorityQueue'), ('report', 'matplotlib')]
+REPEAT = {'queues': 5, 'report': 3}
+
+# Metrics compared by --compare: True when higher is better
+METRICS = {'events_per_second': True, 'ns_per_op': False, 'seconds': False, 'peak_rss_mb': False}
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+
+
+def run_asyncio(scenario, replications):
+    from projekt2.clock import VirtualEventLoop
+    from projekt2.main import simulate
+    from projekt2.replications import replication_seeds
+    from projekt2.rng import RandomStreams
+
+    events = iterations = 0
+    start = process_time()
+    for seed in replication_seeds(0, replications):
+        with asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+            store, _, _, stats, _, _ = runner.run(simulate(scenario['num_cars'], scenario['roster'],
+                                                           streams=RandomStreams(seed, STATIONS)))
+            iterations += runner.get_loop().iterations
+        events += len(store) + sum(stats.repairs.values())
+    return process_time() - start, events, {'loop_iterations': iterations}
+
+
+def run_vectorized(scenario, replications):
+    from projekt2.rng import RandomStreams
+    from projekt2.vectorized import simulate_batch
+
+    start = process_time()
+    batch = simulate_batch(replications, scenario['num_cars'], scenario['roster'], RandomStreams(0, STATIONS))
+    return process_time() - start, batch['cars'] + batch['repairs'], {}
+
+
+def run_queues(operations=200_000, length=1000):
+    # Put/get pairs as the stations do them, with the streaming statistics told about every length change
+    from projekt2.clock import VirtualEventLoop
+    from projekt2.main import PRIORITY_LEVELS, PriorityQueue
+    from projekt2.stats import SimulationStats
+    from types import SimpleNamespace
+
+    rng = np.random.default_rng(0)
+    cars = [SimpleNamespace(priority=int(priority), queue_entry_time=float(time)) for time, priority in
+            enumerate(rng.integers(PRIORITY_LEVELS, size=length + operations))]
+
+    async def put_get():
+        queue = PriorityQueue('Warsztat', stats=SimulationStats())
+        for car in cars[:length]:
+            queue.put_nowait(car)
+        start = process_time()
+        for car in cars[length:]:
+            queue.put_nowait(car)
+            queue.get_nowait()
+        return process_time() - start
+
+    with asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+        return {'ns_per_op': runner.run(put_get()) / operations * 1e9}
+
+
+def run_report():
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError:
+        return {'skipped': 'matplotlib is not installed'}
+    from projekt2.clock import VirtualEventLoop
+    from projekt2.main import simulate
+    from projekt2.report import render_report
+    from projekt2.results import ResultsWriter
+    from projekt2.rng import RandomStreams
+
+    with asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+        results = ResultsWriter(metadata={'num_cars': 15, 'stations': [station.capitalize() for station in STATIONS]})
+        store, mechanics, results, _, start, end = runner.run(simulate(15, results=results, streams=RandomStreams(0, STATIONS),
+                                                                       trace=True))
+    results.metadata.update(mechanics=[{'id': mechanic.id, 'name': mechanic.name} for mechanic in mechanics],
+                            simulation_start_time=start, simulation_end_time=end)
+    results.close()
+    with tempfile.TemporaryDirectory() as directory:
+        begin = perf_counter()
+        render_report(results.tables(), directory, force=True)
+        return {'seconds': perf_counter() - begin}
+
+
+def run_case(name, engine):
+    """Jeden przypadek zestawu (w osobnym procesie); zwraca słownik metryk."""
+    begin = perf_counter()
+    if name in REPEAT:
+        runs = [(run_queues if name == 'queues' else run_report)() for _ in range(REPEAT[name])]
+        result = min(runs, key=lambda run: run.get('ns_per_op', run.get('seconds', 0.0)))
+        result['repeat'] = len(runs)
+    else:
+        scenario = SCENARIOS[name]
+        replications = scenario['replications'][engine]
+        run = run_asyncio if engine == 'asyncio' else run_vectorized
+        cpu, events, extra = min((run(scenario, replications) for _ in range(scenario['repeat'])), key=lambda run: run[0])
+        result = {
+            'cars': scenario['num_cars'],
+            'replications': replications,
+            'repeat': scenario['repeat'],
+            'events': int(events),
+            'cpu_seconds': cpu,
+            'events_per_second': events / cpu,
+            'seconds_per_replication': cpu / replications,
+            **extra,
+        }
+    result['wall_seconds'] = perf_counter() - begin
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def run_suite(names=None):
+    names = names or list(SCENARIOS) + ['queues', 'report']
+    results = {}
+    for name, engine in CASES:
+        if name not in names:
+            continue
+        # A fresh interpreter per case: peak RSS is per process and must not carry over between cases
+        with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as executor:
+            results[f'{name}/{engine}'] = executor.submit(run_case, name, engine).result()
+        print(format_case(f'{name}/{engine}', results[f'{name}/{engine}']), flush=True)
+    return {
+        'commit': git_commit(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': f'{platform.system()} {platform.machine()}',
+        'results': results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_case(case, result):
+    if 'skipped' in result:
+        return f"{case:<28} skipped: {result['skipped']}"
+    if 'events_per_second' in result:
+        return (f"{case:<28} {result['events_per_second']:12,.0f} events/s {result['seconds_per_replication'] * 1e3:12.3f} ms/replication "
+                f"{result['peak_rss_mb']:8.1f} MB")
+    if 'ns_per_op' in result:
+        return f"{case:<28} {result['ns_per_op']:12,.0f} ns/op {'':>27} {result['peak_rss_mb']:8.1f} MB"
+    return f"{case:<28} {result['seconds']:12.3f} s {'':>31} {result['peak_rss_mb']:8.1f} MB"
+
+
+def compare(old, new, threshold=0.2):
+    """Zmiany metryk względem starszego wyniku; zwraca listę (przypadek, metryka, stara, nowa, zmiana, regresja)."""
+    changes = []
+    for case, result in new['results'].items():
+        previous = old['results'].get(case)
+        if previous is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in result or metric not in previous:
+                continue
+            change = result[metric] / previous[metric] - 1
+            worse = -change if higher_is_better else change
+            changes.append((case, metric, previous[metric], result[metric], change, worse > threshold))
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark suite of the simulator')
+    parser.add_argument('scenarios', nargs='*', help=f"any of {', '.join([*SCENARIOS, 'queues', 'report'])} (default: all)")
+    parser.add_argument('--output', help='JSON file for the results (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='earlier JSON result to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    suite = run_suite(args.scenarios)
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{suite['commit'] or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(suite, indent=2))
+    print(f"Saved to {output}")
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text())
+        changes = compare(old, suite, args.threshold)
+        print(f"Compared with {old.get('commit')} ({args.compare}):")
+        for case, metric, before, after, change, regression in changes:
+            print(f"{case:<28} {metric:<24} {before:14.4g} -> {after:14.4g} {change:+8.1%}{'  REGRESSION' if regression else ''}")
+        if any(change[-1] for change in changes):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
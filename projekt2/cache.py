@@ -0,0 +1,135 @@
+"""Podręczna pamięć wyników replikacji na dysku, z kluczem (skrót scenariusza, skrót kodu silnika, ziarno).
+
+Scenariusz jest sprowadzany do postaci kanonicznej - skład mechaników z liczbami jako float, num_cars, tablica
+tras (prawdopodobieństwa, nazwy stanowisk i klas) - i haszowany, więc ten sam scenariusz zapisany inaczej
+(16 zamiast 16.0, brak domyślnego 'start') trafia w ten sam wpis. Kolejność mechaników zostaje zachowana:
+decyduje o tym, który wolny mechanik bierze samochód, więc zmienia wyniki. Każda replikacja jest zapisana
+osobno pod swoim ziarnem, więc dłuższa albo częściowo pokrywająca się seria liczy tylko brakujące replikacje.
+
+Skrót kodu to SHA-1 źródeł modułów, od których zależy wynik silnika, i ENGINE_VERSION - zmiana któregokolwiek
+z nich sprawia, że stare wpisy przestają pasować; są usuwane przy pierwszym zapisie i nigdy nie są zwracane.
+Wpisy leżą w jednym pliku SQLite; gdy przekroczą max_bytes, usuwane są najdawniej używane (LRU).
+"""
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+from functools import lru_cache
+
+ENGINE_VERSION = 1  # bump when results change for a reason the hashed sources do not show (e.g. a numpy upgrade)
+
+# Modules whose source decides the results of an engine
+ENGINE_MODULES = {
+    'asyncio': ['main', 'station', 'pqueue', 'policies', 'routing', 'rng', 'carstore', 'clock', 'stats', 'events',
+                'replications'],
+}
+DEFAULT_PATH = '.simcache/replications.sqlite'
+DEFAULT_MAX_BYTES = 256 << 20
+
+
+@lru_cache(maxsize=None)
+def code_hash(engine):
+    digest = hashlib.sha1(f'{engine}:{ENGINE_VERSION}'.encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for module in ENGINE_MODULES[engine]:
+        with open(os.path.join(directory, f'{module}.py'), 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def canonical(scenario):
+    """Scenariusz (replications.Scenario) jako słownik niezależny od zapisu liczb; kolejność mechaników zostaje."""
+    routing = scenario.routing
+    roster = [{'id': int(entry['id']), 'name': entry['name'], 'station': entry['station'],
+               'efficiency': float(entry['efficiency']), 'work_hours': float(entry['work_hours']),
+               'start': float(entry.get('start', 0))}
+              for entry in scenario.roster]
+    return {
+        'num_cars': int(scenario.num_cars),
+        'roster': roster,
+        'routing': {'locations': list(routing.locations), 'classes': list(routing.classes),
+                    'outcomes': list(routing.outcomes), 'probabilities': routing.probabilities.tolist()},
+    }
+
+
+def scenario_hash(scenario):
+    return hashlib.sha1(json.dumps(canonical(scenario), sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """Wyniki replikacji na dysku. get_many/put_many operują na {ziarno: wynik} jednego scenariusza i silnika."""
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results (scenario TEXT, seed INTEGER, engine TEXT, code TEXT, '
+                                'value BLOB, size INTEGER, used REAL, PRIMARY KEY (scenario, seed, engine))')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+
+    def get_many(self, scenario, seeds, engine='asyncio'):
+        key, code = scenario_hash(scenario), code_hash(engine)
+        found = {}
+        seeds = list(seeds)
+        for start in range(0, len(seeds), 500):  # SQLite limits the number of parameters per query
+            part = seeds[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT seed, value FROM results WHERE scenario = ? AND engine = ? AND code = ? "
+                f"AND seed IN ({', '.join('?' * len(part))})", (key, engine, code, *part))
+            found.update((seed, pickle.loads(value)) for seed, value in rows)
+        if found:
+            with self.connection:
+                self.connection.executemany('UPDATE results SET used = ? WHERE scenario = ? AND seed = ? AND engine = ?',
+                                            [(time.time(), key, seed, engine) for seed in found])
+        self.hits += len(found)
+        self.misses += len(seeds) - len(found)
+        return found
+
+    def put_many(self, scenario, results, engine='asyncio'):
+        key, code = scenario_hash(scenario), code_hash(engine)
+        now = time.time()
+        rows = []
+        for seed, result in results.items():
+            value = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, seed, engine, code, value, len(value), now))
+        with self.connection:
+            # Entries of an older version of the engine can never be hit again
+            self.connection.execute('DELETE FROM results WHERE engine = ? AND code != ?', (engine, code))
+            self.connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        self.evict()
+
+    def evict(self):
+        """Usuwa najdawniej używane wpisy, aż łączny rozmiar wyników zmieści się w max_bytes."""
+        total = self.size()
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        with self.connection:
+            for scenario, seed, engine, size in self.connection.execute(
+                    'SELECT scenario, seed, engine, size FROM results ORDER BY used').fetchall():
+                self.connection.execute('DELETE FROM results WHERE scenario = ? AND seed = ? AND engine = ?',
+                                        (scenario, seed, engine))
+                total -= size
+                removed += 1
+                if total <= self.max_bytes:
+                    break
+        return removed
+
+    def size(self):
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute('DELETE FROM results')
+
+    def close(self):
+        self.connection.close()
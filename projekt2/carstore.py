@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class CarStore:
+    """Kolumnowy magazyn danych samochodów (struct-of-arrays) - obiekty Car są tylko widokami na wiersz."""
+
+    # Every repair moves a car one class down (RED -> ORANGE -> GREEN -> PINK), so no car needs more than 3
+    MAX_STAGES = 3
+    MAX_ROUTE = 3
+
+    COLUMNS = {
+        'id': np.int32,
+        'priority': np.int8,
+        'original_class': np.int8,  # ObjectClass value
+        'object_class': np.int8,
+        'arrival': np.float64,
+        'queued': np.float64,  # time the car entered its current queue
+        'start': np.float64,  # start of the latest repair
+        'repair_end': np.float64,
+        'end': np.float64,
+        'destroyed': np.bool_,
+        'stages': np.int8,  # number of repair times left in repair_times
+        'route_length': np.int8,
+    }
+
+    def __init__(self, route_names, capacity=1024):
+        self.route_names = list(route_names)  # station code -> queue name
+        self.route_codes = {name: code for code, name in enumerate(self.route_names)}
+        self.size = 0
+        self.columns = {name: np.empty(capacity, dtype) for name, dtype in self.COLUMNS.items()}
+        self.repair_times = np.empty((capacity, self.MAX_STAGES))
+        # Routes as small station codes in one flat array, car i's route starts at offset i * MAX_ROUTE
+        self.routes = np.empty(capacity * self.MAX_ROUTE, np.int8)
+
+    def __len__(self):
+        return self.size
+
+    def __getattr__(self, name):
+        # store.arrival etc. give the filled part of a column
+        columns = self.__dict__.get('columns')
+        if columns is None or name not in columns:
+            raise AttributeError(name)
+        return columns[name][:self.size]
+
+    def _grow(self):
+        capacity = 2 * len(self.columns['id'])
+        for name, column in self.columns.items():
+            self.columns[name] = np.resize(column, capacity)
+        self.repair_times = np.resize(self.repair_times, (capacity, self.MAX_STAGES))
+        self.routes = np.resize(self.routes, capacity * self.MAX_ROUTE)
+
+    def add(self, id, priority, object_class, repair_times):
+        if self.size == len(self.columns['id']):
+            self._grow()
+        index = self.size
+        self.size += 1
+        row = dict(id=id, priority=priority, original_class=object_class, object_class=object_class,
+                   arrival=np.nan, queued=np.nan, start=np.nan, repair_end=np.nan, end=np.nan, destroyed=False,
+                   stages=len(repair_times), route_length=0)
+        for name, value in row.items():
+            self.columns[name][index] = value
+        self.repair_times[index, :len(repair_times)] = repair_times
+        return index
+
+    def add_to_route(self, index, name):
+        length = int(self.columns['route_length'][index])
+        if length == self.MAX_ROUTE:
+            raise IndexError(f"Car {self.columns['id'][index]} route is longer than {self.MAX_ROUTE} stations")
+        self.routes[index * self.MAX_ROUTE + length] = self.route_codes[name]
+        self.columns['route_length'][index] = length + 1
+
+    def route(self, index):
+        offset = index * self.MAX_ROUTE
+        return [self.route_names[code] for code in self.routes[offset:offset + int(self.columns['route_length'][index])]]
+
+    def to_records(self, dtype):
+        # Structured array with the fields of `dtype` taken from the matching columns
+        records = np.empty(self.size, dtype)
+        for name in dtype.names:
+            records[name] = self.columns[name][:self.size]
+        return records
+
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values()) + self.repair_times.nbytes + self.routes.nbytes
@@ -0,0 +1,41 @@
+import asyncio
+import selectors
+
+
+class VirtualSelector(selectors.DefaultSelector):
+    """Selector, który zamiast czekać przesuwa wirtualny zegar pętli."""
+
+    def __init__(self, loop):
+        super().__init__()
+        self._loop = loop
+
+    def select(self, timeout=None):
+        self._loop.iterations += 1
+        if timeout is None:
+            # Nothing is scheduled - block for real, otherwise the loop would spin forever
+            return super().select(timeout)
+
+        events = super().select(0)
+        if not events and timeout > 0:
+            self._loop.advance(timeout)  # jump straight to the next scheduled event
+        return events
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """Pętla zdarzeń z czasem symulowanym - asyncio.sleep(1) trwa jedną godzinę, a nie sekundę."""
+
+    def __init__(self, start_time=0.0):
+        self._virtual_time = start_time
+        self.iterations = 0  # number of loop iterations (one select call each)
+        super().__init__(selector=VirtualSelector(self))
+
+    def time(self):
+        return self._virtual_time
+
+    def advance(self, delta):
+        self._virtual_time += delta
+
+
+def now():
+    # Current simulation time in hours (virtual or wall-clock, depending on the running loop)
+    return asyncio.get_running_loop().time()
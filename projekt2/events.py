@@ -0,0 +1,219 @@
+"""Strumień zdarzeń symulacji z wymiennymi ujściami (sinks) zamiast print przy każdej zmianie stanu."""
+import csv
+import json
+from enum import Enum, auto
+
+import numpy as np
+
+from .clock import now
+
+
+class EventType(Enum):
+    ARRIVED = auto()          # car arrived at the parking
+    ENQUEUED = auto()         # car added to a station queue
+    DESTROYED = auto()        # car can not be repaired
+    NO_REPAIR = auto()        # car does not need repair
+    REPAIR_STARTED = auto()   # value: planned repair time
+    REPAIR_FINISHED = auto()  # value: repair time
+    OVERTIME = auto()         # value: overtime hours the repair will take
+    REFUSED = auto()          # value: overtime hours that made the mechanic refuse
+    REPAIRED = auto()         # car is fully repaired and leaves the system
+    SHIFT_END = auto()        # value: total repairs of the mechanic
+
+    def __str__(self):
+        return self.name
+
+
+class Event:
+    __slots__ = ('time', 'car_id', 'station', 'event_type', 'object_class', 'priority', 'mechanic', 'value')
+
+    def __init__(self, time, car_id, station, event_type, object_class, priority, mechanic, value):
+        self.time = time
+        self.car_id = car_id
+        self.station = station
+        self.event_type = event_type
+        self.object_class = object_class
+        self.priority = priority
+        self.mechanic = mechanic
+        self.value = value
+
+    def __iter__(self):
+        return iter((self.time, self.car_id, self.station, self.event_type, self.object_class, self.priority, self.mechanic, self.value))
+
+
+class EventLog:
+    """Rozsyła zdarzenia do podłączonych ujść. Bez ujść `enabled` jest False i nic nie jest budowane."""
+
+    def __init__(self):
+        self.sinks = []
+        self.enabled = False
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        self.enabled = any(sink.active for sink in self.sinks)
+        return sink
+
+    def remove_sink(self, sink):
+        self.sinks.remove(sink)
+        self.enabled = any(sink.active for sink in self.sinks)
+
+    def emit(self, event_type, car=None, station=None, mechanic=None, value=np.nan):
+        # Call sites check `enabled` first, so in batch mode this is never reached
+        if car is None:
+            event = Event(now(), -1, station, event_type, None, -1, mechanic, value)
+        else:
+            event = Event(now(), car.id, station, event_type, car.object_class, car.priority, mechanic, value)
+        for sink in self.sinks:
+            sink.write(event)
+
+    def report(self, text):
+        # Summary text of a run (e.g. the statistics at the end), shown by the sinks that display text
+        for sink in self.sinks:
+            sink.report(text)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+        self.sinks = []
+        self.enabled = False
+
+
+class NullSink:
+    active = False  # attaching it keeps the log disabled
+
+    def write(self, event):
+        pass
+
+    def report(self, text):
+        pass
+
+    def close(self):
+        pass
+
+
+class ConsoleSink:
+    """Czytelne, kolorowe komunikaty - te same, które wcześniej wypisywał print."""
+    active = True
+
+    def __init__(self):
+        from colorama import Fore
+
+        self.messages = {
+            EventType.ARRIVED: (Fore.CYAN, "Car {car_id} with {priority} priority of {object_class} class arrived at the parking."),
+            EventType.ENQUEUED: (Fore.CYAN, "Car {car_id} with {priority} priority of {object_class} class added to the {station}"),
+            EventType.DESTROYED: (Fore.RED, "Car {car_id} can not be repaired"),
+            EventType.NO_REPAIR: (Fore.MAGENTA, "Car {car_id} does not need repair"),
+            EventType.REPAIR_STARTED: (Fore.YELLOW, "{mechanic} started repairing car {car_id} with {priority} priority. It will take {value} hours."),
+            EventType.REPAIR_FINISHED: (Fore.GREEN, "{mechanic} finished repairing car {car_id}. It took {value} hours."),
+            EventType.OVERTIME: (Fore.YELLOW, "{mechanic} will repair car {car_id}. It takes {value} hours overtime."),
+            EventType.REFUSED: (Fore.RED, "{mechanic} will not repair car {car_id}. It takes {value} hours overtime."),
+            EventType.REPAIRED: (Fore.MAGENTA, "Car {car_id} is fully repaired now"),
+            EventType.SHIFT_END: (Fore.WHITE, "{mechanic} is done for the day. Total repairs: {value}"),
+        }
+
+    def write(self, event):
+        color, message = self.messages[event.event_type]
+        print(color + message.format(car_id=event.car_id, priority=event.priority, object_class=event.object_class,
+                                     station=event.station, mechanic=event.mechanic, value=event.value))
+
+    def report(self, text):
+        print(text)
+
+    def close(self):
+        pass
+
+
+class CsvSink:
+    """Buforuje zdarzenia i zapisuje je do pliku CSV paczkami po `buffer_size`."""
+    active = True
+    HEADER = ['time', 'car_id', 'station', 'event_type', 'object_class', 'priority', 'mechanic', 'value']
+
+    def __init__(self, path, buffer_size=65536):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.HEADER)
+        self.buffer_size = buffer_size
+        self.buffer = []
+
+    def write(self, event):
+        self.buffer.append(tuple(event))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.writer.writerows(self.buffer)
+        self.buffer = []
+
+    def report(self, text):
+        pass  # the file holds event records only
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+EVENT_DTYPE = np.dtype([
+    ('time', np.float64),
+    ('car_id', np.int32),
+    ('station', np.int16),
+    ('event_type', np.int8),
+    ('object_class', np.int8),
+    ('priority', np.int8),
+    ('mechanic', np.int16),
+    ('value', np.float64),
+])
+
+
+class BinarySink:
+    """Zapisuje zdarzenia jako surowe rekordy EVENT_DTYPE (np.fromfile), paczkami po `buffer_size`.
+
+    Nazwy stanowisk i mechaników są kodowane liczbami, słownik trafia do pliku `<path>.json`.
+    """
+    active = True
+
+    def __init__(self, path, buffer_size=65536):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.buffer = np.empty(buffer_size, EVENT_DTYPE)
+        self.count = 0
+        self.names = {'station': {None: -1}, 'mechanic': {None: -1}}
+
+    def _code(self, kind, name):
+        codes = self.names[kind]
+        if name not in codes:
+            codes[name] = len(codes) - 1
+        return codes[name]
+
+    def write(self, event):
+        self.buffer[self.count] = (
+            event.time, event.car_id, self._code('station', event.station), event.event_type.value,
+            event.object_class.value if event.object_class is not None else -1, event.priority,
+            self._code('mechanic', event.mechanic), event.value,
+        )
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        self.buffer[:self.count].tofile(self.file)
+        self.count = 0
+
+    def report(self, text):
+        pass  # the file holds event records only
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        with open(f'{self.path}.json', 'w') as file:
+            json.dump({kind: {code: name for name, code in codes.items() if name is not None}
+                       for kind, codes in self.names.items()}, file)
+
+
+def read_binary(path):
+    # Returns the records and the code -> name dictionaries written by BinarySink
+    with open(f'{path}.json') as file:
+        names = {kind: {int(code): name for code, name in codes.items()} for kind, codes in json.load(file).items()}
+    return np.fromfile(path, dtype=EVENT_DTYPE), names
+
+
+event_log = EventLog()  # shared log used by the simulation, no sinks attached by default
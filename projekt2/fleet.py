@@ -0,0 +1,328 @@
+"""Sieć warsztatów: każdy warsztat (Site) to osobna symulacja z własną pętlą zdarzeń, a warsztaty wymieniają
+tylko samochody przekazywane między sobą (transfery).
+
+Samochód, który parking kieruje na stanowisko, z prawdopodobieństwem transfer_probability jedzie zamiast
+tego na to samo stanowisko losowo wybranego innego warsztatu i dociera tam po transfer_delay godzinach.
+Synchronizacja jest konserwatywna z wyprzedzeniem (lookahead) równym transfer_delay: koordynator przesuwa
+wszystkie warsztaty o okno tej długości, a dopiero na granicy okien rozsyła transfery. Transfer wysłany
+w oknie [t, t + L) dociera najwcześniej w t + L, więc żaden warsztat nie dostaje zdarzenia ze swojej przeszłości.
+Skrzynki odbiorcze są sortowane, więc wynik nie zależy od tego, jak warsztaty rozłożono na procesy.
+
+- LocalFleet - wszystkie warsztaty w bieżącym procesie (testy, debugowanie),
+- ProcessFleet - warsztaty podzielone na `processes` procesów roboczych, które trzymają swoje warsztaty
+  przez cały przebieg; na granicy okna przez potok idą tylko transfery.
+
+Wyniki (czasy w systemie, liczniki, statystyki stanowisk) są zbierane na końcu w koordynatorze.
+
+    python -m projekt2.fleet [SITES] [DAYS] [PROCESSES]
+"""
+import asyncio
+import os
+import sys
+from collections import namedtuple
+from time import perf_counter
+
+import numpy as np
+
+from .carstore import CarStore
+from .clock import VirtualEventLoop, now
+from .events import event_log, EventType
+from .garage import DAY_HOURS, daily_calendar
+from .main import STATIONS, STATION_NAMES, DEFAULT_ROSTER, ROUTING, Car, ObjectClass, make_station_queues, simulate_day
+from .replications import worker_context
+from .rng import RandomStreams
+from .stats import SimulationStats, Welford
+
+TRANSFER_PROBABILITY = 0.05  # share of cars sent from the parking to another garage
+TRANSFER_DELAY = 2.0  # hours on the road between two garages, also the synchronisation window
+SITE_IDS = 1_000_000  # a car arriving from site s keeps its number as (s + 1) * SITE_IDS + id
+
+# A car on its way to another site: its row of the origin's car store, without the times of the current visit
+Transfer = namedtuple('Transfer', 'arrival destination origin id priority original_class object_class '
+                                  'repair_times arrived route location')
+
+
+class TransferGate:
+    """Kolejka stanowiska widziana przez parking: samochód trafia na stanowisko albo jedzie do innego warsztatu.
+
+    put zwraca True, gdy samochód wysłano dalej - wtedy main.enqueue_car nie zapisuje wizyty w trasie
+    ani zdarzenia ENQUEUED, robi to dopiero warsztat, do którego samochód dojedzie.
+    """
+
+    def __init__(self, site, station):
+        self.site = site
+        self.station = station
+        self.name = station.name
+
+    async def put(self, car):
+        site = self.site
+        if site.sites > 1 and site.random() < site.transfer_probability:
+            site.send(car, self.station.location)
+            return True
+        await self.station.put(car)
+        return False
+
+
+class Site:
+    """Jeden warsztat sieci: kalendarz dni na trwałych kolejkach i własnej pętli zdarzeń przesuwanej oknami (advance)."""
+
+    def __init__(self, number, sites, calendar, seed=0, transfer_probability=TRANSFER_PROBABILITY,
+                 transfer_delay=TRANSFER_DELAY):
+        self.number = number
+        self.sites = sites  # number of sites in the fleet
+        self.transfer_probability = transfer_probability
+        self.transfer_delay = transfer_delay
+        # Site streams and a separate transfer stream, so transfer decisions do not shift the other draws
+        site_seed, transfer_seed = np.random.SeedSequence(seed).spawn(sites * 2)[number * 2:number * 2 + 2]
+        self.streams = RandomStreams(site_seed, STATIONS)
+        self.random = np.random.default_rng(transfer_seed).random
+        self.routing = ROUTING
+        self.stats = SimulationStats()
+        self.store = CarStore(STATION_NAMES)
+        self.queues = make_station_queues(self.stats)  # kept over night, cars not repaired wait in them
+        self.network = None  # stations of the current day, None between shifts
+        self.outbox = []
+        self.sent = []  # store indices of cars sent to another site
+        self.received = 0
+        self.repairs = 0
+        self.loop = VirtualEventLoop(0.0)
+        self.task = self.loop.create_task(self._run(calendar))
+
+    async def _run(self, calendar):
+        for day in calendar:
+            day_start = now()
+            mechanics = await simulate_day(self.queues, self.store, day['roster'], day['num_cars'], None, self.streams,
+                                           self.routing, first_car_id=len(self.store) + 1, stats=self.stats,
+                                           parking_targets=self._parking_targets)
+            self.network = None
+            self.repairs += sum(mechanic.total_repairs for mechanic in mechanics)
+            await asyncio.sleep(max(0.0, day_start + DAY_HOURS - now()))
+
+    def _parking_targets(self, network):
+        self.network = network
+        return {key: TransferGate(self, station) for key, station in network.queues.items()}
+
+    @property
+    def done(self):
+        return self.task.done()
+
+    def send(self, car, location):
+        destination = int(self.random() * (self.sites - 1))
+        destination += destination >= self.number  # any site but this one
+        self.outbox.append(Transfer(now() + self.transfer_delay, destination, self.number, car.id, car.priority,
+                                    car.original_class.value, car.object_class.value, car.repair_time,
+                                    car.arrival_time, car.mechanics_route, location))
+        self.sent.append(car.index)
+
+    def _receive(self, transfer):
+        store = self.store
+        index = store.add((transfer.origin + 1) * SITE_IDS + transfer.id, transfer.priority, transfer.object_class,
+                          transfer.repair_times)
+        store.columns['original_class'][index] = transfer.original_class
+        for name in transfer.route:
+            store.add_to_route(index, name)
+        car = Car.view(store, index)
+        car.arrival_time = transfer.arrived  # time in system counts from the arrival at the first site
+        self.received += 1
+        if self.network is not None:
+            self.network.stations[transfer.location].enqueue(car)
+        else:
+            # Between shifts the car waits in the queue for the next day
+            queue = self.queues[f'{transfer.location}_queue']
+            car.queue_entry_time = now()
+            queue.put_nowait(car)
+            car.add_to_route(queue.name)
+            if event_log.enabled:
+                event_log.emit(EventType.ENQUEUED, car, queue.name)
+
+    def advance(self, until, inbox=()):
+        """Przesuwa symulację do chwili `until` (z transferami, które do niej dotrą) i zwraca wysłane transfery."""
+        for transfer in inbox:
+            if transfer.arrival < self.loop.time():
+                raise RuntimeError(f"Transfer of car {transfer.id} arrives at {transfer.arrival}, site {self.number} "
+                                   f"is already at {self.loop.time()}")
+            self.loop.call_at(transfer.arrival, self._receive, transfer)
+        self.loop.run_until_complete(asyncio.sleep(until - self.loop.time()))
+        if self.task.done() and self.task.exception() is not None:
+            raise self.task.exception()
+        outbox, self.outbox = self.outbox, []
+        return outbox
+
+    def summary(self, time):
+        """Wyniki warsztatu do zebrania przez koordynatora; samochody w trakcie naprawy są ucięte w chwili `time`."""
+        store = self.store
+        finished = ~np.isnan(store.end)
+        sent = np.zeros(len(store), bool)
+        sent[self.sent] = True
+        unfinished = ~finished & ~store.destroyed & (store.object_class != ObjectClass.PINK.value) & ~sent
+        self.loop.close()
+        return {
+            'site': self.number,
+            'arrived': len(store) - self.received,
+            'finished': int(finished.sum()),
+            'destroyed': int(store.destroyed.sum()),
+            'unfinished': int(unfinished.sum()),
+            'sent': len(self.sent),
+            'received': self.received,
+            'repairs': self.repairs,
+            'time_in_system': store.end[finished] - store.arrival[finished],
+            'censored_time': time - store.arrival[unfinished],
+            'stats': self.stats,
+        }
+
+
+class Fleet:
+    """Wspólna pętla koordynatora: okna długości lookahead, rozsyłanie transferów, zbieranie wyników."""
+
+    def __init__(self, sites=10, days=7, roster=DEFAULT_ROSTER, num_cars=15, seed=0,
+                 transfer_probability=TRANSFER_PROBABILITY, transfer_delay=TRANSFER_DELAY):
+        if transfer_delay <= 0:
+            raise ValueError('transfer_delay is the lookahead of the synchronisation and must be positive')
+        self.sites = sites
+        self.lookahead = transfer_delay
+        calendar = daily_calendar(days, roster, num_cars)
+        self.site_args = [(number, sites, calendar, seed, transfer_probability, transfer_delay) for number in range(sites)]
+        self.time = 0.0
+        self.windows = 0
+        self.transfers = 0
+
+    def run(self):
+        inboxes = {}
+        done = False
+        while not done or inboxes:
+            self.time += self.lookahead
+            outbox, done = self._advance(self.time, inboxes)
+            self.windows += 1
+            self.transfers += len(outbox)
+            inboxes = {}
+            for transfer in sorted(outbox, key=lambda transfer: (transfer.arrival, transfer.origin, transfer.id)):
+                inboxes.setdefault(transfer.destination, []).append(transfer)
+        return aggregate(self._collect(self.time), self.time)
+
+
+class LocalFleet(Fleet):
+    """Wszystkie warsztaty w bieżącym procesie - ten sam wynik co ProcessFleet, bez procesów roboczych."""
+
+    def run(self):
+        self._sites = [Site(*args) for args in self.site_args]
+        return super().run()
+
+    def _advance(self, until, inboxes):
+        outbox = []
+        for site in self._sites:
+            outbox += site.advance(until, inboxes.get(site.number, ()))
+        return outbox, all(site.done for site in self._sites)
+
+    def _collect(self, time):
+        return [site.summary(time) for site in self._sites]
+
+
+def _worker(connection, site_args):
+    # Keeps its sites for the whole run; per window receives (until, inboxes) and answers (transfers, done)
+    sites = [Site(*args) for args in site_args]
+    while True:
+        message = connection.recv()
+        if message[0] == 'advance':
+            _, until, inboxes = message
+            outbox = []
+            for site in sites:
+                outbox += site.advance(until, inboxes.get(site.number, ()))
+            connection.send((outbox, all(site.done for site in sites)))
+        else:
+            connection.send([site.summary(message[1]) for site in sites])
+            break
+    connection.close()
+
+
+class ProcessFleet(Fleet):
+    """Warsztaty rozłożone po równo na `processes` procesów roboczych (domyślnie liczba rdzeni)."""
+
+    def __init__(self, *args, processes=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.processes = min(processes or os.cpu_count(), self.sites)
+
+    def run(self):
+        self._connections, self._workers = [], []
+        shards = [self.site_args[number::self.processes] for number in range(self.processes)]
+        self._shard_of = {args[0]: shard for shard, site_args in enumerate(shards) for args in site_args}
+        context = worker_context()
+        try:
+            for site_args in shards:
+                connection, child = context.Pipe()
+                worker = context.Process(target=_worker, args=(child, site_args), daemon=True)
+                worker.start()
+                child.close()
+                self._connections.append(connection)
+                self._workers.append(worker)
+            return super().run()
+        finally:
+            for worker in self._workers:
+                worker.join(timeout=10)
+                if worker.is_alive():
+                    worker.terminate()
+
+    def _advance(self, until, inboxes):
+        shard_inboxes = [{} for _ in self._connections]
+        for destination, transfers in inboxes.items():
+            shard_inboxes[self._shard_of[destination]][destination] = transfers
+        for connection, shard_inbox in zip(self._connections, shard_inboxes):
+            connection.send(('advance', until, shard_inbox))
+        outbox, done = [], True
+        for connection in self._connections:
+            transfers, shard_done = connection.recv()
+            outbox += transfers
+            done &= shard_done
+        return outbox, done
+
+    def _collect(self, time):
+        summaries = []
+        for connection in self._connections:
+            connection.send(('collect', time))
+        for connection in self._connections:
+            summaries += connection.recv()
+        return sorted(summaries, key=lambda summary: summary['site'])
+
+
+def aggregate(summaries, time):
+    """Łączy wyniki warsztatów: sumy liczników, czasy w systemie całej sieci i statystyki oczekiwania stanowisk."""
+    counters = ('arrived', 'finished', 'destroyed', 'unfinished', 'sent', 'received', 'repairs')
+    times = np.concatenate([summary['time_in_system'] for summary in summaries])
+    censored = np.concatenate([times, *(summary['censored_time'] for summary in summaries)])
+    wait = {}
+    for summary in summaries:
+        for station, accumulator in summary['stats'].wait['station'].items():
+            wait.setdefault(station, Welford()).merge(accumulator.moments)
+    return {
+        'sites': len(summaries),
+        'time': time,
+        **{counter: sum(summary[counter] for summary in summaries) for counter in counters},
+        'in_transit': sum(summary['sent'] for summary in summaries) - sum(summary['received'] for summary in summaries),
+        'mean_time': times.mean() if len(times) else np.nan,
+        'p95_time': np.percentile(times, 95) if len(times) else np.nan,
+        'p95_time_censored': np.percentile(censored, 95) if len(censored) else np.nan,
+        'wait': {station: (moments.count, moments.mean) for station, moments in wait.items()},
+        'per_site': [{counter: summary[counter] for counter in ('site', *counters)} for summary in summaries],
+    }
+
+
+def print_fleet(result):
+    print(f"Sites:                 {result['sites']}, {result['time']:.0f} simulated hours")
+    print(f"Cars arrived:          {result['arrived']} (finished {result['finished']}, destroyed {result['destroyed']}, "
+          f"unfinished {result['unfinished']})")
+    print(f"Transfers:             {result['sent']} sent, {result['received']} received, {result['in_transit']} in transit")
+    print(f"Repairs:               {result['repairs']}")
+    print(f"Time in system:        mean {result['mean_time']:.2f} h, p95 {result['p95_time']:.2f} h "
+          f"(p95 {result['p95_time_censored']:.2f} h with unfinished cars)")
+    for station, (count, mean) in result['wait'].items():
+        print(f"Wait {station:<16}  {mean:6.2f} h over {count} repairs")
+
+
+if __name__ == '__main__':
+    sites = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    start = perf_counter()
+    fleet = ProcessFleet(sites, days, processes=processes)
+    result = fleet.run()
+    print_fleet(result)
+    print(f"{fleet.processes} processes, {fleet.windows} windows of {fleet.lookahead} h, {perf_counter() - start:.1f} s")
@@ -0,0 +1,140 @@
+"""Symulacja wielu dni: kalendarz zmian, samochody przechodzące na następny dzień i zapis/odtworzenie stanu.
+
+Kalendarz to lista dni, każdy dzień to {'roster': [...], 'num_cars': n}. Wpisy składu mają format
+DEFAULT_ROSTER z opcjonalnym polem 'start' - godziną (od początku dnia), o której mechanik przychodzi.
+Dzień wolny to pusty skład i 0 samochodów. Zamiast 'num_cars' dzień może mieć 'arrivals' - zapisane przyjazdy
+(replay.trace_calendar), a kalendarz może być wtedy generatorem czytanym dzień po dniu.
+
+Stan zapisywany jest między dniami, gdy żadna naprawa nie trwa: kolejki (numery samochodów w kolejności
+obsługi), magazyn samochodów, stan strumieni losowych, zegar i zapisane wyniki. Plik to pickle w gzip.
+"""
+import asyncio
+import gzip
+import os
+import pickle
+import sys
+from collections.abc import Sequence
+from itertools import islice
+
+from .carstore import CarStore
+from .clock import VirtualEventLoop, now
+from .main import STATIONS, STATION_NAMES, DEFAULT_ROSTER, ROUTING, Car, make_station_queues, simulate_day
+from .results import ResultsWriter, TABLES
+from .rng import RandomStreams
+from .stats import SimulationStats
+
+DAY_HOURS = 24  # a new day starts every 24 simulated hours
+
+
+def daily_calendar(days, roster=DEFAULT_ROSTER, num_cars=15, days_off=(5, 6)):
+    """Kalendarz `days` dni z tym samym składem; dni tygodnia z `days_off` (0 = poniedziałek) są wolne."""
+    return [{'roster': [], 'num_cars': 0} if day % 7 in days_off else {'roster': roster, 'num_cars': num_cars}
+            for day in range(days)]
+
+
+class Garage:
+    """Stan warsztatu między dniami. run() symuluje kolejne dni kalendarza, save()/load_snapshot() zapisują stan."""
+
+    def __init__(self, streams=None, routing=None, results=None, seed=None, aging=0.0, policy=None):
+        self.streams = streams if streams is not None else RandomStreams(seed, STATIONS)
+        self.routing = routing if routing is not None else ROUTING
+        self.results = results  # optional ResultsWriter with the per-repair trace of all days
+        self.stats = SimulationStats()  # streaming statistics over all days
+        self.aging = aging  # priority aging of the station queues, see main.PriorityQueue
+        self.policy = policy  # dispatch policy of the station queues (policies.py), None for the default
+        self.store = CarStore(STATION_NAMES)
+        self.waiting = {name: [] for name in STATION_NAMES}  # car indices per station queue, in service order
+        self.time = 0.0
+        self.day = 0  # number of days simulated so far
+        self.days = []  # per day: repairs, cars that arrived and cars carried over to the next day
+        self.mechanics = {}  # id -> name of everyone who worked a shift, for the report
+
+    def run(self, calendar, days=None):
+        """Symuluje kolejne dni kalendarza (od dnia self.day), najwyżej `days` z nich.
+
+        Kalendarz, który nie jest listą (np. generator z replay.trace_calendar), jest czytany od bieżącego miejsca.
+        """
+        if isinstance(calendar, Sequence):
+            calendar = calendar[self.day:None if days is None else self.day + days]
+        else:
+            calendar = islice(calendar, days)
+        with asyncio.Runner(loop_factory=lambda: VirtualEventLoop(self.time)) as runner:
+            for day in calendar:
+                runner.run(self._run_day(day))
+        return self
+
+    async def _run_day(self, day):
+        station_queues = make_station_queues(self.stats, aging=self.aging, policy=self.policy)
+        for queue in station_queues.values():
+            # Cars are saved in service order; pushed back in that order they keep it (FIFO among equal priorities)
+            for index in self.waiting[queue.name]:
+                queue.put_nowait(Car.view(self.store, index))
+        day_start = now()
+        first_car = len(self.store)
+
+        arrivals = day.get('arrivals')
+        if arrivals is not None:
+            # Recorded arrivals keep their times of day when overtime made the day start late
+            late = day_start - self.day * DAY_HOURS
+            arrivals = (arrival._replace(time=arrival.time - late) for arrival in arrivals)
+
+        mechanics = await simulate_day(station_queues, self.store, day['roster'], day.get('num_cars', 0), self.results,
+                                       self.streams, self.routing, first_car_id=first_car + 1, stats=self.stats,
+                                       arrivals=arrivals)
+
+        self.waiting = {queue.name: [car.index for car in queue._queue] for queue in station_queues.values()}
+        self.mechanics.update((mechanic.id, mechanic.name) for mechanic in mechanics)
+        self.days.append({
+            'day': self.day,
+            'arrived': len(self.store) - first_car,
+            'repairs': sum(mechanic.total_repairs for mechanic in mechanics),
+            'carried_over': sum(len(indices) for indices in self.waiting.values()),
+        })
+        # Overtime can end after midnight, then the next day starts late
+        await asyncio.sleep(max(0.0, day_start + DAY_HOURS - now()))
+        self.time = now()
+        self.day += 1
+
+    def close(self):
+        """Dopisuje tabelę samochodów (wszystkie dni) i zamyka wyniki, jeśli są zapisywane."""
+        if self.results is None:
+            return None
+        self.results.append('cars', self.store.to_records(TABLES['cars']))
+        self.results.metadata.update(
+            stations=STATION_NAMES,
+            days=self.day,
+            mechanics=[{'id': id, 'name': name} for id, name in sorted(self.mechanics.items())],
+            simulation_start_time=0.0,
+            simulation_end_time=self.time,
+        )
+        self.results.close()
+        return self.results
+
+    def save(self, path):
+        if self.results is not None:
+            for table in TABLES:
+                self.results.flush(table)
+        with gzip.open(path, 'wb') as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_snapshot(path):
+    # A restored garage continues from the saved day, e.g. with another calendar or roster after a warm-up
+    with gzip.open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+if __name__ == '__main__':
+    # python -m projekt2.garage DAYS [SNAPSHOT]: with SNAPSHOT the run resumes from it (if it exists) and is saved back,
+    # so a long horizon can be simulated in resumable chunks
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 28
+    snapshot = sys.argv[2] if len(sys.argv) > 2 else None
+    garage = load_snapshot(snapshot) if snapshot and os.path.exists(snapshot) else Garage(seed=0, results=ResultsWriter())
+    first_day = garage.day
+    garage.run(daily_calendar(first_day + days), days)
+    print(f"{'day':>4} {'arrived':>8} {'repairs':>8} {'carried over':>13}")
+    for summary in garage.days[first_day:]:
+        print(f"{summary['day']:4d} {summary['arrived']:8d} {summary['repairs']:8d} {summary['carried_over']:13d}")
+    print(garage.stats.report(garage.time))
+    if snapshot:
+        garage.save(snapshot)
@@ -0,0 +1,169 @@
+"""Analityczne przybliżenie sieci warsztatu jako otwartej sieci Jacksona (bez symulacji).
+
+Stan to para (stanowisko, klasa) - po każdej naprawie klasa samochodu spada o jeden (RED -> ORANGE -> GREEN),
+więc równania ruchu rozwiązywane są na 5 x 4 stanach. Każde stanowisko to kolejka M/M/c:
+
+- c to liczba mechaników na stanowisku, średni czas obsługi to 2 / efficiency plus 0.1 h przerwy
+  (mechanik zajmuje się samochodem aż do końca przerwy, dopiero potem wysyła go dalej),
+- mechanik pracujący krócej niż najdłuższa zmiana liczy się proporcjonalnie (work_hours / zmiana),
+- parking to kolejka M/M/1 z czasem obsługi 0.1 h.
+
+Wyniki dotyczą stanu ustalonego, a symulacja to jeden dzień z 15 samochodami - liczby z solve() są
+pierwszym przybliżeniem i sprawdzeniem stabilności (rho >= 1), nie zamiennikiem symulacji.
+"""
+import sys
+from math import factorial
+
+import numpy as np
+
+from .main import STATIONS, ObjectClass, DEFAULT_ROSTER, ROUTING
+from .routing import PARKING
+
+MEAN_REPAIR = 2.0  # exponential(2) hours per repair stage at efficiency 1
+BREAK = 0.1  # hours a mechanic rests after every repair, before routing the car
+PARKING_SERVICE = 0.1  # mean hours the parking spends on one car
+
+
+def erlang_c(servers, offered_load):
+    """Prawdopodobieństwo czekania w kolejce M/M/c (wzór Erlanga C); offered_load = lambda / mu."""
+    rho = offered_load / servers
+    if rho >= 1:
+        return 1.0
+    terms = sum(offered_load ** k / factorial(k) for k in range(servers))
+    last = offered_load ** servers / factorial(servers) / (1 - rho)
+    return last / (terms + last)
+
+
+def _station_metrics(arrival_rate, servers, service_time):
+    # M/M/c with equal servers; the queue metrics are inf for unstable stations
+    utilisation = arrival_rate * service_time / servers if servers else np.inf
+    if utilisation >= 1:
+        return {'arrival_rate': arrival_rate, 'servers': servers, 'utilisation': utilisation, 'stable': False,
+                'mean_queue_length': np.inf, 'mean_in_station': np.inf, 'mean_wait': np.inf, 'mean_sojourn': np.inf}
+    queue_length = erlang_c(servers, arrival_rate * service_time) * utilisation / (1 - utilisation) if arrival_rate else 0.0
+    wait = queue_length / arrival_rate if arrival_rate else 0.0
+    return {
+        'arrival_rate': arrival_rate,
+        'servers': servers,
+        'utilisation': utilisation,
+        'stable': True,
+        'mean_queue_length': queue_length,
+        'mean_in_station': queue_length + arrival_rate * service_time,
+        'mean_wait': wait,
+        'mean_sojourn': wait + service_time,
+    }
+
+
+def traffic(routing=ROUTING):
+    """Rozwiązuje równania ruchu: visits[k, s, c] to oczekiwana liczba wizyt samochodu, który przyjechał
+    z klasą k, na stanowisku s w klasie c. entering[k] to prawdopodobieństwo, że w ogóle trafi na stanowisko."""
+    S, C = len(routing.stations), len(routing.classes)
+    parking = routing.locations.index(PARKING)
+
+    # Transition matrix between (station, class) states: after the repair the car goes to station s2 one class lower
+    transitions = np.zeros((S * C, S * C))
+    for s in range(S):
+        for c in range(C):
+            next_class = min(c + 1, C - 1)
+            transitions[s * C + c, next_class::C] = routing.probabilities[s, c, :S]
+
+    external = np.zeros((C, S * C))  # first hop from the parking, one row per original class
+    for c in range(C):
+        external[c, c::C] = routing.probabilities[parking, c, :S]
+    visits = np.linalg.solve(np.eye(S * C) - transitions.T, external.T).T
+    entering = routing.probabilities[parking, :, :S].sum(axis=1)
+    return visits.reshape(C, S, C), entering
+
+
+def solve(arrival_rate=1.0, roster=DEFAULT_ROSTER, routing=ROUTING, class_mix=None):
+    """Wyniki analityczne: {'stations': {nazwa: metryki}, 'classes': {ObjectClass: średni czas w systemie},
+    'unstable': [stanowiska z rho >= 1]}. Czasy w godzinach, jak w symulacji.
+
+    class_mix to udział klas wśród przyjeżdżających samochodów (domyślnie równy, jak w Car).
+    """
+    C = len(routing.classes)
+    class_mix = np.full(C, 1 / C) if class_mix is None else np.asarray(class_mix, dtype=float)
+    visits, entering = traffic(routing)
+    station_visits = visits.sum(axis=2)  # (original class, station)
+    station_rates = arrival_rate * class_mix @ station_visits
+
+    shift = max(entry['work_hours'] for entry in roster)
+    stations = {PARKING: _station_metrics(arrival_rate, 1, PARKING_SERVICE)}
+    for code, station in enumerate(routing.stations):
+        entries = [entry for entry in roster if entry['station'] == station]
+        availability = [entry['work_hours'] / shift for entry in entries]
+        # Equal-server approximation: c servers sharing the station's total capacity (jobs per hour)
+        capacity = sum(a / (MEAN_REPAIR / entry['efficiency'] + BREAK) for a, entry in zip(availability, entries))
+        metrics = _station_metrics(station_rates[code], len(entries), len(entries) / capacity if capacity else np.inf)
+        # Share of the shift spent repairing (without breaks), comparable with the simulated utilisation
+        repair_capacity = sum(a * entry['efficiency'] / MEAN_REPAIR for a, entry in zip(availability, entries))
+        metrics['repair_utilisation'] = station_rates[code] / repair_capacity if repair_capacity else np.inf
+        stations[station] = metrics
+
+    sojourn = np.array([stations[station]['mean_sojourn'] for station in routing.stations])
+    classes = {}
+    for object_class in ObjectClass:
+        c = object_class.value - 1
+        if entering[c] == 0:
+            classes[object_class] = np.nan  # never repaired, like PINK cars
+            continue
+        # Mean over the cars that enter the network, as in the simulated time in system
+        classes[object_class] = stations[PARKING]['mean_sojourn'] + station_visits[c] @ sojourn / entering[c]
+    return {
+        'stations': stations,
+        'classes': classes,
+        'unstable': [station for station, metrics in stations.items() if not metrics['stable']],
+    }
+
+
+def print_solution(solution):
+    print(f"{'station':<16} {'lambda':>7} {'c':>3} {'rho':>6} {'Lq':>7} {'L':>7} {'Wq':>7} {'W':>7}")
+    for station, metrics in solution['stations'].items():
+        print(f"{station:<16} {metrics['arrival_rate']:7.3f} {metrics['servers']:3d} {metrics['utilisation']:6.3f} "
+              f"{metrics['mean_queue_length']:7.3f} {metrics['mean_in_station']:7.3f} {metrics['mean_wait']:7.3f} "
+              f"{metrics['mean_sojourn']:7.3f}{'' if metrics['stable'] else '  <-- unstable'}")
+    print("Time in system (hours) by original class:")
+    for object_class, time in solution['classes'].items():
+        print(f"  {str(object_class):<16} {time:8.3f}")
+
+
+def cross_check(roster=DEFAULT_ROSTER, routing=ROUTING, hours=1000, replications=20, seed=0):
+    """Porównuje solve() z silnikiem wektorowym w długim przebiegu (`hours` samochodów), bliskim stanu ustalonego.
+
+    Wszyscy mechanicy pracują przez cały przebieg, bo zmiana krótsza od reszty nie ma odpowiednika
+    w stanie ustalonym. Zwraca {metryka: (analitycznie, symulacja)}.
+    """
+    from .rng import RandomStreams
+    from .vectorized import simulate_batch
+
+    shift = hours * 1.5  # long enough for the last cars to be repaired
+    long_roster = [{**entry, 'work_hours': shift} for entry in roster]
+    analytic = solve(1.0, long_roster, routing)
+    batch = simulate_batch(replications, hours, long_roster, RandomStreams(seed, STATIONS), routing)
+
+    comparison = {}
+    for column, object_class in enumerate([ObjectClass.RED, ObjectClass.ORANGE, ObjectClass.GREEN]):
+        comparison[f'time_in_system[{object_class}]'] = (analytic['classes'][object_class],
+                                                         np.nanmean(batch['time_in_system'][:, column]))
+    # Simulated busy time is spread over the arrival period (about `hours`), not the whole shift
+    busy = batch['utilisation'].mean(axis=0) * shift / hours
+    for station in routing.stations:
+        columns = [column for column, entry in enumerate(long_roster) if entry['station'] == station]
+        if columns:
+            comparison[f'repair_utilisation[{station}]'] = (analytic['stations'][station]['repair_utilisation'],
+                                                            busy[columns].mean())
+    return comparison
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['check']:
+        hours = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+        print(f"{'metric':<34} {'analytic':>9} {'simulated':>9} {'error':>7}")
+        for name, (analytic, simulated) in cross_check(hours=hours).items():
+            print(f"{name:<34} {analytic:9.3f} {simulated:9.3f} {(analytic - simulated) / simulated:7.1%}")
+        sys.exit()
+
+    solution = solve()
+    print_solution(solution)
+    if solution['unstable']:
+        sys.exit(f"Unstable stations (rho >= 1): {', '.join(solution['unstable'])}")
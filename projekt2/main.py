@@ -1,14 +1,29 @@
 import asyncio
-from asyncio import PriorityQueue, Queue
-from random import randrange, choice, random
-from time import time
-import matplotlib.pyplot as plt
-from matplotlib.patches import Patch
-import matplotlib.dates as mdates
+from asyncio import Queue
 from enum import Enum, auto
-from colorama import Fore
-from numpy.random import exponential
 import numpy as np
+from .clock import VirtualEventLoop, now
+from .carstore import CarStore
+from .rng import RandomStreams
+from .routing import RoutingTable, DEFAULT_ROUTING, PARKING, load_routing
+from .events import event_log, EventType, ConsoleSink
+from .results import ResultsWriter, TABLES
+from .stats import SimulationStats
+from .policies import PriorityPolicy, PRIORITY_LEVELS
+
+STATIONS = ['warsztat', 'lakiernik', 'elektromechanik', 'wulkanizator', 'tapicer']
+STATION_NAMES = [station.capitalize() for station in STATIONS]  # queue names, index is the station code
+
+# Mechanic roster used by main(): station is the parking_type passed to Mechanic.work
+DEFAULT_ROSTER = [
+    {'id': 1, 'efficiency': 1, 'work_hours': 16, 'name': 'Warsztat', 'station': 'warsztat'},
+    {'id': 2, 'efficiency': 1, 'work_hours': 16, 'name': 'Lakiernik', 'station': 'lakiernik'},
+    {'id': 3, 'efficiency': 1, 'work_hours': 16, 'name': 'Elektromechanik', 'station': 'elektromechanik'},
+    {'id': 4, 'efficiency': 1, 'work_hours': 16, 'name': 'Wulkanizator', 'station': 'wulkanizator'},
+    {'id': 5, 'efficiency': 1, 'work_hours': 16, 'name': 'Tapicer', 'station': 'tapicer'},
+    {'id': 6, 'efficiency': 1, 'work_hours': 8, 'name': 'Warsztat2', 'station': 'warsztat'},
+]
+
 
 class ObjectClass(Enum):
     RED = auto()
@@ -20,454 +35,344 @@ class ObjectClass(Enum):
         return self.name
 
 
+# Where cars go next, see routing.py; run(routing_path=...) loads another table from JSON
+ROUTING = RoutingTable(DEFAULT_ROUTING, STATIONS, [object_class.name for object_class in ObjectClass], CarStore.MAX_ROUTE)
+
+
+def _time_column(name):
+    # float column of the car store exposed as an attribute, NaN reads back as None
+    def get(self):
+        value = self.store.columns[name][self.index]
+        return None if np.isnan(value) else float(value)
+
+    def set(self, value):
+        self.store.columns[name][self.index] = np.nan if value is None else value
+
+    return property(get, set)
+
+
 class Car:
-    def __init__(self, id): 
-        self.id = id
-        self.priority = randrange(3) # priority given in FIFO queue (0 priority being the lowest, then order)
-        self.arrival_time = None # time when car arrived in queue (enqueued)
-        self.repair_start_time = None # time when car started to be repaired
-        self.repair_end_time = None # time when mechanic ended repairning
-        self.spent_time = None # time spent in queue
-        self.end_time = None # time when car left the system
-        self.delta_time = None # time spend in system
-        self.mechanics_route = [] # stores all mechanics car went through
-        self.object_class = choice(list(ObjectClass)) # 90% damage, 60% damage, 30% damage or 0 damage
-        self.original_class = self.object_class
-        self.destroyed = False
+    """Lekki widok (__slots__) na jeden wiersz CarStore - same dane trzyma magazyn kolumnowy."""
+    __slots__ = ('store', 'index')
+
+    def __init__(self, id, store, streams): 
+        priority = int(streams.priorities.integers(PRIORITY_LEVELS)) # priority given in FIFO queue (0 priority being the lowest, then order)
+        object_class = ObjectClass(int(streams.classes.integers(len(ObjectClass))) + 1) # 90% damage, 60% damage, 30% damage or 0 damage
         
-        match self.object_class:
+        match object_class:
             case ObjectClass.RED:
-                self.repair_time = [exponential(2) for _ in range(3)]
+                repair_time = streams.service.exponential(2, 3)
             case ObjectClass.ORANGE:
-                self.repair_time = [exponential(2) for _ in range(2)]
+                repair_time = streams.service.exponential(2, 2)
             case ObjectClass.GREEN:
-                self.repair_time = [exponential(2) for _ in range(1)]
-        
+                repair_time = streams.service.exponential(2, 1)
+            case _:
+                repair_time = []
+
+        self.store = store
+        self.index = store.add(id, priority, object_class.value, repair_time)
+
+    @classmethod
+    def view(cls, store, index):
+        # Car for an existing row of the store (e.g. a car restored from a snapshot), nothing is drawn
+        car = cls.__new__(cls)
+        car.store = store
+        car.index = index
+        return car
+
+    arrival_time = _time_column('arrival') # time when car arrived in queue (enqueued)
+    repair_start_time = _time_column('start') # time when car started to be repaired
+    repair_end_time = _time_column('repair_end') # time when mechanic ended repairning
+    end_time = _time_column('end') # time when car left the system
+    queue_entry_time = _time_column('queued') # time when car entered its current queue
+
+    @property
+    def id(self):
+        return int(self.store.columns['id'][self.index])
+
+    @property
+    def priority(self):
+        return int(self.store.columns['priority'][self.index])
+
+    @property
+    def object_class(self):
+        return ObjectClass(self.store.columns['object_class'][self.index])
+
+    @object_class.setter
+    def object_class(self, object_class):
+        self.store.columns['object_class'][self.index] = object_class.value
+
+    @property
+    def original_class(self):
+        return ObjectClass(self.store.columns['original_class'][self.index])
+
+    @property
+    def destroyed(self):
+        return bool(self.store.columns['destroyed'][self.index])
+
+    @destroyed.setter
+    def destroyed(self, destroyed):
+        self.store.columns['destroyed'][self.index] = destroyed
+
+    @property
+    def spent_time(self):
+        # time spent in queue
+        if self.repair_start_time is None or self.arrival_time is None:
+            return None
+        return self.repair_start_time - self.arrival_time
+
+    @property
+    def delta_time(self):
+        # time spend in system
+        if self.end_time is None:
+            return None
+        return self.end_time - self.arrival_time
+
+    @property
+    def repair_time(self):
+        return list(self.store.repair_times[self.index, :self.store.columns['stages'][self.index]])
+
+    @property
+    def next_repair_time(self):
+        # repair times are used from the end, like popping the list
+        return float(self.store.repair_times[self.index, self.store.columns['stages'][self.index] - 1])
+
+    def pop_repair_time(self):
+        stages = self.store.columns['stages'][self.index] - 1
+        self.store.columns['stages'][self.index] = stages
+        return float(self.store.repair_times[self.index, stages])
+
+    @property
+    def mechanics_route(self):
+        # stores all mechanics car went through
+        return self.store.route(self.index)
+
+    def add_to_route(self, name):
+        self.store.add_to_route(self.index, name)
+
     def set_arrival_time(self):
-        self.arrival_time = time() 
+        self.arrival_time = now()
+        self.queue_entry_time = self.arrival_time
         
     def set_end_time(self):
-        self.end_time = time()
-        self.delta_time = self.end_time - self.arrival_time
+        self.end_time = now()
         
     def set_queue_duration(self):
-        self.repair_start_time = time()
-        if self.repair_start_time is not None and self.arrival_time is not None:
-            self.spent_time = self.repair_start_time - self.arrival_time
+        self.repair_start_time = now()
             
     def set_repair_end_time(self):
-        self.repair_end_time = time()
-        
-    def __lt__(self, other):
-        return self.priority > other.priority
+        self.repair_end_time = now()
         
         
 class Parking:
-    def __init__(self, max_num_cars):
-        self.max_num_cars = max_num_cars
+    def __init__(self, max_num_cars, streams, routing, first_car_id=1):
+        self.max_num_cars = max_num_cars  # id of the last car of the day, None to work until a None in the queue
+        self.first_car_id = first_car_id
+        self.streams = streams
+        self.routing = routing
         
     async def work(self, queue, **queues):
-        last_car_id = 0
-        while last_car_id < self.max_num_cars:
-            if queue.empty():
-                await asyncio.sleep(0.01)  # Wait before checking again
-                continue
-            
-            await asyncio.sleep(exponential(0.1))
-            car = await queue.get()  # Unpack the car
+        random = self.streams.routing['parking'].random
+        last_car_id = self.first_car_id - 1
+        while self.max_num_cars is None or last_car_id < self.max_num_cars:
+            car = await queue.get()  # Sleeps until the next car arrives
+            if car is None:  # end of a replayed trace (replay.replay_cars)
+                queue.task_done()
+                break
+            await asyncio.sleep(self.streams.parking.exponential(0.1))
             last_car_id = car.id
-            match car.object_class:
-                case ObjectClass.RED:
-                    queue.task_done()
-                    if random() < 0.2:
-                        car.destroyed = True
-                        print(Fore.RED + f"Car {car.id} can not be repaired")
-                    else:
-                        await enqueue_car(queues['warsztat_queue'], car)
-                case ObjectClass.ORANGE:
-                    queue.task_done()
-                    if random() < 0.5:                   
-                        await enqueue_car(queues['warsztat_queue'], car)
-                    elif random() < 0.7:
-                        await enqueue_car(queues['elektromechanik_queue'], car)
-                    elif random() < 0.9:
-                        await enqueue_car(queues['wulkanizator_queue'], car)
-                    else:
-                        await enqueue_car(queues['lakiernik_queue'], car)
-                case ObjectClass.GREEN:
-                    queue.task_done()
-                    if random() < 0.3:
-                        await enqueue_car(queues['warsztat_queue'], car)
-                    elif random() < 0.55:
-                        await enqueue_car(queues['elektromechanik_queue'], car)
-                    elif random() < 0.7:
-                        await enqueue_car(queues['wulkanizator_queue'], car)
-                    elif random() < 0.95:
-                        await enqueue_car(queues['lakiernik_queue'], car)
-                    else:
-                        await enqueue_car(queues['tapicer_queue'], car)
-                case ObjectClass.PINK:
-                    queue.task_done()
-                    print(Fore.MAGENTA + f"Car {car.id} does not need repair")  
-
-
-class Mechanic:
-    def __init__(self, id, efficiency, work_hours, name):
-        self.id = id
-        self.efficiency = efficiency
-        self.work_hours = work_hours
-        self.name = name
-        self.total_repairs = 0
-        self.spent_times = []  # List to store the spent times in queues for cars repaired by this mechanic
-        self.car_routes = []   # List to store car routes through network
-
-    async def repair(self, car):
-        car.set_queue_duration()
-        print(Fore.YELLOW + f"{self.name} started repairing car {car.id} with {car.priority} priority. It will take {car.repair_time[-1] / self.efficiency} hours.")
-        
-        await asyncio.sleep(car.repair_time[-1] / self.efficiency)  # Simulate time taken to repair
-        self.work_hours = self.work_hours - car.repair_time[-1] / self.efficiency
-        
-        car.set_repair_end_time()
-        self.spent_times.append((car.id, car.spent_time, car.priority, car.repair_start_time, car.repair_end_time, car.object_class))
-        print(Fore.GREEN + f"{self.name} finished repairing car {car.id}. It took {car.repair_time.pop() / self.efficiency} hours.")
-        self.total_repairs += 1
-    
-    async def work(self, queue, parking_type, **queues):
-        # Mechanic works until their work hours run out or the queue is empty
-        end_time = asyncio.get_event_loop().time() + self.work_hours
-        while asyncio.get_event_loop().time() < end_time:
-            if queue.empty():
-                # print(f"Mechanic {self.id} is waiting for cars to repair.")
-                self.work_hours -= 0.1
-                await asyncio.sleep(0.1)  # Wait before checking again
-                continue
-
-            car = await queue.get()  # Unpack the car
-            if self.work_hours - car.repair_time[-1] / self.efficiency < -1:
-                print(Fore.RED + f"{self.name} will not repair car {car.id}. It takes {-(self.work_hours - car.repair_time[-1] / self.efficiency)} hours overtime.")
-                continue
-            elif self.work_hours - car.repair_time[-1] / self.efficiency < 0:
-                print(Fore.YELLOW + f"{self.name} will repair car {car.id}. It takes {-(self.work_hours - car.repair_time[-1] / self.efficiency)} hours overtime.")
-            
-            await self.repair(car)  # Repair the dequeued car
-            await asyncio.sleep(0.1)  # Wait before checking again
-            self.work_hours -= 0.1
-            
-            match parking_type:
-                case 'warsztat':
-                    match car.object_class:
-                        case ObjectClass.RED:
-                            queue.task_done()
-                            car.object_class = ObjectClass.ORANGE
-                            if random() < 0.4:                       
-                                await enqueue_car(queues['lakiernik_queue'], car)
-                            elif random() < 0.7:
-                                await enqueue_car(queues['elektromechanik_queue'], car)
-                            else:
-                                await enqueue_car(queues['wulkanizator_queue'], car)
-                        case ObjectClass.ORANGE:
-                            # BRAKUJE NA WYKRESIE - TRZEBA BEDZIE ZMIENIC
-                            queue.task_done()
-                            car.object_class = ObjectClass.GREEN
-                            if random() < 0.5:
-                                await enqueue_car(queues['elektromechanik_queue'], car)
-                            else:
-                                await enqueue_car(queues['wulkanizator_queue'], car)
-                        case ObjectClass.GREEN:
-                            queue.task_done()
-                            car.set_end_time()
-                            car.object_class = ObjectClass.PINK
-                            print(Fore.MAGENTA + f"Car {car.id} is fully repaired now")
-                            self.car_routes.append((car.id, car.mechanics_route))
-                case 'lakiernik':
-                    match car.object_class:
-                        case ObjectClass.ORANGE:
-                            queue.task_done()
-                            car.object_class = ObjectClass.GREEN
-                            await enqueue_car(queues['tapicer_queue'], car)
-                        case ObjectClass.GREEN:
-                            queue.task_done()
-                            car.set_end_time()
-                            car.object_class = ObjectClass.PINK
-                            print(Fore.MAGENTA + f"Car {car.id} is fully repaired now")
-                            self.car_routes.append((car.id, car.mechanics_route))
-                case 'elektromechanik':
-                    match car.object_class:
-                        case ObjectClass.ORANGE:
-                            queue.task_done()
-                            car.object_class = ObjectClass.GREEN
-                            if random() < 0.5:
-                                await enqueue_car(queues['wulkanizator_queue'], car)
-                            elif random() < 0.9:
-                                await enqueue_car(queues['lakiernik_queue'], car)
-                            else:
-                                await enqueue_car(queues['tapicer_queue'], car)
-                        case ObjectClass.GREEN:
-                            queue.task_done()
-                            car.set_end_time()
-                            car.object_class = ObjectClass.PINK
-                            print(Fore.MAGENTA + f"Car {car.id} is fully repaired now")
-                            self.car_routes.append((car.id, car.mechanics_route))
-                case 'wulkanizator':
-                    match car.object_class:
-                        case ObjectClass.ORANGE:
-                            queue.task_done()
-                            car.object_class = ObjectClass.GREEN
-                            if random() < 0.7:
-                                await enqueue_car(queues['lakiernik_queue'], car)
-                            else:
-                                await enqueue_car(queues['tapicer_queue'], car)
-                        case ObjectClass.GREEN:
-                            queue.task_done()
-                            car.set_end_time()
-                            car.object_class = ObjectClass.PINK
-                            print(Fore.MAGENTA + f"Car {car.id} is fully repaired now")
-                            self.car_routes.append((car.id, car.mechanics_route))
-                case 'tapicer':
-                    queue.task_done()
-                    car.set_end_time()
-                    car.object_class = ObjectClass.PINK
-                    print(Fore.MAGENTA + f"Car {car.id} is fully repaired now")
-                    self.car_routes.append((car.id, car.mechanics_route))
-                
-                                                    
-        print(Fore.WHITE + f"{self.name} is done for the day. Total repairs: {self.total_repairs}")
+            queue.task_done()
+            # One draw per hop, the next station comes from the routing table
+            match self.routing.next_hop(PARKING, car.object_class.value - 1, random()):
+                case 'destroyed':
+                    car.destroyed = True
+                    if event_log.enabled:
+                        event_log.emit(EventType.DESTROYED, car, 'Parking')
+                case 'left' | 'finished':
+                    if event_log.enabled:
+                        event_log.emit(EventType.NO_REPAIR, car, 'Parking')
+                case station:
+                    await enqueue_car(queues[f'{station}_queue'], car)
 
 
-@staticmethod
-async def enqueue_cars(queue, num_cars, all_cars):
-    for i in range(1, num_cars + 1):
-        car = Car(i)
-        all_cars.append(car)
+async def enqueue_cars(queue, num_cars, store, streams, first_car_id=1):
+    for i in range(first_car_id, first_car_id + num_cars):
+        car = Car(i, store, streams)
         await queue.put(car)  # Enqueue as (priority, car)
         car.set_arrival_time()
         
-        print(Fore.CYAN + f"Car {car.id} with {car.priority} priority of {car.object_class} class arrived at the parking.")
+        if event_log.enabled:
+            event_log.emit(EventType.ARRIVED, car, 'Parking')
         
-        await asyncio.sleep(exponential(1))  # Simulate time between cars arriving
+        await asyncio.sleep(streams.arrivals.exponential(1))  # Simulate time between cars arriving
         
-@staticmethod
 async def enqueue_car(queue, car):
-    await queue.put(car)
-    car.mechanics_route.append(queue.name)
-    print(Fore.CYAN + f"Car {car.id} with {car.priority} priority of {car.object_class} class added to the {queue}")
+    car.queue_entry_time = now()  # before put, the queue ages cars by their entry time
+    if await queue.put(car):
+        return  # sent to another garage (fleet.TransferGate), the visit is recorded where the car arrives
+    car.add_to_route(queue.name)
+    if event_log.enabled:
+        event_log.emit(EventType.ENQUEUED, car, queue.name)
                 
-class PriorityQueue(PriorityQueue):
-    def __init__(self, name, *args, **kwargs):
+class PriorityQueue(Queue):
+    """Kolejka stanowiska ułożona według polityki (policies.py) - domyślnie najwyższy priorytet pierwszy,
+    FIFO przy równych priorytetach.
+
+    aging > 0 (skrót dla PriorityPolicy(aging)) podnosi priorytet samochodu o `aging` za każdą godzinę czekania.
+    """
+    def __init__(self, name, *args, code=None, stats=None, results=None, aging=0.0, policy=None, **kwargs):
+        self.policy = policy if policy is not None else PriorityPolicy(aging)  # used by _init, which Queue.__init__ calls
         super().__init__(*args, **kwargs)
         self.name = name
+        self.code = STATION_NAMES.index(name) if code is None else code  # station code in the results tables
+        self.stats = stats  # SimulationStats told about every change of the queue length
+        self.results = results  # ResultsWriter receiving one 'queue_changes' row per change
+
+    def _init(self, maxsize):
+        self._queue = self.policy.new_queue()
+
+    def _put(self, car):
+        self.policy.push(self._queue, car)
+        self.length_changed()
+
+    def _get(self):
+        car = self._queue.pop()
+        self.length_changed()
+        return car
+
+    def get_for(self, mechanic):
+        # The car the policy picks for this mechanic, without waiting (the queue must not be empty)
+        car = self.policy.select(self._queue, mechanic)
+        self.length_changed()
+        return car
+
+    def length_changed(self):
+        # Called on every put/get, so the queue length is an exact step function of time
+        length = len(self._queue)
+        if self.stats is not None:
+            self.stats.queue_changed(self.name, now(), length)
+        if self.results is not None:
+            self.results.append_row('queue_changes', (now(), self.code, length))
         
     def __str__(self):
         return self.name
 
-async def main():
-    ### SIMULATION START ###
+def make_station_queues(stats=None, results=None, aging=0.0, policy=None):
+    return {f'{station}_queue': PriorityQueue(name, stats=stats, results=results, aging=aging, policy=policy)
+            for station, name in zip(STATIONS, STATION_NAMES)}
+
+async def simulate_day(station_queues, store, roster, num_cars, results, streams, routing, first_car_id=1, stats=None, trace=False,
+                       parking_targets=None, arrivals=None):
+    """Jeden dzień pracy na podanych kolejkach - samochody, których nie naprawiono, zostają w nich na następny dzień.
+
+    parking_targets(network) może zwrócić inne kolejki, do których parking wysyła samochody (np. fleet.TransferGate).
+    arrivals to zapisane przyjazdy (replay.read_trace) odtwarzane zamiast num_cars losowych samochodów.
+    """
     parking_queue = Queue()  # Create a shared queue for cars
-    warsztat_queue = PriorityQueue('Warsztat')
-    lakiernik_queue = PriorityQueue('Lakiernik')
-    elektromechanik_queue = PriorityQueue('Elektromechanik')
-    wulkanizator_queue = PriorityQueue('Wulkanizator')
-    tapicer_queue = PriorityQueue('Tapicer')
-    num_cars = 15  # Total number of cars arriving for repair
-    car_data = [] # array to store times of car repairs (used for plotting data) 
-    mechanic_data = []
-    car_routes = [] # array to store all cars routes
-    all_cars = []
-
-    queues = {
-            'Warsztat': warsztat_queue,
-            'Lakiernik': lakiernik_queue,
-            'Elektromechanik': elektromechanik_queue,
-            'Wulkanizator': wulkanizator_queue,
-            'Tapicer': tapicer_queue
-        }
-    # Initialize mechanics with varying efficiency (repair time) and work hours
-    parking = Parking(num_cars)
-    warsztat1 = Mechanic(id=1, efficiency=1, work_hours=16, name='Warsztat')
-    warsztat2 = Mechanic(id=6, efficiency=1, work_hours=8, name='Warsztat2')
-    lakiernik1 = Mechanic(id=2, efficiency=1, work_hours=16, name='Lakiernik')
-    elektromechanik1 = Mechanic(id=3, efficiency=1, work_hours=16, name='Elektromechanik')
-    wulkanizator1 = Mechanic(id=4, efficiency=1, work_hours=16, name='Wulkanizator')
-    tapicer1 = Mechanic(id=5, efficiency=1, work_hours=16, name='Tapicer')
-    mechanics = [warsztat1, lakiernik1, elektromechanik1, wulkanizator1, tapicer1, warsztat2]
-    
-    # Start the enqueue and mechanic processes concurrently
-    simulation_start_time = time()
+    for queue in station_queues.values():
+        queue.results = results
+        if results is not None:
+            # Length at the start of the day (cars carried over from the day before), then every change
+            results.append_row('queue_changes', (now(), queue.code, queue.qsize()))
+
+    # Mechanics are served by their stations (one event heap per station, see station.py), not by one task each
+    from .station import StationNetwork  # station.py builds on the classes of this module
+
+    if arrivals is None:
+        parking = Parking(first_car_id + num_cars - 1, streams, routing, first_car_id)
+        cars = enqueue_cars(parking_queue, num_cars, store, streams, first_car_id)
+    else:
+        from .replay import replay_cars
+        parking = Parking(None, streams, routing, first_car_id)
+        cars = replay_cars(parking_queue, arrivals, store, first_car_id)
+    network = StationNetwork(routing, streams, station_queues, results, stats, trace)
+    day_start = now()
+    mechanics = [network.add_mechanic(entry, day_start) for entry in roster]
+
+    targets = network.queues if parking_targets is None else parking_targets(network)
+
+    # Start the enqueue process, the parking and the stations concurrently
     await asyncio.gather(
-        enqueue_cars(parking_queue, num_cars, all_cars),
-        parking.work(parking_queue, parking_type='parking', warsztat_queue=warsztat_queue, elektromechanik_queue=elektromechanik_queue, wulkanizator_queue=wulkanizator_queue, lakiernik_queue=lakiernik_queue, tapicer_queue=tapicer_queue),
-        warsztat1.work(warsztat_queue, parking_type='warsztat', elektromechanik_queue=elektromechanik_queue, wulkanizator_queue=wulkanizator_queue, lakiernik_queue=lakiernik_queue),
-        warsztat2.work(warsztat_queue, parking_type='warsztat', elektromechanik_queue=elektromechanik_queue, wulkanizator_queue=wulkanizator_queue, lakiernik_queue=lakiernik_queue),
-        lakiernik1.work(lakiernik_queue, parking_type='lakiernik', tapicer_queue=tapicer_queue),
-        elektromechanik1.work(elektromechanik_queue, parking_type='elektromechanik', wulkanizator_queue=wulkanizator_queue, lakiernik_queue=lakiernik_queue, tapicer_queue=tapicer_queue),
-        wulkanizator1.work(wulkanizator_queue, parking_type='wulkanizator', lakiernik_queue=lakiernik_queue, tapicer_queue=tapicer_queue),
-        tapicer1.work(tapicer_queue, parking_type='tapicer'),
-        monitor_queues(queues)
+        cars,
+        parking.work(parking_queue, parking_type='parking', **targets),
+        network.wait()
     )
-    simulation_end_time = time()
+    return mechanics
+
+async def simulate(num_cars=15, roster=DEFAULT_ROSTER, results=None, streams=None, routing=None, stats=None, trace=False, aging=0.0, policy=None,
+                   arrivals=None):
+    # results (ResultsWriter) and trace (spent_times, car_routes) keep every repair, stats only aggregates
+    # arrivals replays recorded cars (replay.read_trace) instead of drawing num_cars of them
+    # aging raises the priority of waiting cars per hour of waiting, policy replaces the whole dispatch rule (policies.py)
+    ### SIMULATION START ###
+    routing = routing if routing is not None else ROUTING
+    streams = streams if streams is not None else RandomStreams(stations=STATIONS)
+    stats = stats if stats is not None else SimulationStats(start=now())
+    station_queues = make_station_queues(stats, aging=aging, policy=policy)
+    store = CarStore(queue.name for queue in station_queues.values())
+
+    simulation_start_time = now()
+    mechanics = await simulate_day(station_queues, store, roster, num_cars, results, streams, routing, stats=stats, trace=trace,
+                                   arrivals=arrivals)
+    simulation_end_time = now()
 
     # The line below stops simulation so
     # await car_queue.join()  # Ensure all cars are processed  
     ### SIMULATION END ###
-    
-    ####################################
-    ### PROCESSING DATA FOR PLOTS (CARS) 
+    if results is not None:
+        results.append('cars', store.to_records(TABLES['cars']))
+    return store, mechanics, results, stats, simulation_start_time, simulation_end_time
+
+async def main(results_path=None, report_dir='report', streams=None, routing=None, trace_path=None):
+    num_cars = 15  # Total number of cars arriving for repair
+    car_routes = [] # array to store all cars routes
+    streams = streams if streams is not None else RandomStreams(stations=STATIONS)
+    arrivals = None
+    if trace_path is not None:
+        from .replay import read_trace
+        arrivals = read_trace(trace_path)
+    results = ResultsWriter(results_path, metadata={'num_cars': num_cars, 'stations': STATION_NAMES, 'seed': streams.seed, 'trace': trace_path})
+    store, mechanics, results, stats, simulation_start_time, simulation_end_time = await simulate(num_cars, results=results, streams=streams, routing=routing,
+                                                                                                  trace=True, arrivals=arrivals)
+    results.metadata['num_cars'] = len(store)
+    results.metadata.update(
+        mechanics=[{'id': mechanic.id, 'name': mechanic.name} for mechanic in mechanics],
+        simulation_start_time=simulation_start_time,
+        simulation_end_time=simulation_end_time,
+    )
+    results.close()
+
     for mechanic in mechanics:
-        car_data += mechanic.spent_times  
-        car_routes += mechanic.car_routes           
-    print(car_routes)
-    
-    # Extract car details
-    car_ids = [car.id for car in all_cars]
-    times_spent = []
-    for car in all_cars:    
-        if car.delta_time and not car.destroyed:
-            times_spent.append(car.delta_time)
-        elif car.delta_time is None and car.object_class is not ObjectClass.PINK and not car.destroyed:
-            times_spent.append(simulation_end_time - car.arrival_time)
-        else:
-            times_spent.append(0)
-    priorities = [car.priority for car in all_cars]
-    car_classes = [car.original_class for car in all_cars]
-    
-    # Map priorities to colors
-    color_map = {0: 'skyblue', 1: 'lightgreen', 2: 'salmon'}
-    class_map = {ObjectClass.RED: 'red', ObjectClass.ORANGE: 'orange', ObjectClass.GREEN: 'green', ObjectClass.PINK: 'pink'}
-    colors = [color_map[priority] for priority in priorities]  # Fixed line
-    colors = [class_map[car_class] for car_class in car_classes]
-
-    # Create the bar plot
-    plt.figure(figsize=(10, 6))
-    plt.bar(car_ids, times_spent, color=colors)
-    plt.xlabel('Car ID')
-    plt.ylabel('Time spent in system (hours)')
-    plt.title('Time spent by each car in the system')
-    plt.xticks(car_ids)  # Set x-ticks to be the car IDs
-    plt.grid(axis='y')
-
-    # Create legend elements
-    legend_elements = [
-        Patch(facecolor='red', label='Red class'),
-        Patch(facecolor='orange', label='Orange class'),
-        Patch(facecolor='green', label='Green class')
-    ]
-    plt.legend(handles=legend_elements, title="Car original class")
-
-    # Show the plot
-    plt.show()
-
-
-    #########################################
-    ### PROCESSING DATA FOR PLOTS (MECHANICS)
-    for index, mechanic in enumerate(mechanics):
-        mechanic_data += (index + 1, mechanic.spent_times)
-    
-    mechanics_id = []
-    mechanics_times = []
-    car_classes = []
-    car_ids = []
-
-    for i in range(0, len(mechanic_data), 2):
-        mech_id = mechanic_data[i]
-        mechanic_entries = mechanic_data[i + 1] 
-        
-        mechanics_id.append(mech_id)
-        times = [(start - simulation_start_time, end - simulation_start_time) for _, _, _, start, end, _ in mechanic_entries]
-        mechanics_times.append(times)
-        
-        cars = [car_class for _, _, _, _, _, car_class in mechanic_entries]
-        car_classes.append(cars)
-        
-        cars = [car_id for car_id, _, _, _, _, _ in mechanic_entries]
-        car_ids.append(cars) 
-    
-    fig, ax = plt.subplots(figsize=(10, 5))
-    color_map = {
-        ObjectClass.RED: "red",
-        ObjectClass.ORANGE: "orange",
-        ObjectClass.GREEN: "green",
-        ObjectClass.PINK: "pink"
-    }    
-    for i, (mechanic_times, mechanic_classes, mechanic_car_ids) in enumerate(zip(mechanics_times, car_classes, car_ids)):
-        for (start, end), car_class, car_id in zip(mechanic_times, mechanic_classes, mechanic_car_ids):
-            # Get the color corresponding to the car_class
-            color = color_map[car_class]
-            # Plot the line
-            ax.plot([start, end], [i, i], color=color, linewidth=10, solid_capstyle="butt")
-            # Add the car_id as a small number next to the bar
-            mid_point = (start + end) / 2  # Calculate the midpoint of the bar
-            ax.text(mid_point, i, str(car_id), color="black", ha="center", va="center", fontsize=8)
+        car_routes += [(int(store.id[index]), store.route(index)) for index in mechanic.car_routes]
+    # Summaries go to the sinks like the events, so a run without console sinks prints nothing
+    event_log.report(str(car_routes))
+    event_log.report(stats.report(simulation_end_time))
 
-            
-    # Customize the plot
-    ax.set_yticks(range(len(mechanics_times)))
-    ax.set_yticklabels([mechanic.name for mechanic in mechanics])
-    ax.set_xlabel("Time (hours)")
-    ax.set_title("Mechanic schedule")
-
-    plt.grid()
-    plt.tight_layout()
-    plt.show()
-
-    # Średni czas przebywania klas w sieci
-    class_durations = {cls: [] for cls in ObjectClass}
-    for car in all_cars:
-        if car.delta_time:
-            class_durations[car.original_class].append(car.delta_time)
-
-    avg_durations = {cls: np.mean(times) if times else 0 for cls, times in class_durations.items()}
-
-    # Wykres
-    plt.figure(figsize=(10, 6))
-    plt.bar([str(cls) for cls in avg_durations.keys()], avg_durations.values(), color=['red', 'orange', 'green', 'pink'], edgecolor='black')
-    plt.xlabel('Class')
-    plt.ylabel('Mean Time (Hours)')
-    plt.title('Mean Time Spent By Each Class In The Network')
-    plt.grid(axis='y')
-    plt.show()
-
-async def monitor_queues(queues):
-    """Monitoruje liczbę oczekujących pojazdów i zapisuje dane do wykresu."""
-    queue_data = {name: [] for name in queues.keys()}  # Inicjalizacja pustych list
-    hours = []  # Lista przechowująca numery godzin
-    hour = 0  # Zmienna śledząca aktualną godzinę
-    
-    while hour <= 16:
-        await asyncio.sleep(1)  # Symulujemy przejście jednej godziny
-        
-        hours.append(hour)  # Dodajemy nową godzinę
-        for queue_name, queue in queues.items():
-            queue_length = queue.qsize()
-            queue_data[queue_name].append(queue_length)  # Zapisujemy stan kolejki
-        
-        if hour == 16:
-            plot_queue_status(hours, queue_data)
-            hour += 1
-        else:
-            hour += 1
-
-def plot_queue_status(hours, queue_data):
-    """Rysuje wykres słupkowy z nałożonymi na siebie wartościami (stacked bar chart)."""
-    plt.figure(figsize=(10, 6))
-    
-    systems = list(queue_data.keys())
-    data = np.array([queue_data[sys] for sys in systems])  # Konwersja na numpy array
+    ### REPORT (plots are saved to files once the simulation is over)
+    if report_dir is not None:
+        from .report import render_report
+        drawn = render_report(results.tables(), report_dir)
+        event_log.report(f"Report saved to {report_dir}/ ({', '.join(drawn) if drawn else 'figures already up to date'})")
 
-    colors = ["blue", "red", "green", "purple", "orange"]
-    
-    # Rysowanie wykresu jako stos słupków
-    bottom = np.zeros(len(hours))  # Początkowe wartości do nałożenia warstw
-    for i, (system, color) in enumerate(zip(systems, colors)):
-        plt.bar(hours, data[i], bottom=bottom, color=color, label=system)
-        bottom += data[i]  # Aktualizujemy dolną część dla następnej warstwy
-
-    plt.xticks(hours)
-    plt.xlabel("Hour")
-    plt.ylabel("Total Number of Waiting Cars")
-    plt.title("Queue Length Over Time")
-    plt.legend()
-    plt.show()
-
-# Run the simulation
-asyncio.run(main())
+def run(simulated_time=True, random_seed=None, sinks=None, results_path=None, report_dir='report', routing_path=None, trace_path=None):
+    # With simulated_time the clock jumps straight to the next event, so a whole shift takes milliseconds
+    # Events and the summary go to the colored console unless other sinks are given (an empty list runs silently)
+    # results_path saves the columnar results tables to that directory (see results.load_results)
+    # report_dir is where the figures are saved, None skips the report
+    # routing_path is a JSON routing table (see routing.py) used instead of DEFAULT_ROUTING
+    # random_seed makes the run reproducible, every source of randomness has its own stream (see rng.py)
+    # trace_path replays recorded arrivals from a CSV or Parquet file (see replay.py), in either clock mode
+    streams = RandomStreams(random_seed, STATIONS)
+    routing = load_routing(routing_path, STATIONS, ROUTING.classes, CarStore.MAX_ROUTE) if routing_path is not None else None
+    for sink in [ConsoleSink()] if sinks is None else sinks:
+        event_log.add_sink(sink)
+    loop_factory = VirtualEventLoop if simulated_time else None
+    try:
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(main(results_path, report_dir, streams, routing, trace_path))
+    finally:
+        event_log.close()
+
+if __name__ == '__main__':
+    # Run the simulation
+    run()
@@ -0,0 +1,201 @@
+"""Dobór obsady warsztatu: przeszukuje składy mechaników (liczba, wydajność, długość zmiany na stanowisku)
+i szuka najtańszego, który spełnia cel - np. 95. percentyl czasu w systemie albo liczbę napraw na zmianę.
+
+Kandydaci są oceniani silnikiem wektorowym w rundach (wyścig): w każdej rundzie wszyscy żywi kandydaci
+dostają te same ziarna (wspólne liczby losowe), a po rundzie odpadają ci, którzy:
+
+- na pewno nie spełniają celu (cały przedział ufności po złej stronie progu),
+- są zdominowani - tańszy lub równie drogi kandydat jest od nich istotnie lepszy (test w parach),
+- są drożsi od najtańszego kandydata, który na pewno spełnia cel.
+
+Przed pierwszą rundą sieć Jacksona odrzuca składy z niestabilnym stanowiskiem (rho >= max_utilisation).
+"""
+import os
+import sys
+from itertools import product
+from time import perf_counter
+
+import numpy as np
+
+from .main import STATIONS, ROUTING
+from .replications import process_pool, t_quantile
+from .rng import RandomStreams
+
+# name: (key of the simulate_batch result, True when higher is better, default target)
+OBJECTIVES = {
+    'p95_time': ('p95_time_in_system', False, 12.0),  # 95th percentile of the time in system of a day, hours
+    'repairs': ('repairs_per_replication', True, 16.0),  # repairs completed per shift
+}
+
+
+def build_roster(staffing):
+    """Skład mechaników z {stanowisko: (liczba, wydajność, godziny zmiany)}, w formacie DEFAULT_ROSTER."""
+    roster = []
+    for station, (count, efficiency, work_hours) in staffing.items():
+        for number in range(1, count + 1):
+            roster.append({'id': len(roster) + 1, 'efficiency': efficiency, 'work_hours': work_hours,
+                           'name': f'{station.capitalize()}{number}', 'station': station})
+    return roster
+
+
+def candidate_rosters(counts=(1, 2), efficiencies=(1.0,), shifts=(8, 16), stations=STATIONS):
+    # Every combination of (count, efficiency, shift) per station
+    options = list(product(counts, efficiencies, shifts))
+    for choice in product(options, repeat=len(stations)):
+        yield build_roster(dict(zip(stations, choice)))
+
+
+def roster_cost(roster, hourly_rate=50.0):
+    # Cost of one day: paid hours, a mechanic with efficiency e costs e times the base rate
+    return sum(entry['work_hours'] * entry['efficiency'] * hourly_rate for entry in roster)
+
+
+def prefilter(rosters, routing=ROUTING, max_utilisation=1.0):
+    """Odrzuca składy, w których któreś stanowisko ma rho >= max_utilisation w sieci Jacksona."""
+    from .jackson import solve
+
+    kept = []
+    for roster in rosters:
+        stations = solve(roster=roster, routing=routing)['stations']
+        if all(metrics['utilisation'] < max_utilisation for metrics in stations.values()):
+            kept.append(roster)
+    return kept
+
+
+def _evaluate(args):
+    # One round for a group of candidates, all on the same streams (common random numbers)
+    from .vectorized import simulate_batch
+
+    rosters, replications, num_cars, seed_sequence, routing, key = args
+    return [simulate_batch(replications, num_cars, roster, RandomStreams(seed_sequence, STATIONS), routing)[key]
+            for roster in rosters]
+
+
+def _half_width(values, level):
+    n = values.shape[-1]
+    return t_quantile(0.5 + level / 2, n - 1) * np.nanstd(values, axis=-1, ddof=1) / np.sqrt(n)
+
+
+def optimize(objective='p95_time', target=None, rosters=None, hourly_rate=50.0, num_cars=15, routing=ROUTING,
+             replications=200, max_rounds=10, level=0.95, seed=0, processes=None, max_utilisation=1.0, verbose=False):
+    """Szuka najtańszego składu, którego metryka `objective` spełnia `target`.
+
+    Zwraca słownik: best (najtańszy skład spełniający cel na poziomie ufności `level` albo None),
+    candidates (kandydaci, którzy przetrwali, z kosztem, średnią i połową szerokości przedziału),
+    rounds i evaluated (liczba ocenionych kandydatów w sumie po rundach).
+    """
+    if max_rounds < 1:
+        raise ValueError(f"max_rounds must be at least 1, got {max_rounds}")
+    key, higher_is_better, default_target = OBJECTIVES[objective]
+    target = default_target if target is None else target
+    rosters = list(candidate_rosters() if rosters is None else rosters)
+    considered = len(rosters)
+    if max_utilisation is not None:
+        rosters = prefilter(rosters, routing, max_utilisation)
+    if verbose:
+        print(f"{considered} rosters, {len(rosters)} left after the Jackson prefilter")
+
+    costs = np.array([roster_cost(roster, hourly_rate) for roster in rosters])
+    alive = np.arange(len(rosters))
+    values = [[] for _ in rosters]  # per candidate, one array of replications per round
+    sign = 1 if higher_is_better else -1  # sign * value: larger is better
+    processes = processes or os.cpu_count()
+    rounds = max_rounds if len(rosters) else 0  # nothing to race when the prefilter dropped every roster
+    evaluated = number = 0
+    best = None
+
+    with process_pool(processes) if processes > 1 and rounds else _Serial() as executor:
+        for number, seed_sequence in enumerate(np.random.SeedSequence(seed).spawn(rounds), 1):
+            groups = np.array_split(alive, min(len(alive), processes * 4))
+            chunks = [([rosters[i] for i in group], replications, num_cars, seed_sequence, routing, key) for group in groups]
+            for group, results in zip(groups, executor.map(_evaluate, chunks)):
+                for i, result in zip(group, results):
+                    values[i].append(result)
+            evaluated += len(alive)
+
+            samples = sign * np.array([np.concatenate(values[i]) for i in alive], dtype=float)
+            means = np.nanmean(samples, axis=1)
+            half_widths = _half_width(samples, level)
+            goal = sign * target
+            feasible = means - half_widths >= goal  # surely meets the target
+            infeasible = means + half_widths < goal  # surely misses it
+
+            keep = ~infeasible
+            if feasible.any():
+                cheapest = costs[alive][feasible].min()
+                keep &= costs[alive] <= cheapest
+            # Paired test against the best-scoring candidate that costs the same or less
+            order = np.lexsort((-means, costs[alive]))
+            leader = None
+            for position in order:
+                if leader is not None and keep[position]:
+                    difference = samples[leader] - samples[position]
+                    if np.nanmean(difference) - _half_width(difference, level) > 0:
+                        keep[position] = False
+                if leader is None or means[position] > means[leader]:
+                    leader = position
+            if verbose:
+                print(f"round {number}: {len(alive)} candidates, {int(feasible.sum())} surely feasible, {int(keep.sum())} kept")
+
+            feasible_alive = alive[feasible & keep]
+            alive = alive[keep]
+            if len(feasible_alive):
+                best = feasible_alive[np.argmin(costs[feasible_alive])]
+                # Done once no cheaper candidate is left undecided
+                if costs[alive].min() >= costs[best]:
+                    break
+            if not len(alive):
+                break
+
+    candidates = []
+    for i in alive:
+        sample = np.concatenate(values[i])
+        candidates.append({'roster': rosters[i], 'cost': costs[i], 'mean': np.nanmean(sample),
+                           'half_width': _half_width(sample, level)})
+    candidates.sort(key=lambda candidate: candidate['cost'])
+    return {
+        'best': None if best is None else {'roster': rosters[best], 'cost': costs[best],
+                                           'mean': np.nanmean(np.concatenate(values[best]))},
+        'candidates': candidates,
+        'target': target,
+        'rounds': number,
+        'evaluated': evaluated,
+        'considered': considered,
+    }
+
+
+class _Serial:
+    # Stand-in for the process pool when processes == 1
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def map(self, function, iterable):
+        return map(function, iterable)
+
+
+def describe(roster):
+    staffing = {}
+    for entry in roster:
+        count, efficiency, hours = staffing.get(entry['station'], (0, entry['efficiency'], entry['work_hours']))
+        staffing[entry['station']] = (count + 1, efficiency, hours)
+    return ', '.join(f"{station} {count}x(e={efficiency:g}, {hours:g}h)" for station, (count, efficiency, hours) in staffing.items())
+
+
+if __name__ == '__main__':
+    objective = sys.argv[1] if len(sys.argv) > 1 else 'p95_time'
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else OBJECTIVES[objective][2]
+    start = perf_counter()
+    result = optimize(objective, target, verbose=True)
+    elapsed = perf_counter() - start
+    print(f"{result['considered']} rosters, {result['evaluated']} candidate rounds in {result['rounds']} rounds, {elapsed:.1f} s")
+    if result['best'] is None:
+        print(f"No roster surely meets {objective} target {target}. Remaining candidates:")
+        for candidate in result['candidates'][:10]:
+            print(f"  cost {candidate['cost']:8.0f}  {objective} {candidate['mean']:7.3f} +- {candidate['half_width']:.3f}  {describe(candidate['roster'])}")
+    else:
+        best = result['best']
+        print(f"Cheapest roster meeting {objective} target {target}: cost {best['cost']:.0f}, {objective} {best['mean']:.3f}")
+        print(f"  {describe(best['roster'])}")
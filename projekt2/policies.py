@@ -0,0 +1,199 @@
+"""Reguły wyboru samochodu przez wolnego mechanika (dispatch policies).
+
+Polityka kolejki stanowiska decyduje o trzech rzeczach:
+
+- push(queue, car) - gdzie samochód staje w kolejce (klucz liczony raz, przy wstawieniu),
+- select(queue, mechanic) - który samochód bierze mechanik (domyślnie pierwszy w kolejce),
+- refuse(car, mechanic, left) - czy mechanik odmawia naprawy, która skończy się -left godzin po końcu zmiany.
+
+Czas każdego etapu naprawy jest wylosowany przy przyjeździe (Car.next_repair_time), więc polityki
+mogą z niego korzystać. compare_policies() uruchamia kilka polityk na tych samych ziarnach
+(wspólne liczby losowe) w obciążonym warsztacie wielodniowym.
+
+    python -m projekt2.policies [REPLICATIONS] [DAYS] [CARS_PER_DAY]
+"""
+import os
+import sys
+from abc import ABC, abstractmethod
+from time import perf_counter
+
+import numpy as np
+
+from .clock import now
+from .pqueue import BucketQueue, StableHeap
+
+PRIORITY_LEVELS = 3  # car priorities are 0 (lowest) .. 2
+REFUSE_OVERTIME = 1.0  # a repair that would end more than this many hours after the shift is refused
+
+
+class PriorityPolicy:
+    """Najwyższy priorytet pierwszy, FIFO przy równych; aging > 0 podnosi priorytet o `aging` na godzinę czekania."""
+    name = 'priority'
+
+    def __init__(self, aging=0.0, refuse_overtime=REFUSE_OVERTIME):
+        self.aging = aging
+        self.refuse_overtime = refuse_overtime
+
+    def new_queue(self):
+        # Buckets are fastest for the three fixed levels, the heap when aging compares the bucket heads
+        return StableHeap(self.aging) if self.aging else BucketQueue(PRIORITY_LEVELS)
+
+    def push(self, queue, car):
+        queue.push(car, car.priority, car.queue_entry_time if self.aging else 0.0)
+
+    def select(self, queue, mechanic):
+        return queue.pop()
+
+    def refuse(self, car, mechanic, left):
+        return left < -self.refuse_overtime
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class KeyPolicy(PriorityPolicy, ABC):
+    """Kolejność według własnego klucza polityki (najmniejszy pierwszy, FIFO przy równych).
+
+    Klasa bazowa - podklasa musi zdefiniować key(car), inaczej nie da się utworzyć jej instancji.
+    """
+
+    def new_queue(self):
+        return StableHeap()
+
+    def push(self, queue, car):
+        queue.push_key(car, self.key(car))
+
+    @abstractmethod
+    def key(self, car):
+        """Klucz samochodu w kolejce, liczony raz przy wstawieniu; mniejszy jest obsługiwany wcześniej."""
+
+
+class ShortestProcessingTime(KeyPolicy):
+    """Najkrótsza naprawa pierwsza (SPT), przy równych czasach wyższy priorytet."""
+    name = 'spt'
+
+    def key(self, car):
+        return car.next_repair_time, -car.priority
+
+
+class EarliestDeadline(KeyPolicy):
+    """Najwcześniejszy termin pierwszy (EDF); termin to przyjazd plus due_hours[priorytet]."""
+    name = 'edf'
+
+    def __init__(self, due_hours=(24.0, 12.0, 6.0), refuse_overtime=REFUSE_OVERTIME):
+        super().__init__(refuse_overtime=refuse_overtime)
+        self.due_hours = due_hours  # by priority, 0 (lowest) first
+
+    def key(self, car):
+        return car.arrival_time + self.due_hours[car.priority]
+
+
+class ClassWeighted(KeyPolicy):
+    """Reguła c-mu: największa waga klasy na godzinę naprawy pierwsza (cięższe uszkodzenia ważą więcej)."""
+    name = 'class'
+
+    def __init__(self, weights=None, refuse_overtime=REFUSE_OVERTIME):
+        super().__init__(refuse_overtime=refuse_overtime)
+        self.weights = weights or {'RED': 3.0, 'ORANGE': 2.0, 'GREEN': 1.0}
+
+    def key(self, car):
+        return -self.weights.get(car.object_class.name, 1.0) / car.next_repair_time
+
+
+class ShiftAware(KeyPolicy):
+    """Pakuje naprawy w resztę zmiany: najwyższy priorytet spośród napraw, które mechanik skończy przed końcem zmiany.
+
+    Gdy żadna się nie mieści, bierze pierwszy samochód jak PriorityPolicy (i może go odrzucić).
+    """
+    name = 'shift'
+
+    def key(self, car):
+        return -car.priority
+
+    def select(self, queue, mechanic):
+        remaining = mechanic.end_time - now()
+        car = queue.pop_where(lambda car: car.next_repair_time / mechanic.efficiency <= remaining)
+        return car if car is not None else queue.pop()
+
+
+POLICIES = {policy.name: policy for policy in (PriorityPolicy, ShortestProcessingTime, EarliestDeadline, ClassWeighted, ShiftAware)}
+
+
+def _run_policy(args):
+    # One multi-day garage run; unfinished cars are censored at the end of the run, so starving them does not pay
+    from .garage import Garage, daily_calendar
+    from .main import DEFAULT_ROSTER, ObjectClass
+
+    policy, seed, days, num_cars = args
+    garage = Garage(seed=seed, policy=policy).run(daily_calendar(days, DEFAULT_ROSTER, num_cars, days_off=()))
+    store = garage.store
+    arrival, end = store.arrival, store.end
+    finished = ~np.isnan(end)
+    unfinished = ~finished & ~store.destroyed & (store.object_class != ObjectClass.PINK.value)
+    times = np.concatenate([end[finished] - arrival[finished], garage.time - arrival[unfinished]])
+    low_priority_wait = garage.stats.wait['priority'].get(0)
+    return {
+        'finished_per_day': finished.sum() / days,
+        'repairs_per_day': sum(day['repairs'] for day in garage.days) / days,
+        'mean_time': times.mean(),
+        'p95_time': np.percentile(times, 95),
+        'p95_wait_low_priority': low_priority_wait.quantile.value() if low_priority_wait else np.nan,
+        'backlog': garage.days[-1]['carried_over'],
+    }
+
+
+def compare_policies(policies=None, replications=40, days=10, num_cars=18, seed=0, processes=None, level=0.95):
+    """Uruchamia każdą politykę na tych samych ziarnach replikacji.
+
+    Zwraca {nazwa: {metryka: (średnia, dolna, górna granica)}} oraz pod kluczem 'difference' różnice
+    względem pierwszej polityki liczone w parach (te same ziarna), też jako przedziały ufności.
+    """
+    from .replications import replication_seeds, confidence_interval, process_pool
+
+    policies = policies if policies is not None else [policy() for policy in POLICIES.values()]
+    seeds = replication_seeds(seed, replications)
+    tasks = [(policy, replication_seed, days, num_cars) for policy in policies for replication_seed in seeds]
+    processes = processes or os.cpu_count()
+    if processes > 1:
+        with process_pool(processes) as executor:
+            results = list(executor.map(_run_policy, tasks, chunksize=max(1, len(tasks) // (processes * 4))))
+    else:
+        results = list(map(_run_policy, tasks))
+
+    metrics = list(results[0])
+    values = {policy.name: {metric: np.array([result[metric] for result in results[number * replications:(number + 1) * replications]])
+                            for metric in metrics}
+              for number, policy in enumerate(policies)}
+    baseline = values[policies[0].name]
+    comparison = {name: {metric: confidence_interval(samples, level) for metric, samples in policy_values.items()}
+                  for name, policy_values in values.items()}
+    comparison['difference'] = {name: {metric: confidence_interval(samples - baseline[metric], level)
+                                       for metric, samples in policy_values.items()}
+                                for name, policy_values in values.items() if name != policies[0].name}
+    return comparison
+
+
+def print_policies(comparison):
+    names = [name for name in comparison if name != 'difference']
+    print(f"{'policy':<10} {'done/day':>9} {'repairs/day':>12} {'mean time':>10} {'p95 time':>9} {'(vs ' + names[0] + ')':>18} "
+          f"{'p95 wait p0':>12} {'backlog':>8}")
+    for name in names:
+        metrics = comparison[name]
+        if name in comparison['difference']:
+            mean, low, high = comparison['difference'][name]['p95_time']
+            difference = f"{mean:+7.2f} +- {(high - low) / 2:5.2f}"
+        else:
+            difference = ''
+        print(f"{name:<10} {metrics['finished_per_day'][0]:9.2f} {metrics['repairs_per_day'][0]:12.2f} {metrics['mean_time'][0]:10.2f} "
+              f"{metrics['p95_time'][0]:9.2f} {difference:>18} {metrics['p95_wait_low_priority'][0]:12.2f} {metrics['backlog'][0]:8.2f}")
+
+
+if __name__ == '__main__':
+    replications = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    num_cars = int(sys.argv[3]) if len(sys.argv) > 3 else 18
+    start = perf_counter()
+    comparison = compare_policies(replications=replications, days=days, num_cars=num_cars)
+    print(f"{replications} replications x {days} days, {num_cars} cars per day, common random numbers")
+    print_policies(comparison)
+    print(f"{perf_counter() - start:.1f} s")
@@ -0,0 +1,127 @@
+"""Kolejki priorytetowe stanowisk: najwyższy priorytet pierwszy, FIFO przy równych priorytetach
+i opcjonalne starzenie, żeby samochody o niskim priorytecie nie czekały w nieskończoność.
+
+Przy starzeniu efektywny priorytet rośnie liniowo z czasem oczekiwania: priority + aging * (t - t_enq).
+Porównując dwa samochody w tej samej chwili t, wyraz aging * t się skraca, więc o kolejności decyduje
+stały klucz priority - aging * t_enq, liczony raz przy wstawieniu - nic nie trzeba przeliczać w czasie.
+
+- StableHeap - kopiec (klucz, numer kolejny, element), O(log n) na operację, dowolne priorytety,
+- BucketQueue - osobna kolejka na każdy z `levels` całkowitych priorytetów. Bez starzenia to kolejki FIFO:
+  O(1) wstawienie, O(levels) pobranie. Przy starzeniu poziom jest kopcem (czas wstawienia, numer kolejny),
+  bo w obrębie poziomu kolejność klucza to kolejność czasów, a samochód odłożony z dawnym czasem wejścia
+  musi wyprzedzić późniejsze - O(log n) wstawienie i O(levels + log n) pobranie; wygrywa najlepsza z głów.
+
+Obie mają push(item, priority, time), pop(), peek() i len(); iteracja zwraca elementy w kolejności obsługi.
+StableHeap ma też push_key (dowolny klucz) i pop_where (najlepszy element spełniający warunek).
+"""
+from collections import deque
+from heapq import heappush, heappop, _siftdown, _siftup
+from itertools import count
+
+
+class StableHeap:
+    __slots__ = ('aging', '_heap', '_sequence')
+
+    def __init__(self, aging=0.0):
+        self.aging = aging  # priority gained per hour of waiting
+        self._heap = []
+        self._sequence = count()
+
+    def push(self, item, priority, time=0.0):
+        # Smallest key first: higher priority, then (with aging) earlier entry, then insertion order
+        heappush(self._heap, (self.aging * time - priority, next(self._sequence), item))
+
+    def push_key(self, item, key):
+        # Any precomputed key, smallest first (see policies.py)
+        heappush(self._heap, (key, next(self._sequence), item))
+
+    def pop(self):
+        return heappop(self._heap)[2]
+
+    def pop_where(self, accept):
+        """Najlepszy element, dla którego accept(item) jest prawdą, albo None.
+
+        Kopiec jest przeglądany od korzenia w kolejności kluczy, więc accept widzi tylko elementy lepsze od
+        znalezionego (i ich dzieci), a wyjęcie ze środka kopca to O(log n).
+        """
+        heap = self._heap
+        frontier = [(heap[0], 0)] if heap else []  # (entry, position); entries are unique, so positions never compare
+        while frontier:
+            entry, position = heappop(frontier)
+            if accept(entry[2]):
+                last = heap.pop()
+                if position < len(heap):
+                    # Move the last entry into the hole and restore the heap in both directions
+                    heap[position] = last
+                    _siftup(heap, position)
+                    _siftdown(heap, 0, position)
+                return entry[2]
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heappush(frontier, (heap[child], child))
+        return None
+
+    def peek(self):
+        return self._heap[0][2]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        return (entry[2] for entry in sorted(self._heap))
+
+
+class BucketQueue:
+    __slots__ = ('aging', '_buckets', '_size', '_sequence')
+
+    def __init__(self, levels=3, aging=0.0):
+        self.aging = aging
+        # index = priority; FIFO deques of items, with aging heaps of (time, sequence, item)
+        self._buckets = [[] if aging else deque() for _ in range(levels)]
+        self._size = 0
+        self._sequence = count()
+
+    def push(self, item, priority, time=0.0):
+        if not 0 <= priority < len(self._buckets):
+            raise ValueError(f"Priority {priority} outside 0..{len(self._buckets) - 1}")
+        if self.aging:
+            heappush(self._buckets[priority], (time, next(self._sequence), item))
+        else:
+            self._buckets[priority].append(item)
+        self._size += 1
+
+    def _best(self):
+        if not self.aging:
+            for bucket in reversed(self._buckets):
+                if bucket:
+                    return bucket
+            raise IndexError('pop from an empty queue')
+        best, best_key = None, None
+        for priority in range(len(self._buckets) - 1, -1, -1):  # ties go to the higher priority
+            bucket = self._buckets[priority]
+            if bucket:
+                key = self.aging * bucket[0][0] - priority
+                if best is None or key < best_key:
+                    best, best_key = bucket, key
+        if best is None:
+            raise IndexError('pop from an empty queue')
+        return best
+
+    def pop(self):
+        bucket = self._best()
+        self._size -= 1
+        return heappop(bucket)[2] if self.aging else bucket.popleft()
+
+    def peek(self):
+        bucket = self._best()
+        return bucket[0][2] if self.aging else bucket[0]
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        if not self.aging:
+            return (item for bucket in reversed(self._buckets) for item in bucket)
+        entries = [(self.aging * time - priority, -priority, time, sequence, item)
+                   for priority, bucket in enumerate(self._buckets) for time, sequence, item in bucket]
+        return (entry[4] for entry in sorted(entries, key=lambda entry: entry[:4]))
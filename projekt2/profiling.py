@@ -0,0 +1,205 @@
+"""Profilowanie gorących ścieżek symulacji, włączane na żądanie.
+
+Po profiler.enable() każde wywołanie zwrotne pętli asyncio (krok zadania, timer stanowiska) i wybrane
+metody - obsługa zdarzeń stanowisk, operacje kolejek, wybór trasy, zapis zdarzeń - są liczone, a ich czas
+(zegar ścienny i CPU) mierzony osobno dla każdego stanowiska. Dla timerów liczone jest też opóźnienie pętli:
+o ile później niż zaplanowano wywołanie ruszyło (w jednostkach zegara pętli - godzinach na VirtualEventLoop).
+
+Haki są instalowane tylko na czas profilowania (podmiana metod klas), więc wyłączony profiler nie dodaje
+do gorących ścieżek ani jednej instrukcji i może zostać w kodzie produkcyjnym.
+
+- report() - tabela: wywołania, czas łączny, czas własny i CPU na etykietę, suma czasu własnego na stanowisko,
+- write_folded(path) - stosy w formacie "ramka;ramka;ramka mikrosekundy" (flamegraph.pl, speedscope, inferno).
+
+    with profiler.profile():
+        run(sinks=[], report_dir=None)
+    print(profiler.report())
+    profiler.write_folded('profile.folded')
+
+    python -m projekt2.profiling [NUM_CARS] [FOLDED_PATH]
+"""
+import asyncio
+import functools
+import sys
+from contextlib import contextmanager
+from time import perf_counter_ns, thread_time_ns
+
+from .stats import Accumulator
+
+
+def _hooks():
+    # (class, method) pairs timed while profiling; imported here, so importing this module stays cheap
+    from .events import EventLog
+    from .main import PriorityQueue
+    from .routing import RoutingTable
+    from .station import Station
+    return [
+        *((Station, name) for name in ('_next_car', '_finish_repair', '_route', '_end_shift', '_dispatch', 'enqueue')),
+        *((PriorityQueue, name) for name in ('_put', '_get', 'get_for')),
+        (RoutingTable, 'next_hop'),
+        (EventLog, 'emit'),
+    ]
+
+
+def _callback_label(handle):
+    # Root frame of one loop callback: task:<coroutine>, timer:<callback> (call_at/call_later) or call:<callback>
+    callback = handle._callback
+    owner = getattr(callback, '__self__', None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return f"task:{getattr(coro, '__qualname__', owner.get_name())}"
+    label = getattr(callback, '__qualname__', None) or type(callback).__name__
+    name = getattr(owner, 'name', None)
+    label = f"{label}[{name}]" if isinstance(name, str) else label
+    return f"timer:{label}" if isinstance(handle, asyncio.TimerHandle) else f"call:{label}"
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self._originals = []
+        self.reset()
+
+    def reset(self):
+        self.calls = {}  # label -> [calls, wall ns, self wall ns, cpu ns]
+        self.folded = {}  # "frame;frame;frame" -> self wall ns
+        self.lag = Accumulator()  # timer callbacks: loop time they ran minus the time they were scheduled for
+        self.lag_max = 0.0
+        self._stack = []  # [label, stack key, wall start, cpu start, wall of children]
+
+    def _enter(self, label):
+        stack = self._stack
+        key = f"{stack[-1][1]};{label}" if stack else label
+        stack.append([label, key, perf_counter_ns(), thread_time_ns(), 0])
+
+    def _exit(self):
+        wall_end, cpu_end = perf_counter_ns(), thread_time_ns()
+        label, key, wall_start, cpu_start, children = self._stack.pop()
+        wall = wall_end - wall_start
+        if self._stack:
+            self._stack[-1][4] += wall
+        entry = self.calls.get(label)
+        if entry is None:
+            entry = self.calls[label] = [0, 0, 0, 0]
+        entry[0] += 1
+        entry[1] += wall
+        entry[2] += wall - children
+        entry[3] += cpu_end - cpu_start
+        self.folded[key] = self.folded.get(key, 0) + wall - children
+
+    def _wrap(self, function, label):
+        profiler = self
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            name = getattr(args[0], 'name', None) if args else None
+            profiler._enter(f"{label}[{name}]" if isinstance(name, str) else label)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler._exit()
+        return timed
+
+    def _wrap_handle(self, run):
+        profiler = self
+
+        @functools.wraps(run)
+        def timed_run(handle):
+            if isinstance(handle, asyncio.TimerHandle):
+                lag = handle._loop.time() - handle.when()
+                profiler.lag.add(lag)
+                profiler.lag_max = max(profiler.lag_max, lag)
+            profiler._enter(_callback_label(handle))
+            try:
+                return run(handle)
+            finally:
+                profiler._exit()
+        return timed_run
+
+    def enable(self):
+        if self.enabled:
+            return
+        targets = [*_hooks(), (asyncio.events.Handle, '_run')]
+        for cls, name in targets:
+            original = cls.__dict__[name]
+            self._originals.append((cls, name, original))
+            wrapped = self._wrap_handle(original) if name == '_run' else self._wrap(original, f'{cls.__name__}.{name}')
+            setattr(cls, name, wrapped)
+        self.enabled = True
+
+    def disable(self):
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals = []
+        self._stack = []
+        self.enabled = False
+
+    @contextmanager
+    def profile(self, reset=True):
+        if reset:
+            self.reset()
+        self.enable()
+        try:
+            yield self
+        finally:
+            self.disable()
+
+    def summary(self):
+        """Słownik wyników (etykieta -> liczniki w sekundach, stanowisko -> czas własny, opóźnienie pętli)."""
+        stations = {}
+        for label, (_, _, own, _) in self.calls.items():
+            # Labels of station and queue methods end with [station name]
+            if label.endswith(']'):
+                station = label[label.rindex('[') + 1:-1]
+                stations[station] = stations.get(station, 0.0) + own / 1e9
+        return {
+            'calls': {label: {'calls': calls, 'wall': wall / 1e9, 'self': own / 1e9, 'cpu': cpu / 1e9}
+                      for label, (calls, wall, own, cpu) in self.calls.items()},
+            'stations': stations,
+            'lag': {**self.lag.summary(), 'max': self.lag_max},
+        }
+
+    def report(self, limit=40):
+        total = sum(own for _, _, own, _ in self.calls.values()) or 1
+        lines = [f"{'handler':<44} {'calls':>8} {'wall ms':>9} {'self ms':>9} {'self %':>7} {'cpu ms':>9} {'us/call':>8}"]
+        for label, (calls, wall, own, cpu) in sorted(self.calls.items(), key=lambda item: -item[1][2])[:limit]:
+            lines.append(f"{label:<44} {calls:8d} {wall / 1e6:9.2f} {own / 1e6:9.2f} {own / total:7.1%} {cpu / 1e6:9.2f} "
+                         f"{wall / calls / 1e3:8.2f}")
+        summary = self.summary()
+        if summary['stations']:
+            lines.append(f"{'station':<44} {'self ms':>9}")
+            for station, own in sorted(summary['stations'].items(), key=lambda item: -item[1]):
+                lines.append(f"{station:<44} {own * 1e3:9.2f}")
+        lag = summary['lag']
+        if lag['count']:
+            lines.append(f"Loop lag of {lag['count']} timers: mean {lag['mean']:.3g}, p95 {lag['p95']:.3g}, "
+                         f"max {lag['max']:.3g} (loop time units)")
+        return '\n'.join(lines)
+
+    def write_folded(self, path):
+        # One line per distinct stack with its self time in microseconds, the input of flamegraph.pl
+        with open(path, 'w') as file:
+            for key, own in sorted(self.folded.items()):
+                if own >= 1000:
+                    file.write(f"{key} {own // 1000}\n")
+
+
+profiler = Profiler()
+
+
+if __name__ == '__main__':
+    from .clock import VirtualEventLoop
+    from .main import STATIONS, simulate
+    from .rng import RandomStreams
+
+    num_cars = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    roster = None
+    if num_cars > 15:
+        from .main import DEFAULT_ROSTER
+        roster = [{**entry, 'work_hours': num_cars + 24} for entry in DEFAULT_ROSTER]  # shifts last until the last car
+    with profiler.profile(), asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+        runner.run(simulate(num_cars, **({'roster': roster} if roster else {}), streams=RandomStreams(0, STATIONS)))
+    print(profiler.report())
+    if len(sys.argv) > 2:
+        profiler.write_folded(sys.argv[2])
+        print(f"Folded stacks saved to {sys.argv[2]}")
@@ -0,0 +1,157 @@
+"""Odtwarzanie zapisanych przyjazdów (trace-driven): przyjazdy, klasy i czasy napraw czytane z pliku
+zamiast losowania w enqueue_cars i Car.__init__. Trasy, parking i mechanicy działają jak zwykle.
+
+Plik CSV albo Parquet, jeden wiersz na samochód, posortowany po czasie przyjazdu:
+
+    time,priority,class,stage_1,stage_2,stage_3
+
+- time - godziny od początku zapisu albo data i godzina (ISO 8601, liczona od północy pierwszego dnia),
+- class - RED/ORANGE/GREEN/PINK (albo wartość ObjectClass),
+- stage_n - czas n-tego etapu naprawy w godzinach, puste przy mniejszej liczbie etapów.
+
+Plik jest czytany leniwie: CSV wiersz po wierszu, Parquet paczkami po chunk_rows wierszy (opcjonalne pyarrow),
+a przyjazdy płyną przez generatory. W pamięci jest zawsze najwyżej jedna paczka, więc rok historii
+odtwarza się w stałej pamięci - rośnie tylko magazyn samochodów z wynikami.
+
+replay_cars działa w obu trybach zegara: na VirtualEventLoop czasy przeskakują, na zwykłej pętli asyncio
+(run(simulated_time=False)) godzina zapisu trwa sekundę, jak każde asyncio.sleep w symulacji.
+
+    python -m projekt2.replay TRACE [DAYS]
+"""
+import asyncio
+import csv
+import sys
+from collections import namedtuple
+from itertools import groupby
+
+import numpy as np
+
+from .carstore import CarStore
+from .clock import now
+from .events import event_log, EventType
+from .main import Car, ObjectClass, PRIORITY_LEVELS
+
+HOUR = np.timedelta64(1, 'h')
+STAGE_COLUMNS = [f'stage_{stage + 1}' for stage in range(CarStore.MAX_STAGES)]
+COLUMNS = ['time', 'priority', 'class', *STAGE_COLUMNS]
+
+# One recorded car; repair_times in the order of the repairs (first stage first)
+Arrival = namedtuple('Arrival', 'time priority object_class repair_times')
+
+
+def _rows(path, chunk_rows):
+    # Dicts with the trace columns, read lazily
+    if str(path).endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet traces need pyarrow (pip install pyarrow)") from None
+        file = pq.ParquetFile(path)
+        columns = [column for column in COLUMNS if column in file.schema_arrow.names]
+        for batch in file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield from batch.to_pylist()
+    else:
+        with open(path, newline='') as file:
+            yield from csv.DictReader(file)
+
+
+def _present(value):
+    return value is not None and value != ''
+
+
+def read_trace(path, chunk_rows=65536):
+    """Generator przyjazdów z pliku CSV albo Parquet; sprawdza kolejność czasów, priorytety i liczbę etapów.
+
+    Każda naprawa obniża klasę o jeden aż do PINK, więc samochód klasy c ma dokładnie PINK - c etapów.
+    """
+    origin = None
+    last = -np.inf
+    for number, row in enumerate(_rows(path, chunk_rows), start=1):
+        value = row['time']
+        try:
+            time = float(value)
+        except (TypeError, ValueError):
+            # Date and time: hours since midnight of the first day, so trace days start at midnight
+            stamp = np.datetime64(value, 's')
+            if origin is None:
+                origin = stamp.astype('datetime64[D]')
+            time = float((stamp - origin) / HOUR)
+        if time < last:
+            raise ValueError(f"{path}, row {number}: arrivals must be sorted by time ({time} after {last})")
+        last = time
+        priority = int(row['priority'])
+        if not 0 <= priority < PRIORITY_LEVELS:
+            raise ValueError(f"{path}, row {number}: priority {priority} outside 0..{PRIORITY_LEVELS - 1}")
+        object_class = row['class']
+        object_class = ObjectClass[object_class] if isinstance(object_class, str) and not object_class.isdigit() \
+            else ObjectClass(int(object_class))
+        repair_times = [float(row[column]) for column in STAGE_COLUMNS if _present(row.get(column))]
+        stages = ObjectClass.PINK.value - object_class.value
+        if len(repair_times) != stages:
+            raise ValueError(f"{path}, row {number}: class {object_class.name} needs {stages} repair stages, "
+                             f"got {len(repair_times)}")
+        if any(not repair_time >= 0 for repair_time in repair_times):
+            raise ValueError(f"{path}, row {number}: repair times must be non-negative hours, got {repair_times}")
+        yield Arrival(time, priority, object_class, repair_times)
+
+
+def write_trace(path, store):
+    """Zapisuje przyjazdy z magazynu samochodów (np. po zwykłej symulacji) jako plik CSV do odtworzenia."""
+    # Every repair lowers the class by one, so the original class gives the number of stages
+    stages = {object_class.value: ObjectClass.PINK.value - object_class.value for object_class in ObjectClass}
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+        for index in np.argsort(store.arrival, kind='stable'):
+            original_class = int(store.original_class[index])
+            repair_times = store.repair_times[index, :stages[original_class]][::-1]  # the store pops from the end
+            writer.writerow([repr(float(store.arrival[index])), int(store.priority[index]), ObjectClass(original_class).name,
+                             *map(repr, map(float, repair_times)), *[''] * (CarStore.MAX_STAGES - len(repair_times))])
+
+
+async def replay_cars(queue, arrivals, store, first_car_id=1, start=None):
+    """Wstawia samochody z `arrivals` do kolejki parkingu o czasie start + arrival.time (zamiast enqueue_cars).
+
+    Na końcu wstawia None, po którym parking kończy pracę. Zwraca liczbę samochodów.
+    """
+    start = now() if start is None else start
+    count = 0
+    for count, arrival in enumerate(arrivals, start=1):
+        delay = start + arrival.time - now()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        car = Car.view(store, store.add(first_car_id + count - 1, arrival.priority, arrival.object_class.value,
+                                        arrival.repair_times[::-1]))
+        await queue.put(car)
+        car.set_arrival_time()
+
+        if event_log.enabled:
+            event_log.emit(EventType.ARRIVED, car, 'Parking')
+    await queue.put(None)
+    return count
+
+
+def trace_calendar(arrivals, roster, day_hours=24, days_off=()):
+    """Kalendarz dla Garage.run z przyjazdów zapisu: dzień d dostaje przyjazdy z [d * day_hours, (d + 1) * day_hours)
+    z czasami od początku dnia. Generator - kolejny dzień czyta plik dopiero wtedy, gdy jest symulowany."""
+    day = 0
+    for trace_day, day_arrivals in groupby(arrivals, key=lambda arrival: int(arrival.time // day_hours)):
+        while day <= trace_day:
+            offset = day * day_hours
+            # Days without arrivals (a gap in the trace) still run their shifts on the cars carried over
+            cars = (arrival._replace(time=arrival.time - offset) for arrival in day_arrivals) if day == trace_day else ()
+            yield {'roster': [] if day % 7 in days_off else roster, 'arrivals': cars}
+            day += 1
+
+
+if __name__ == '__main__':
+    # python -m projekt2.replay TRACE [DAYS]: replays a recorded trace day by day in a multi-day garage
+    from .garage import Garage
+    from .main import DEFAULT_ROSTER
+
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    garage = Garage(seed=0).run(trace_calendar(read_trace(sys.argv[1]), DEFAULT_ROSTER), days)
+    print(f"{'day':>4} {'arrived':>8} {'repairs':>8} {'carried over':>13}")
+    for summary in garage.days:
+        print(f"{summary['day']:4d} {summary['arrived']:8d} {summary['repairs']:8d} {summary['carried_over']:13d}")
+    print(garage.stats.report(garage.time))
@@ -0,0 +1,258 @@
+"""Monte Carlo: wiele niezależnych replikacji symulacji (z ustalonymi ziarnami) uruchamianych na wszystkich rdzeniach."""
+import asyncio
+import math
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+
+from .clock import VirtualEventLoop
+from .main import ObjectClass, DEFAULT_ROSTER, ROUTING, STATIONS, simulate
+from .rng import RandomStreams
+
+REPORTED_CLASSES = [ObjectClass.RED, ObjectClass.ORANGE, ObjectClass.GREEN]
+
+
+class Scenario:
+    def __init__(self, num_cars=15, roster=DEFAULT_ROSTER, shift_hours=None, routing=None):
+        self.num_cars = num_cars
+        self.routing = routing if routing is not None else ROUTING  # RoutingTable, see routing.py
+        # shift_hours overrides work_hours of every mechanic in the roster
+        if shift_hours is not None:
+            roster = [{**entry, 'work_hours': shift_hours} for entry in roster]
+        self.roster = roster
+
+    def __repr__(self):
+        return f"Scenario(num_cars={self.num_cars}, mechanics={[entry['name'] for entry in self.roster]})"
+
+
+def replication_seeds(base_seed, replications):
+    # Independent seeds spawned from one SeedSequence, so serial and parallel runs see the same streams
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(base_seed).spawn(replications)]
+
+
+def run_replication(scenario, replication_seed):
+    streams = RandomStreams(replication_seed, STATIONS)
+    with asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+        store, mechanics, _, stats, start, end = runner.run(simulate(scenario.num_cars, scenario.roster, streams=streams, routing=scenario.routing))
+
+    delta_times = store.end - store.arrival
+    time_in_system = {}
+    for object_class in REPORTED_CLASSES:
+        times = delta_times[(store.original_class == object_class.value) & ~np.isnan(delta_times)]
+        time_in_system[object_class] = times.mean() if len(times) else np.nan
+
+    utilisation = {}
+    for mechanic in mechanics:
+        # Busy time includes overtime repairs, so it is divided by the time on duty: the shift plus any overtime
+        # (work_hours is what was left of the shift when the mechanic stopped, negative after overtime)
+        on_duty = mechanic.shift_hours - min(mechanic.work_hours, 0.0)
+        utilisation[mechanic.name] = stats.busy.get(mechanic.id, 0.0) / on_duty if on_duty > 0 else np.nan
+
+    return {
+        'time_in_system': time_in_system,
+        'destruction_rate': store.destroyed.mean(),
+        'utilisation': utilisation,
+        'duration': end - start,
+    }
+
+
+def _run_chunk(args):
+    scenario, seeds = args
+    return [run_replication(scenario, replication_seed) for replication_seed in seeds]
+
+
+def _t_cdf(t, df):
+    # Exact Student-t distribution function for integer df >= 1 (Abramowitz & Stegun 26.7.3, 26.7.4), t >= 0
+    theta = math.atan(t / math.sqrt(df))
+    cos2 = math.cos(theta) ** 2
+    if df % 2:
+        term = total = math.cos(theta) if df > 1 else 0.0
+        for k in range(3, df - 1, 2):
+            term *= cos2 * (k - 1) / k
+            total += term
+        inside = 2 / math.pi * (theta + math.sin(theta) * total)
+    else:
+        term = total = 1.0
+        for k in range(2, df - 1, 2):
+            term *= cos2 * (k - 1) / k
+            total += term
+        inside = math.sin(theta) * total
+    return 0.5 + inside / 2
+
+
+def t_quantile(p, df):
+    """Kwantyl rozkładu t-Studenta dla p > 0.5: dokładny do df < 30, powyżej rozwinięcie Cornisha-Fishera."""
+    if df < 1:
+        raise ValueError(f"Student t quantile needs df >= 1, got {df}")
+    if df < 30:
+        # Bisection on the exact distribution function, the series has fewer than 15 terms here
+        low, high = 0.0, 1e4
+        for _ in range(100):
+            middle = (low + high) / 2
+            if _t_cdf(middle, int(df)) < p:
+                low = middle
+            else:
+                high = middle
+        return (low + high) / 2
+    # Normal quantile corrected in powers of 1/df, relative error below 1e-5 from df = 30
+    from statistics import NormalDist  # imported here, so worker processes do not pay for it at startup
+
+    z = NormalDist().inv_cdf(p)
+    return (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+
+def confidence_interval(values, level=0.95):
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) < 2:
+        mean = values.mean() if len(values) else np.nan
+        return mean, np.nan, np.nan
+    mean = values.mean()
+    half_width = t_quantile(0.5 + level / 2, len(values) - 1) * values.std(ddof=1) / np.sqrt(len(values))
+    return mean, mean - half_width, mean + half_width
+
+
+def summarize(results, level=0.95):
+    return {
+        'replications': len(results),
+        'time_in_system': {object_class: confidence_interval([r['time_in_system'][object_class] for r in results], level)
+                           for object_class in REPORTED_CLASSES},
+        'destruction_rate': confidence_interval([r['destruction_rate'] for r in results], level),
+        'utilisation': {name: confidence_interval([r['utilisation'][name] for r in results], level)
+                        for name in results[0]['utilisation']},
+    }
+
+
+def worker_context():
+    """Sposób startu procesów roboczych: fork na Linuksie, gdzie jest bezpieczny, domyślny gdzie indziej.
+
+    Forkowany proces dziedziczy wczytany silnik i zaczyna liczyć po kilkunastu ms; uruchomiony od nowa (spawn,
+    forkserver - domyślny od Pythona 3.14) importuje numpy i asyncio jeszcze raz, co trwa ok. 200 ms.
+    """
+    import multiprocessing
+
+    return multiprocessing.get_context('fork' if sys.platform == 'linux' else None)
+
+
+def process_pool(processes):
+    # ProcessPoolExecutor pulls in multiprocessing, so it is imported only when a pool is made
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(processes, mp_context=worker_context())
+
+
+def _compute(scenario, seeds, processes):
+    processes = processes or os.cpu_count()
+    if processes == 1 or len(seeds) < 2:
+        return _run_chunk((scenario, seeds))
+    # Few large chunks per worker keep the pickling overhead negligible
+    chunk_size = max(1, len(seeds) // (processes * 4))
+    chunks = [(scenario, seeds[i:i + chunk_size]) for i in range(0, len(seeds), chunk_size)]
+    with process_pool(processes) as executor:
+        return [result for chunk in executor.map(_run_chunk, chunks) for result in chunk]
+
+
+def collect_replications(scenario, replications, base_seed=0, processes=None, cache=None):
+    # Raw per-replication results, in seed order; with a cache (cache.ResultCache) only missing seeds are simulated
+    seeds = replication_seeds(base_seed, replications)
+    if cache is None:
+        return _compute(scenario, seeds, processes)
+    results = cache.get_many(scenario, seeds)
+    missing = [seed for seed in seeds if seed not in results]
+    if missing:
+        computed = dict(zip(missing, _compute(scenario, missing, processes)))
+        cache.put_many(scenario, computed)
+        results.update(computed)
+    return [results[seed] for seed in seeds]
+
+
+def run_replications(scenario, replications, base_seed=0, processes=None, level=0.95, cache=None):
+    """Uruchamia `replications` replikacji scenariusza w puli procesów i zwraca przedziały ufności."""
+    return summarize(collect_replications(scenario, replications, base_seed, processes, cache), level)
+
+
+def _paired_metrics(result):
+    metrics = {f'time_in_system[{object_class}]': result['time_in_system'][object_class] for object_class in REPORTED_CLASSES}
+    metrics['destruction_rate'] = result['destruction_rate']
+    return metrics
+
+
+def compare_scenarios(first, second, replications, base_seed=0, processes=None, level=0.95, cache=None):
+    """Porównuje dwa scenariusze na wspólnych liczbach losowych (te same ziarna replikacji).
+
+    Zwraca dla każdej metryki przedział ufności różnicy second - first liczony w parach oraz
+    variance_ratio = var(różnicy) / (var(first) + var(second)) - tyle razy mniej replikacji potrzeba
+    niż przy porównaniu niezależnych przebiegów.
+    """
+    first_results = collect_replications(first, replications, base_seed, processes, cache)
+    second_results = collect_replications(second, replications, base_seed, processes, cache)
+    first_metrics = [_paired_metrics(result) for result in first_results]
+    second_metrics = [_paired_metrics(result) for result in second_results]
+
+    comparison = {}
+    for name in first_metrics[0]:
+        x = np.array([metrics[name] for metrics in first_metrics], dtype=float)
+        y = np.array([metrics[name] for metrics in second_metrics], dtype=float)
+        both = ~np.isnan(x) & ~np.isnan(y)  # pairs where both runs finished a car of the class
+        x, y = x[both], y[both]
+        independent = x.var(ddof=1) + y.var(ddof=1)
+        comparison[name] = {
+            'difference': confidence_interval(y - x, level),
+            'variance_ratio': (y - x).var(ddof=1) / independent if independent > 0 else np.nan,
+        }
+    return comparison
+
+
+def print_summary(summary):
+    def fmt(ci):
+        mean, low, high = ci
+        return f"{mean:8.3f}  [{low:8.3f}, {high:8.3f}]"
+
+    print(f"Replications: {summary['replications']}")
+    print("Time in system (hours) by original class:")
+    for object_class, ci in summary['time_in_system'].items():
+        print(f"  {str(object_class):<16} {fmt(ci)}")
+    print(f"Destruction rate:  {fmt(summary['destruction_rate'])}")
+    print("Utilisation:")
+    for name, ci in summary['utilisation'].items():
+        print(f"  {name:<16} {fmt(ci)}")
+
+
+def print_comparison(comparison):
+    print(f"{'metric':<30} {'difference (second - first)':>32} {'variance ratio':>15}")
+    for name, entry in comparison.items():
+        mean, low, high = entry['difference']
+        print(f"{name:<30} {mean:8.3f}  [{low:8.3f}, {high:8.3f}]  {entry['variance_ratio']:15.3f}")
+
+
+if __name__ == '__main__':
+    # --cache keeps finished replications in .simcache/ (cache.py), so repeated runs only simulate new seeds
+    cache = None
+    if '--cache' in sys.argv:
+        from .cache import ResultCache
+        sys.argv.remove('--cache')
+        cache = ResultCache()
+    if sys.argv[1:2] == ['compare']:
+        # Default roster against the same roster with Warsztat2 on a full 16 hour shift
+        replications = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+        longer_shift = [{**entry, 'work_hours': 16} for entry in DEFAULT_ROSTER]
+        print_comparison(compare_scenarios(Scenario(), Scenario(roster=longer_shift), replications, cache=cache))
+        sys.exit()
+
+    replications = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    scenario = Scenario()
+    from .jackson import solve  # microsecond check before spending CPU on the replications
+    unstable = solve(roster=scenario.roster, routing=scenario.routing)['unstable']
+    if unstable:
+        print(f"Warning: unstable stations (rho >= 1) in steady state: {', '.join(unstable)}")
+    start = perf_counter()
+    summary = run_replications(scenario, replications, processes=processes, cache=cache)
+    elapsed = perf_counter() - start
+    print_summary(summary)
+    print(f"{replications / elapsed:.0f} replications per second")
+    if cache is not None:
+        print(f"Cache: {cache.hits} replications reused, {cache.misses} simulated")
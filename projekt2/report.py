@@ -0,0 +1,224 @@
+"""Etap raportowania uruchamiany po symulacji: wykresy zapisywane do plików (backend Agg, bez plt.show).
+
+Każdy wykres ma w pliku `.report-cache.json` skrót danych, z których powstał - jeśli dane się nie
+zmieniły, a plik istnieje, wykres nie jest rysowany ponownie.
+"""
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from .main import ObjectClass
+from .stats import resample
+
+CLASS_COLORS = {ObjectClass.RED.value: 'red', ObjectClass.ORANGE.value: 'orange',
+                ObjectClass.GREEN.value: 'green', ObjectClass.PINK.value: 'pink'}
+QUEUE_COLORS = ["blue", "red", "green", "purple", "orange"]
+REPORT_VERSION = 2  # bump when a figure changes, so cached files are redrawn
+QUEUE_BIN_HOURS = 1.0  # bin width of the queue length chart
+
+MAX_LABELLED_BARS = 200  # car ids are written on the Gantt bars only below this many repairs
+MAX_BARS = 2000  # above this many cars/bins the bar charts switch to line collections
+
+
+def _pyplot():
+    # Imported on first use, so simulations that never report do not pay for matplotlib
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _digest(*parts):
+    digest = hashlib.sha1(str(REPORT_VERSION).encode())
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class FigureCache:
+    def __init__(self, output_dir, force=False):
+        self.output_dir = output_dir
+        self.force = force
+        self.path = os.path.join(output_dir, '.report-cache.json')
+        os.makedirs(output_dir, exist_ok=True)
+        try:
+            with open(self.path) as file:
+                self.digests = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.digests = {}
+
+    def render(self, name, draw, *data):
+        """Rysuje wykres `name` funkcją draw(plt, *data), chyba że dane i plik są aktualne. Zwraca True, gdy rysował."""
+        filename = os.path.join(self.output_dir, f'{name}.png')
+        digest = _digest(name, *data)
+        if not self.force and self.digests.get(name) == digest and os.path.exists(filename):
+            return False
+        plt = _pyplot()
+        fig = draw(plt, *data)
+        fig.savefig(filename)
+        plt.close(fig)
+        self.digests[name] = digest
+        with open(self.path, 'w') as file:
+            json.dump(self.digests, file, indent=2)
+        return True
+
+
+def _class_rgba(car_classes):
+    # One RGBA row per item; much faster for matplotlib than a list of color names
+    from matplotlib.colors import to_rgba
+    palette = np.zeros((max(CLASS_COLORS) + 1, 4))
+    for value, color in CLASS_COLORS.items():
+        palette[value] = to_rgba(color)
+    return palette[np.asarray(car_classes, dtype=int)]
+
+
+def draw_queue_status(plt, times, stations, lengths, width=QUEUE_BIN_HOURS):
+    """Rysuje wykres słupkowy z nałożonymi na siebie wartościami (stacked bar chart).
+
+    times to początki przedziałów o szerokości `width`, lengths - średnie długości kolejek w przedziałach.
+    """
+    fig, ax = plt.subplots(figsize=(10, 6))
+    if len(times) <= MAX_BARS:
+        # Rysowanie wykresu jako stos słupków
+        bottom = np.zeros(len(times))  # Początkowe wartości do nałożenia warstw
+        for system, color, data in zip(stations, QUEUE_COLORS, lengths):
+            ax.bar(times, data, width=0.8 * width, align='edge', bottom=bottom, color=color, label=system)
+            bottom += data  # Aktualizujemy dolną część dla następnej warstwy
+        if len(times) <= 50:
+            ax.set_xticks(times)
+    else:
+        ax.stackplot(times, lengths, labels=stations, colors=QUEUE_COLORS, step='post')
+    ax.set_xlabel("Hour")
+    ax.set_ylabel("Mean Number of Waiting Cars")
+    ax.set_title("Queue Length Over Time")
+    ax.legend()
+    return fig
+
+
+def draw_time_in_system(plt, car_ids, times_spent, car_classes):
+    from matplotlib.patches import Patch
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    colors = _class_rgba(car_classes)
+    if len(car_ids) <= MAX_BARS:
+        ax.bar(car_ids, times_spent, color=colors)
+        if len(car_ids) <= 50:
+            ax.set_xticks(car_ids)  # Set x-ticks to be the car IDs
+    else:
+        # One pixel-marker line per class draws hundreds of thousands of cars in about a second
+        for value, color in CLASS_COLORS.items():
+            mask = car_classes == value
+            ax.plot(car_ids[mask], times_spent[mask], ',', color=color)
+    ax.set_xlabel('Car ID')
+    ax.set_ylabel('Time spent in system (hours)')
+    ax.set_title('Time spent by each car in the system')
+    ax.grid(axis='y')
+
+    # Create legend elements
+    legend_elements = [
+        Patch(facecolor='red', label='Red class'),
+        Patch(facecolor='orange', label='Orange class'),
+        Patch(facecolor='green', label='Green class')
+    ]
+    ax.legend(handles=legend_elements, title="Car original class")
+    return fig
+
+
+def draw_mechanic_schedule(plt, rows, starts, ends, car_classes, car_ids, mechanic_names):
+    from matplotlib.collections import LineCollection
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    # All repairs go into one LineCollection, which stays fast for 100k+ intervals
+    segments = np.stack([np.column_stack([starts, rows]), np.column_stack([ends, rows])], axis=1)
+    colors = _class_rgba(car_classes)
+    ax.add_collection(LineCollection(segments, colors=colors, linewidths=10, capstyle='butt'))
+    if len(car_ids) <= MAX_LABELLED_BARS:
+        # Add the car_id as a small number next to the bar
+        for row, start, end, car_id in zip(rows, starts, ends, car_ids):
+            ax.text((start + end) / 2, row, str(car_id), color="black", ha="center", va="center", fontsize=8)
+
+    ax.set_xlim(0, ends.max() if len(ends) else 1)
+    ax.set_ylim(-0.5, len(mechanic_names) - 0.5)
+    ax.set_yticks(range(len(mechanic_names)))
+    ax.set_yticklabels(mechanic_names)
+    ax.set_xlabel("Time (hours)")
+    ax.set_title("Mechanic schedule")
+    ax.grid()
+    fig.tight_layout()
+    return fig
+
+
+def draw_class_mean_time(plt, class_names, mean_times):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.bar(class_names, mean_times, color=['red', 'orange', 'green', 'pink'], edgecolor='black')
+    ax.set_xlabel('Class')
+    ax.set_ylabel('Mean Time (Hours)')
+    ax.set_title('Mean Time Spent By Each Class In The Network')
+    ax.grid(axis='y')
+    return fig
+
+
+def render_report(results, output_dir='report', force=False, queue_bin_hours=QUEUE_BIN_HOURS):
+    """Zapisuje wszystkie wykresy dla wyników (results.load_results albo ResultsWriter.tables()) do output_dir.
+
+    Długości kolejek są zapisane jako dokładna funkcja schodkowa; wykres pokazuje ich średnie
+    w przedziałach po `queue_bin_hours` godzin.
+    """
+    metadata = results['metadata']
+    start, end = metadata['simulation_start_time'], metadata['simulation_end_time']
+    cache = FigureCache(output_dir, force)
+    drawn = []
+
+    changes = results['queue_changes']
+    stations = metadata['stations']
+    station_codes = np.asarray(changes['station'])
+    change_times, change_lengths = np.asarray(changes['time']), np.asarray(changes['length'])
+    edges = start + queue_bin_hours * np.arange(int(np.ceil((end - start) / queue_bin_hours)) + 1)
+    lengths = np.array([resample(change_times[station_codes == code], change_lengths[station_codes == code], edges)
+                        for code in range(len(stations))])
+    if cache.render('queue_status', draw_queue_status, edges[:-1], stations, lengths, queue_bin_hours):
+        drawn.append('queue_status')
+
+    cars = results['cars']
+    arrival, car_end = np.asarray(cars['arrival']), np.asarray(cars['end'])
+    destroyed, car_class = np.asarray(cars['destroyed']), np.asarray(cars['object_class'])
+    original_class = np.asarray(cars['original_class'])
+    delta_times = car_end - arrival
+    unfinished = np.isnan(delta_times) & (car_class != ObjectClass.PINK.value) & ~destroyed
+    times_spent = np.select([(delta_times > 0) & ~destroyed, unfinished], [delta_times, end - arrival], 0)
+    if cache.render('time_in_system', draw_time_in_system, np.asarray(cars['id']), times_spent, original_class):
+        drawn.append('time_in_system')
+
+    visits = results['visits']
+    mechanics = metadata['mechanics']
+    mechanic_rows = np.zeros(max(mechanic['id'] for mechanic in mechanics) + 1, dtype=int)
+    for row, mechanic in enumerate(mechanics):
+        mechanic_rows[mechanic['id']] = row
+    if cache.render('mechanic_schedule', draw_mechanic_schedule, mechanic_rows[np.asarray(visits['mechanic_id'])],
+                    np.asarray(visits['start']) - start, np.asarray(visits['end']) - start,
+                    np.asarray(visits['object_class']), np.asarray(visits['car_id']),
+                    [mechanic['name'] for mechanic in mechanics]):
+        drawn.append('mechanic_schedule')
+
+    # Średni czas przebywania klas w sieci
+    finished = delta_times > 0
+    mean_times = np.array([delta_times[finished & (original_class == cls.value)].mean()
+                           if np.any(finished & (original_class == cls.value)) else 0 for cls in ObjectClass])
+    if cache.render('class_mean_time', draw_class_mean_time, [str(cls) for cls in ObjectClass], mean_times):
+        drawn.append('class_mean_time')
+    return drawn
+
+
+if __name__ == '__main__':
+    from .results import load_results
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m projekt2.report RESULTS_DIR [OUTPUT_DIR]")
+    drawn = render_report(load_results(sys.argv[1]), sys.argv[2] if len(sys.argv) > 2 else 'report')
+    print(f"Drawn: {', '.join(drawn) if drawn else 'nothing, figures are up to date'}")
@@ -0,0 +1,183 @@
+"""Kolumnowe wyniki symulacji: tabele samochodów, wizyt u mechaników i zmian długości kolejek.
+
+Wyniki są dopisywane paczkami (chunk) - w pamięci albo do katalogu, w którym każda kolumna to osobny
+plik binarny. Taki katalog można potem otworzyć leniwie przez np.memmap, bez budowania obiektów Pythona.
+"""
+import json
+import os
+
+import numpy as np
+
+TABLES = {
+    'cars': np.dtype([
+        ('id', np.int32), ('priority', np.int8), ('original_class', np.int8), ('object_class', np.int8),
+        ('arrival', np.float64), ('start', np.float64), ('repair_end', np.float64), ('end', np.float64),
+        ('destroyed', np.bool_), ('route_length', np.int8),
+    ]),
+    'visits': np.dtype([
+        ('car_id', np.int32), ('mechanic_id', np.int16), ('station', np.int8), ('priority', np.int8),
+        ('object_class', np.int8), ('queue_time', np.float64), ('start', np.float64), ('end', np.float64),
+    ]),
+    # One row per put/get (and one per station at the start of a day): length holds from time until the next row
+    'queue_changes': np.dtype([('time', np.float64), ('station', np.int8), ('length', np.int32)]),
+}
+
+
+class ResultsWriter:
+    """Zbiera wiersze tabel w buforach po `chunk_rows`; pełny bufor trafia na dysk (albo do listy paczek)."""
+
+    def __init__(self, path=None, chunk_rows=1 << 20, metadata=None):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.metadata = metadata or {}
+        self.buffers = {table: np.empty(chunk_rows, dtype) for table, dtype in TABLES.items()}
+        self.counts = dict.fromkeys(TABLES, 0)
+        self.rows = dict.fromkeys(TABLES, 0)  # rows already flushed
+        self.chunks = {table: [] for table in TABLES}  # in-memory mode only
+        if path is not None:
+            for table in TABLES:
+                os.makedirs(os.path.join(path, table), exist_ok=True)
+                for column in TABLES[table].names:
+                    open(self._column_path(table, column), 'wb').close()
+
+    def _column_path(self, table, column):
+        return os.path.join(self.path, table, f'{column}.bin')
+
+    def append_row(self, table, row):
+        count = self.counts[table]
+        self.buffers[table][count] = row
+        self.counts[table] = count + 1
+        if count + 1 == self.chunk_rows:
+            self.flush(table)
+
+    def append(self, table, records):
+        # Bulk append of a structured array with the table's dtype
+        for i in range(0, len(records), self.chunk_rows):
+            part = records[i:i + self.chunk_rows]
+            self.flush(table)
+            self._write(table, part)
+
+    def flush(self, table):
+        count = self.counts[table]
+        if count:
+            self._write(table, self.buffers[table][:count])
+            self.counts[table] = 0
+
+    def _write(self, table, records):
+        if self.path is None:
+            self.chunks[table].append(records.copy())
+        else:
+            # Column files are appended chunk by chunk, so each one can be memory-mapped later
+            for column in records.dtype.names:
+                with open(self._column_path(table, column), 'ab') as file:
+                    np.ascontiguousarray(records[column]).tofile(file)
+        self.rows[table] += len(records)
+
+    def table(self, table):
+        """Cała tabela jako słownik kolumn (z dysku przez memmap, w pamięci jako tablice)."""
+        self.flush(table)
+        if self.path is None:
+            records = np.concatenate(self.chunks[table]) if self.chunks[table] else np.empty(0, TABLES[table])
+            self.chunks[table] = [records]
+            return {column: records[column] for column in records.dtype.names}
+        return load_results(self.path, manifest=self._manifest())[table]
+
+    def tables(self):
+        # Same layout as load_results: {table: columns, 'metadata': metadata}
+        tables = {table: self.table(table) for table in TABLES}
+        tables['metadata'] = self.metadata
+        return tables
+
+    def __getstate__(self):
+        # Only the filled part of the buffers is pickled (see garage.Garage.save)
+        state = self.__dict__.copy()
+        state['buffers'] = {table: self.buffers[table][:count].copy() for table, count in self.counts.items()}
+        return state
+
+    def __setstate__(self, state):
+        buffers = state['buffers']
+        self.__dict__.update(state)
+        self.buffers = {table: np.empty(self.chunk_rows, dtype) for table, dtype in TABLES.items()}
+        for table, records in buffers.items():
+            self.buffers[table][:len(records)] = records
+        if self.path is not None:
+            # Rows written after the snapshot was taken are dropped, so a restored run appends where it left off
+            for table, dtype in TABLES.items():
+                for column in dtype.names:
+                    with open(self._column_path(table, column), 'r+b') as file:
+                        file.truncate(self.rows[table] * dtype[column].itemsize)
+
+    def _manifest(self):
+        return {
+            'metadata': self.metadata,
+            'tables': {table: {'rows': self.rows[table], 'columns': {column: dtype.str for column, (dtype, _) in TABLES[table].fields.items()}}
+                       for table in TABLES},
+        }
+
+    def close(self):
+        for table in TABLES:
+            self.flush(table)
+        if self.path is not None:
+            with open(os.path.join(self.path, 'manifest.json'), 'w') as file:
+                json.dump(self._manifest(), file, indent=2)
+
+
+class LazyTable:
+    """Kolumny tabeli otwierane jako np.memmap dopiero przy pierwszym dostępie."""
+
+    def __init__(self, path, rows, columns):
+        self.path = path
+        self.rows = rows
+        self.dtypes = {column: np.dtype(dtype) for column, dtype in columns.items()}
+        self._columns = {}
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.dtypes)
+
+    def keys(self):
+        return self.dtypes.keys()
+
+    def __getitem__(self, column):
+        if column not in self._columns:
+            if self.rows == 0:
+                self._columns[column] = np.empty(0, self.dtypes[column])
+            else:
+                self._columns[column] = np.memmap(os.path.join(self.path, f'{column}.bin'), dtype=self.dtypes[column],
+                                                  mode='r', shape=(self.rows,))
+        return self._columns[column]
+
+
+def load_results(path, manifest=None):
+    """Otwiera katalog z wynikami; zwraca {tabela: LazyTable} z metadanymi w kluczu 'metadata'."""
+    if manifest is None:
+        with open(os.path.join(path, 'manifest.json')) as file:
+            manifest = json.load(file)
+    results = {table: LazyTable(os.path.join(path, table), info['rows'], info['columns'])
+               for table, info in manifest['tables'].items()}
+    results['metadata'] = manifest.get('metadata', {})
+    return results
+
+
+def export_npz(path, output):
+    # Single-file copy of a results directory (loads every column once)
+    results = load_results(path)
+    np.savez(output, **{f'{table}.{column}': np.asarray(results[table][column])
+                        for table in TABLES for column in results[table]})
+
+
+def export_parquet(path, directory):
+    # One Parquet file per table, needs the optional pyarrow dependency
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow)") from None
+    results = load_results(path)
+    os.makedirs(directory, exist_ok=True)
+    for table in TABLES:
+        columns = results[table]
+        pq.write_table(pa.table({column: np.asarray(columns[column]) for column in columns}),
+                       os.path.join(directory, f'{table}.parquet'))
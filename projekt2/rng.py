@@ -0,0 +1,31 @@
+"""Niezależne strumienie liczb losowych (numpy.random.Generator) wyprowadzone z jednego ziarna scenariusza.
+
+Każde źródło losowości ma własny strumień, więc kolejność, w jakiej asyncio budzi zadania, nie zmienia
+wylosowanych wartości. Ta sama wartość ziarna daje identyczny przebieg, a dwa scenariusze uruchomione
+z tym samym ziarnem dostają wspólne liczby losowe (common random numbers).
+"""
+import numpy as np
+
+STREAMS = ['arrivals', 'classes', 'priorities', 'service', 'parking']
+
+
+class RandomStreams:
+    """Strumienie: arrivals (odstępy przyjazdów), classes, priorities, service (czasy napraw),
+    parking (czas obsługi na parkingu) i routing[miejsce] - osobny dla parkingu i każdego stanowiska."""
+
+    def __init__(self, seed=None, stations=()):
+        # seed may be an int or a SeedSequence (e.g. one spawned per replication batch)
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.stations = ['parking', *stations]
+        children = self.seed_sequence.spawn(len(STREAMS) + len(self.stations))
+        for name, child in zip(STREAMS, children):
+            setattr(self, name, np.random.default_rng(child))
+        self.routing = {station: np.random.default_rng(child)
+                        for station, child in zip(self.stations, children[len(STREAMS):])}
+
+    @property
+    def seed(self):
+        return self.seed_sequence.entropy
+
+    def __repr__(self):
+        return f"RandomStreams(seed={self.seed}, stations={self.stations[1:]})"
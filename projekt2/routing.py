@@ -0,0 +1,154 @@
+"""Tablica tras: dla każdej pary (miejsce, klasa) rozkład następnego kroku samochodu.
+
+Każdy krok losowany jest jedną liczbą u z [0, 1) odwróconą przez dystrybuantę wiersza tablicy.
+Tablicę można wczytać z pliku JSON w tym samym formacie co DEFAULT_ROUTING:
+
+    {"parking": {"RED": {"destroyed": 0.2, "warsztat": 0.8}, ...}, "warsztat": {...}, ...}
+
+Pary, których nie ma w tablicy, kończą naprawę samochodu (finished). Każda naprawa obniża klasę o jeden
+(klasy w kolejności `classes`, ostatnia bez napraw), więc tablica, która może wysłać samochód na stanowisko
+po ostatnim etapie naprawy albo dalej niż max_route stanowisk, jest odrzucana.
+"""
+import json
+import sys
+from bisect import bisect_right
+
+import numpy as np
+
+PARKING = 'parking'
+FINISHED, DESTROYED, LEFT = 'finished', 'destroyed', 'left'  # terminal outcomes, after the stations
+
+# Next hop of a car by where it is and the class it had when it got there (before the repair)
+DEFAULT_ROUTING = {
+    'parking': {
+        'RED': {'destroyed': 0.2, 'warsztat': 0.8},
+        'ORANGE': {'warsztat': 0.5, 'elektromechanik': 0.2, 'wulkanizator': 0.2, 'lakiernik': 0.1},
+        'GREEN': {'warsztat': 0.3, 'elektromechanik': 0.25, 'wulkanizator': 0.15, 'lakiernik': 0.25, 'tapicer': 0.05},
+        'PINK': {'left': 1.0},
+    },
+    'warsztat': {
+        'RED': {'lakiernik': 0.4, 'elektromechanik': 0.3, 'wulkanizator': 0.3},
+        'ORANGE': {'elektromechanik': 0.5, 'wulkanizator': 0.5},
+    },
+    'lakiernik': {
+        'ORANGE': {'tapicer': 1.0},
+    },
+    'elektromechanik': {
+        'ORANGE': {'wulkanizator': 0.5, 'lakiernik': 0.4, 'tapicer': 0.1},
+    },
+    'wulkanizator': {
+        'ORANGE': {'lakiernik': 0.7, 'tapicer': 0.3},
+    },
+}
+
+
+class RoutingTable:
+    """Tablica skumulowanych prawdopodobieństw (miejsce, klasa) -> następny krok.
+
+    Miejsca mają kody 0..S-1 (stanowiska w kolejności `stations`) i S (parking), klasy 0..C-1.
+    Wyniki mają kody 0..S-1 (stanowiska), potem FINISHED, DESTROYED i LEFT.
+    """
+
+    def __init__(self, routing, stations, classes, max_route=None):
+        self.routing = routing
+        self.stations = list(stations)
+        self.classes = list(classes)
+        self.locations = self.stations + [PARKING]
+        self.outcomes = self.stations + [FINISHED, DESTROYED, LEFT]
+        outcome_codes = {name: code for code, name in enumerate(self.outcomes)}
+
+        probabilities = np.zeros((len(self.locations), len(self.classes), len(self.outcomes)))
+        probabilities[:, :, outcome_codes[FINISHED]] = 1.0
+        for location, rows in routing.items():
+            if location not in self.locations:
+                raise ValueError(f"Unknown routing location {location!r}")
+            for class_name, hops in rows.items():
+                if class_name not in self.classes:
+                    raise ValueError(f"Unknown class {class_name!r} in routing of {location!r}")
+                unknown = set(hops) - set(outcome_codes)
+                if unknown:
+                    raise ValueError(f"Unknown next hop {sorted(unknown)} in routing of {location!r}, {class_name}")
+                if abs(sum(hops.values()) - 1) > 1e-9 or min(hops.values()) < 0:
+                    raise ValueError(f"Routing of {location!r}, {class_name} does not sum to 1: {hops}")
+                row = probabilities[self.locations.index(location), self.classes.index(class_name)]
+                row[:] = 0.0
+                for name, probability in hops.items():
+                    row[outcome_codes[name]] = probability
+        self.probabilities = probabilities
+        self.cumulative = np.cumsum(probabilities, axis=2)
+        self._check_routes(max_route)
+
+        # Per-hop lookup for the asyncio engine: thresholds and outcome names of the non-zero entries
+        self._rows = {}
+        for location_code, location in enumerate(self.locations):
+            for class_code in range(len(self.classes)):
+                nonzero = np.nonzero(probabilities[location_code, class_code])[0]
+                thresholds = list(self.cumulative[location_code, class_code, nonzero[:-1]])
+                self._rows[location, class_code] = (thresholds, [self.outcomes[code] for code in nonzero])
+
+    def _check_routes(self, max_route):
+        # Follow every car class from the parking: a car arrives at its n-th station with its class lowered n - 1 times
+        # and needs a repair stage left there, the last class has none
+        last = len(self.classes) - 1
+        parking = self.locations.index(PARKING)
+        for start in range(len(self.classes)):
+            paths = {station: [PARKING, self.stations[station]]
+                     for station in np.nonzero(self.probabilities[parking, start, :len(self.stations)])[0]}
+            class_code = start
+            while paths:
+                path = next(iter(paths.values()))
+                if class_code == last:
+                    raise ValueError(f"Routing sends {self.classes[start]} cars past their last repair stage: "
+                                     f"{' -> '.join(path)}")
+                if max_route is not None and len(path) - 1 > max_route:
+                    raise ValueError(f"Routing sends {self.classes[start]} cars through more than {max_route} stations: "
+                                     f"{' -> '.join(path)}")
+                paths = {hop: [*path, self.stations[hop]] for station, path in paths.items()
+                         for hop in np.nonzero(self.probabilities[station, class_code, :len(self.stations)])[0]}
+                class_code += 1
+
+    def next_hop(self, location, class_code, u):
+        """Następny krok (nazwa stanowiska albo finished/destroyed/left) dla jednej liczby u z [0, 1)."""
+        thresholds, names = self._rows[location, class_code]
+        return names[bisect_right(thresholds, u)]
+
+    def sample(self, u, location_codes, class_codes):
+        # Batched next_hop on codes: one uniform per hop, inverted through the cumulative table
+        cumulative = self.cumulative[location_codes, class_codes]
+        return (u[:, None] >= cumulative).sum(axis=1).clip(max=len(self.outcomes) - 1)
+
+    def matrix(self):
+        # Effective probabilities as {(location, class): {outcome: probability}}, zero entries left out
+        return {(location, class_name): {outcome: float(p) for outcome, p in zip(self.outcomes, row) if p > 0}
+                for location, rows in zip(self.locations, self.probabilities)
+                for class_name, row in zip(self.classes, rows)}
+
+    def report(self):
+        header = f"{'from':<16} {'class':<7}" + ''.join(f"{name[:11]:>12}" for name in self.outcomes)
+        lines = [header]
+        for location_code, location in enumerate(self.locations):
+            for class_code, class_name in enumerate(self.classes):
+                row = self.probabilities[location_code, class_code]
+                lines.append(f"{location:<16} {class_name:<7}" + ''.join(f"{p:12.3f}" if p > 0 else f"{'.':>12}" for p in row))
+        return '\n'.join(lines)
+
+    def save(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.routing, file, indent=2)
+
+
+def load_routing(path, stations, classes, max_route=None):
+    with open(path) as file:
+        return RoutingTable(json.load(file), stations, classes, max_route)
+
+
+if __name__ == '__main__':
+    from .carstore import CarStore
+    from .main import STATIONS, ObjectClass
+
+    class_names = [object_class.name for object_class in ObjectClass]
+    if len(sys.argv) > 1:
+        table = load_routing(sys.argv[1], STATIONS, class_names, CarStore.MAX_ROUTE)
+    else:
+        table = RoutingTable(DEFAULT_ROUTING, STATIONS, class_names, CarStore.MAX_ROUTE)
+    print(table.report())
@@ -0,0 +1,253 @@
+"""Stanowiska z pulą mechaników, bez osobnej korutyny dla każdego mechanika.
+
+Station ma własną kolejkę priorytetową i k mechaników, każdy z własną wydajnością i zmianą. Wszystkie
+zdarzenia stanowiska - początek i koniec zmiany, koniec naprawy, koniec przerwy - leżą w jednym kopcu,
+a w pętli zdarzeń czeka tylko jeden timer (loop.call_at) na najbliższe z nich. Dzięki temu warsztat
+z setkami mechaników nie ma setek zadań budzonych przez pętlę. Dokąd samochód jedzie po naprawie,
+stanowisko bierze z tablicy tras (links - stanowiska, do których trasa z niego w ogóle prowadzi).
+
+Mechanik zachowuje się jak dotąd:
+
+- bierze samochód wybrany przez politykę kolejki (domyślnie o najwyższym priorytecie, patrz policies.py),
+  gdy jest wolny (najdłużej czekający wolny mechanik pierwszy),
+- odmawia naprawy, gdy tak każe polityka (domyślnie ponad godzinę po końcu zmiany) - takie samochody wracają
+  do kolejki, gdy mechanik kończy zmianę; krótsze nadgodziny bierze,
+- po każdej naprawie ma 0.1 h przerwy, dopiero potem odsyła samochód dalej.
+"""
+import asyncio
+import heapq
+from collections import deque
+from itertools import count
+
+from .clock import now
+from .events import event_log, EventType
+from .main import ObjectClass, PriorityQueue
+from .routing import FINISHED, DESTROYED, LEFT
+
+BREAK = 0.1  # hours a mechanic rests after every repair, before routing the car
+EPSILON = 1e-9  # the virtual clock can stop an ulp short of a timer
+
+# Event kinds in the station heap; at equal times they are handled in the order they were scheduled
+SHIFT_START, REPAIR_END, BREAK_END, SHIFT_END = range(4)
+
+
+class Mechanic:
+    """Mechanik stanowiska - parametry ze składu i liczniki; jego pracę prowadzi Station."""
+
+    def __init__(self, id, efficiency, work_hours, name):
+        self.id = id
+        self.efficiency = efficiency
+        self.work_hours = work_hours  # hours left in the shift, negative after overtime
+        self.shift_hours = work_hours
+        self.name = name
+        self.station = None  # name of the station queue, set by Station.add
+        self.end_time = None  # time the shift ends, set when it starts
+        self.busy = False
+        self.refused = []  # cars the mechanic would not start, they go back to the queue at the end of the shift
+        self.total_repairs = 0
+        self.spent_times = []  # with trace: one tuple per repair
+        self.car_routes = []  # with trace: indices of cars finished by this mechanic (routes are kept in the car store)
+
+
+class Station:
+    """Kolejka jednego stanowiska i jego mechanicy, obsługiwani z jednego kopca zdarzeń."""
+
+    def __init__(self, location, queue, routing, streams, results=None, stats=None, trace=False):
+        self.location = location  # name in the routing table, e.g. 'warsztat'
+        self.queue = queue
+        self.name = queue.name
+        self.routing = routing
+        self.random = streams.routing[location].random
+        self.results = results
+        self.stats = stats
+        self.trace = trace
+        self.links = {}  # next hop name -> Station, set by StationNetwork
+        self.mechanics = []
+        self.idle = deque()  # free mechanics, the one waiting longest first
+        self.network = None
+        self._events = []  # heap of (time, sequence, kind, mechanic, car)
+        self._sequence = count()
+        self._timer = None
+        self._handling = False  # inside _on_timer, which sets the next timer itself
+        self._dispatch_pending = False
+
+    def add(self, mechanic, start):
+        mechanic.station = self.name
+        self.mechanics.append(mechanic)
+        self._schedule(start, SHIFT_START, mechanic)
+
+    # Queue interface used by Parking and enqueue_car
+    async def put(self, car):
+        self.put_nowait(car)
+
+    def put_nowait(self, car):
+        self.queue.put_nowait(car)
+        if self.idle and not self._dispatch_pending:
+            # Like a waiting queue.get(): the free mechanic takes a car on the next loop iteration,
+            # after the caller has stamped the car's queue entry time
+            self._dispatch_pending = True
+            asyncio.get_running_loop().call_soon(self._dispatch)
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def enqueue(self, car):
+        # Same as main.enqueue_car, for cars sent on by a mechanic of another station
+        car.queue_entry_time = now()
+        self.put_nowait(car)
+        car.add_to_route(self.name)
+        if event_log.enabled:
+            event_log.emit(EventType.ENQUEUED, car, self.name)
+
+    def _schedule(self, time, kind, mechanic, car=None):
+        heapq.heappush(self._events, (time, next(self._sequence), kind, mechanic, car))
+        if self._handling:
+            return
+        if self._timer is None or time < self._timer.when():
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = asyncio.get_running_loop().call_at(time, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._handling = True
+        events = self._events
+        while events and events[0][0] <= now() + EPSILON:
+            _, _, kind, mechanic, car = heapq.heappop(events)
+            if kind == SHIFT_START:
+                mechanic.end_time = now() + mechanic.work_hours
+                if mechanic.work_hours > 0:
+                    self._schedule(mechanic.end_time, SHIFT_END, mechanic)
+                    self._next_car(mechanic)
+                else:
+                    self._end_shift(mechanic)
+            elif kind == REPAIR_END:
+                self._finish_repair(mechanic, car)
+                self._schedule(now() + BREAK, BREAK_END, mechanic, car)
+            elif kind == BREAK_END:
+                mechanic.busy = False
+                self._route(mechanic, car)
+                if now() < mechanic.end_time:
+                    self._next_car(mechanic)
+                else:
+                    self._end_shift(mechanic)
+            elif not mechanic.busy and mechanic.end_time is not None:  # SHIFT_END of a free mechanic
+                self.idle.remove(mechanic)
+                self._end_shift(mechanic)
+        self._handling = False
+        if events:
+            self._timer = asyncio.get_running_loop().call_at(events[0][0], self._on_timer)
+
+    def _dispatch(self):
+        self._dispatch_pending = False
+        while self.idle and self.queue.qsize():
+            self._next_car(self.idle.popleft())
+
+    def _next_car(self, mechanic):
+        # Takes the next car the mechanic can finish in time, or leaves them waiting for one
+        while self.queue.qsize():
+            car = self.queue.get_for(mechanic)
+            repair_time = car.next_repair_time / mechanic.efficiency
+            left = mechanic.end_time - now() - repair_time
+            if self.queue.policy.refuse(car, mechanic, left):
+                if event_log.enabled:
+                    event_log.emit(EventType.REFUSED, car, self.name, mechanic.name, -left)
+                mechanic.refused.append(car)
+                continue
+            if left < 0 and event_log.enabled:
+                event_log.emit(EventType.OVERTIME, car, self.name, mechanic.name, -left)
+            mechanic.busy = True
+            car.set_queue_duration()
+            if event_log.enabled:
+                event_log.emit(EventType.REPAIR_STARTED, car, self.name, mechanic.name, repair_time)
+            self._schedule(now() + repair_time, REPAIR_END, mechanic, car)
+            return
+        self.idle.append(mechanic)
+
+    def _finish_repair(self, mechanic, car):
+        car.set_repair_end_time()
+        if self.results is not None:
+            self.results.append_row('visits', (car.id, mechanic.id, self.queue.code, car.priority, car.object_class.value,
+                                               car.repair_start_time - car.queue_entry_time, car.repair_start_time, car.repair_end_time))
+        if self.trace:
+            mechanic.spent_times.append((car.id, car.spent_time, car.priority, car.repair_start_time, car.repair_end_time, car.object_class))
+        repair_time = car.pop_repair_time() / mechanic.efficiency
+        if self.stats is not None:
+            self.stats.record_repair(mechanic.id, self.name, car.object_class, car.priority,
+                                     car.repair_start_time - car.queue_entry_time, repair_time)
+        if event_log.enabled:
+            event_log.emit(EventType.REPAIR_FINISHED, car, self.name, mechanic.name, repair_time)
+        mechanic.total_repairs += 1
+
+    def _route(self, mechanic, car):
+        hop = self.routing.next_hop(self.location, car.object_class.value - 1, self.random())
+        if hop == FINISHED or hop == LEFT:
+            car.set_end_time()
+            car.object_class = ObjectClass.PINK
+            if event_log.enabled:
+                event_log.emit(EventType.REPAIRED, car, self.name, mechanic.name)
+            if self.stats is not None:
+                self.stats.record_finished(car.original_class, car.priority, car.delta_time)
+            if self.trace:
+                mechanic.car_routes.append(car.index)
+        elif hop == DESTROYED:
+            car.destroyed = True
+            if event_log.enabled:
+                event_log.emit(EventType.DESTROYED, car, self.name, mechanic.name)
+        else:
+            # Every repair moves the car one class down (RED -> ORANGE -> GREEN)
+            car.object_class = ObjectClass(min(car.object_class.value + 1, ObjectClass.PINK.value))
+            self.links[hop].enqueue(car)
+
+    def _end_shift(self, mechanic):
+        mechanic.work_hours = mechanic.end_time - now()
+        refused, mechanic.refused = mechanic.refused, []
+        for car in refused:
+            self.put_nowait(car)  # waits for another mechanic or the next day
+        if event_log.enabled:
+            event_log.emit(EventType.SHIFT_END, station=self.name, mechanic=mechanic.name, value=mechanic.total_repairs)
+        self.network.shift_ended()
+
+
+class StationNetwork:
+    """Stanowiska z tablicy tras połączone według niej; queues to kolejki stanowisk (np. z make_station_queues),
+    brakujące są tworzone. wait() kończy się, gdy wszyscy mechanicy skończą zmianę."""
+
+    def __init__(self, routing, streams, queues=None, results=None, stats=None, trace=False, policy=None):
+        queues = queues or {}
+        self.stations = {}
+        for code, location in enumerate(routing.stations):
+            queue = queues.get(f'{location}_queue')
+            if queue is None:
+                queue = PriorityQueue(location.capitalize(), code=code, stats=stats, results=results, policy=policy)
+            self.stations[location] = Station(location, queue, routing, streams, results, stats, trace)
+        for station in self.stations.values():
+            # Links from the routing table: every station some class can be sent to from this one
+            reachable = routing.probabilities[routing.locations.index(station.location), :, :len(routing.stations)].any(axis=0)
+            station.links = {location: self.stations[location] for location, linked in zip(routing.stations, reachable) if linked}
+            station.network = self
+        self.working = 0
+        self._done = None
+
+    @property
+    def queues(self):
+        # Stations by queue key, as Parking.work expects them
+        return {f'{location}_queue': station for location, station in self.stations.items()}
+
+    def add_mechanic(self, entry, day_start=None):
+        """Dodaje mechanika z wpisu składu (format DEFAULT_ROSTER, opcjonalne 'start' w godzinach od początku dnia)."""
+        mechanic = Mechanic(id=entry['id'], efficiency=entry['efficiency'], work_hours=entry['work_hours'], name=entry['name'])
+        start = (now() if day_start is None else day_start) + entry.get('start', 0)
+        self.stations[entry['station']].add(mechanic, start)
+        self.working += 1
+        return mechanic
+
+    def shift_ended(self):
+        self.working -= 1
+        if not self.working and self._done is not None and not self._done.done():
+            self._done.set_result(None)
+
+    async def wait(self):
+        if self.working:
+            self._done = asyncio.get_running_loop().create_future()
+            await self._done
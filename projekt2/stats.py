@@ -0,0 +1,254 @@
+"""Statystyki liczone w locie, bez przechowywania każdej naprawy: pamięć zależy tylko od liczby
+stanowisk, klas, priorytetów i mechaników, a nie od długości symulacji.
+
+- Welford - średnia i wariancja (z łączeniem wyników, np. z kilku replikacji),
+- P2Quantile - kwantyl algorytmem P² (Jain i Chlamtac, 1985), pięć znaczników zamiast wszystkich próbek,
+- TimeWeighted - średnia ważona czasem wartości stałej między zmianami (np. długości kolejki),
+- resample - to samo dla zapisanej funkcji schodkowej, w przedziałach o dowolnej szerokości.
+"""
+from math import sqrt, nan
+
+import numpy as np
+
+
+class Welford:
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other):
+        # Chan et al. pairwise update, same result as adding the other samples one by one
+        count = self.count + other.count
+        if count:
+            delta = other.mean - self.mean
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+            self.mean += delta * other.count / count
+            self.count = count
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else nan
+
+    @property
+    def std(self):
+        return sqrt(self.variance) if self.count > 1 else nan
+
+
+class P2Quantile:
+    """Kwantyl rzędu p z pięciu znaczników (wysokości q, pozycje n, pozycje pożądane).
+
+    Pierwsze `buffer_size` próbek jest trzymanych dokładnie (stała pamięć), znaczniki startują z ich kwantyli -
+    przy krótkich przebiegach wynik jest dokładny, a później P² nie zaczyna od pięciu przypadkowych wartości.
+    """
+    __slots__ = ('p', 'buffer_size', 'q', 'n', 'desired', 'increments')
+
+    def __init__(self, p, buffer_size=64):
+        self.p = p
+        self.buffer_size = buffer_size
+        self.q = []  # the first samples, then the five marker heights
+        self.n = None  # marker positions, set once the buffer is full
+        self.desired = None
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def _start_markers(self):
+        q, p = sorted(self.q), self.p
+        last = len(q) - 1
+        self.desired = [0, last * p / 2, last * p, last * (1 + p) / 2, last]
+        n = [round(position) for position in self.desired]
+        for i in (1, 2, 3):  # positions must stay strictly increasing
+            n[i] = max(n[i], n[i - 1] + 1)
+        for i in (3, 2, 1):
+            n[i] = min(n[i], n[i + 1] - 1)
+        self.n = n
+        self.q = [q[position] for position in n]
+
+    def add(self, x):
+        if self.n is None:
+            self.q.append(x)
+            if len(self.q) > self.buffer_size:
+                self._start_markers()
+            return
+        q, n = self.q, self.n
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = self.desired
+        for i in range(5):
+            desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] += d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def value(self):
+        if self.n is not None:
+            return self.q[2]
+        if not self.q:
+            return nan
+        # Still buffering: exact quantile (linear interpolation, like np.quantile)
+        q = sorted(self.q)
+        position = (len(q) - 1) * self.p
+        low = int(position)
+        high = min(low + 1, len(q) - 1)
+        return q[low] + (q[high] - q[low]) * (position - low)
+
+
+class TimeWeighted:
+    """Średnia ważona czasem: wartość obowiązuje od momentu update() do następnej zmiany."""
+    __slots__ = ('start', 'last_time', 'value', 'area', 'max')
+
+    def __init__(self, start=0.0, value=0):
+        self.start = start
+        self.last_time = start
+        self.value = value
+        self.area = 0.0
+        self.max = value
+
+    def update(self, time, value):
+        self.area += self.value * (time - self.last_time)
+        self.last_time = time
+        self.value = value
+        if value > self.max:
+            self.max = value
+
+    def mean(self, time=None):
+        time = self.last_time if time is None else time
+        area = self.area + self.value * (time - self.last_time)
+        return area / (time - self.start) if time > self.start else nan
+
+
+def resample(times, values, edges):
+    """Średnie ważone czasem funkcji schodkowej w przedziałach [edges[i], edges[i + 1]).
+
+    values[i] obowiązuje od times[i] (posortowane) do times[i + 1], przed pierwszą zmianą wartość to 0.
+    Całka jest liczona dokładnie z sum skumulowanych, więc koszt to O(zmiany + przedziały).
+    """
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    edges = np.asarray(edges, dtype=float)
+    if not len(times):
+        return np.zeros(len(edges) - 1)
+    area = np.concatenate([[0.0], np.cumsum(values[:-1] * np.diff(times))])  # integral up to times[i]
+    step = np.searchsorted(times, edges, side='right') - 1  # last change at or before each edge
+    before = step < 0
+    step = step.clip(0)
+    integral = np.where(before, 0.0, area[step] + values[step] * (edges - times[step]))
+    return np.diff(integral) / np.diff(edges)
+
+
+class Accumulator:
+    """Welford (średnia, odchylenie) i kwantyl P² dla jednej wielkości."""
+    __slots__ = ('moments', 'quantile')
+
+    def __init__(self, p=0.95):
+        self.moments = Welford()
+        self.quantile = P2Quantile(p)
+
+    def add(self, x):
+        self.moments.add(x)
+        self.quantile.add(x)
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    def summary(self):
+        return {'count': self.moments.count, 'mean': self.moments.mean if self.moments.count else nan,
+                'std': self.moments.std, f'p{round(self.quantile.p * 100)}': self.quantile.value()}
+
+
+class SimulationStats:
+    """Statystyki symulacji aktualizowane przy każdej naprawie, zakończeniu samochodu i zmianie kolejki.
+
+    wait (czas w kolejce przed naprawą) jest liczony osobno dla stanowisk, klas i priorytetów,
+    repair dla stanowisk, time_in_system dla klas pierwotnych i priorytetów, queue_length dla stanowisk.
+    """
+
+    def __init__(self, quantile=0.95, start=0.0):
+        self.p = quantile
+        self.start = start  # time the queue length averages start from
+        self.wait = {'station': {}, 'class': {}, 'priority': {}}
+        self.repair = {}
+        self.time_in_system = {'class': {}, 'priority': {}}
+        self.queue_length = {}
+        self.busy = {}  # mechanic id -> hours spent repairing
+        self.repairs = {}  # mechanic id -> number of repairs
+
+    def _accumulator(self, table, key):
+        accumulator = table.get(key)
+        if accumulator is None:
+            accumulator = table[key] = Accumulator(self.p)
+        return accumulator
+
+    def record_repair(self, mechanic_id, station, object_class, priority, wait, repair_time):
+        self._accumulator(self.wait['station'], station).add(wait)
+        self._accumulator(self.wait['class'], object_class).add(wait)
+        self._accumulator(self.wait['priority'], priority).add(wait)
+        self._accumulator(self.repair, station).add(repair_time)
+        self.busy[mechanic_id] = self.busy.get(mechanic_id, 0.0) + repair_time
+        self.repairs[mechanic_id] = self.repairs.get(mechanic_id, 0) + 1
+
+    def record_finished(self, original_class, priority, time_in_system):
+        self._accumulator(self.time_in_system['class'], original_class).add(time_in_system)
+        self._accumulator(self.time_in_system['priority'], priority).add(time_in_system)
+
+    def queue_changed(self, station, time, length):
+        series = self.queue_length.get(station)
+        if series is None:
+            series = self.queue_length[station] = TimeWeighted(self.start, 0)
+        series.update(time, length)
+
+    def summary(self, time=None):
+        # Plain dictionaries, e.g. for printing or json
+        return {
+            'wait': {kind: {str(key): accumulator.summary() for key, accumulator in table.items()}
+                     for kind, table in self.wait.items()},
+            'repair': {str(key): accumulator.summary() for key, accumulator in self.repair.items()},
+            'time_in_system': {kind: {str(key): accumulator.summary() for key, accumulator in table.items()}
+                               for kind, table in self.time_in_system.items()},
+            'queue_length': {str(key): {'mean': series.mean(time), 'max': series.max}
+                             for key, series in self.queue_length.items()},
+            'busy': dict(self.busy),
+            'repairs': dict(self.repairs),
+        }
+
+    def report(self, time=None):
+        lines = [f"{'station':<16} {'repairs':>7} {'wait':>7} {'p95':>7} {'queue':>7} {'max':>4}"]
+        for station, accumulator in self.wait['station'].items():
+            series = self.queue_length.get(station)
+            queue = series.mean(time) if series is not None else nan
+            lines.append(f"{station:<16} {accumulator.count:7d} {accumulator.moments.mean:7.2f} {accumulator.quantile.value():7.2f} "
+                         f"{queue:7.2f} {series.max if series is not None else 0:4d}")
+        lines.append(f"{'class':<16} {'cars':>7} {'time':>7} {'p95':>7}")
+        for object_class, accumulator in self.time_in_system['class'].items():
+            lines.append(f"{str(object_class):<16} {accumulator.count:7d} {accumulator.moments.mean:7.2f} {accumulator.quantile.value():7.2f}")
+        return '\n'.join(lines)
@@ -0,0 +1,229 @@
+"""Zwektoryzowany symulator sieci pięciu stanowisk - wiele replikacji naraz na tablicach NumPy."""
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+
+from .carstore import CarStore
+from .main import STATIONS, ObjectClass, DEFAULT_ROSTER, ROUTING
+from .rng import RandomStreams
+from .replications import Scenario, REPORTED_CLASSES, collect_replications, confidence_interval, print_summary, process_pool
+
+PARKING = len(STATIONS)  # parking is routed from like a sixth station (RoutingTable location codes)
+RED, ORANGE, GREEN, PINK = (object_class.value - 1 for object_class in ObjectClass)
+
+DESTROYED = ROUTING.outcomes.index('destroyed')  # RoutingTable outcomes: stations, then finished/destroyed/left
+
+DAY_HOURS = 24.0  # the garage opens again this many hours after the start of the simulated day
+FAR = 1e18  # penalty that pushes masked-out entries past any simulated time
+
+
+def simulate_batch(replications, num_cars=15, roster=DEFAULT_ROSTER, streams=None, routing=ROUTING):
+    """Symuluje `replications` niezależnych dni jednocześnie; każdy krok obsługuje jedno zdarzenie w każdej replikacji."""
+    streams = streams if streams is not None else RandomStreams(stations=STATIONS)
+    R, N, M = replications, num_cars, len(roster)
+    rows = np.arange(R)
+
+    # Car arrays are laid out (car, replication): reductions over cars then run along long contiguous rows
+    # Cars: arrivals every exponential(1) hours, the parking serves them one by one in exponential(0.1)
+    arrival = np.zeros((N, R))
+    arrival[1:] = np.cumsum(streams.arrivals.exponential(1, (N - 1, R)), axis=0)
+    parking_service = streams.parking.exponential(0.1, (N, R))
+    parking_departure = np.empty((N, R))
+    free = np.zeros(R)
+    for i in range(N):
+        free = np.maximum(arrival[i], free) + parking_service[i]
+        parking_departure[i] = free
+
+    priority = streams.priorities.integers(0, 3, (N, R))
+    original_class = streams.classes.integers(0, len(ObjectClass), (N, R))
+    car_class = original_class.copy()
+    end_time = np.full((N, R), np.nan)
+
+    # Every car's service times and routing draws are fixed up front (a car visits each station at most once),
+    # so two rosters simulated from the same streams see the same cars - common random numbers
+    service_time = streams.service.exponential(2, (CarStore.MAX_STAGES, N, R))
+    routing_u = np.stack([streams.routing[station].random((N, R)) for station in STATIONS + ['parking']])
+
+    first_hop = routing.sample(routing_u[PARKING].ravel(), np.full(N * R, PARKING), original_class.ravel()).reshape(N, R)
+    destroyed = first_hop == DESTROYED
+    # queued[s, i, r] is the time car i entered the queue of station s, inf when it is not waiting there
+    queued = np.full((len(STATIONS), N, R), np.inf)
+    entering = np.nonzero(first_hop < len(STATIONS))
+    queued[first_hop[entering], entering[0], entering[1]] = parking_departure[entering]
+    priority_bonus = priority.T * 1e6  # (replication, car), subtracted so higher priority sorts first
+
+    # Mechanics: one server per roster entry, all starting at 0
+    server_station = np.array([STATIONS.index(entry['station']) for entry in roster])
+    efficiency = np.array([entry['efficiency'] for entry in roster], dtype=float)
+    shift_end = np.array([entry['work_hours'] for entry in roster], dtype=float)
+    free_at = np.zeros((M, R))
+    busy = np.zeros((M, R))
+    repairs = np.zeros(R, dtype=np.int64)
+
+    while True:
+        # Earliest waiting car per station, then the time each server can start its next repair
+        earliest = queued.min(axis=1)
+        start = np.maximum(free_at, earliest[server_station])
+        start[start >= shift_end[:, None]] = np.inf  # mechanics stop once their shift is over
+        now = start.min(axis=0)
+        live = np.isfinite(now)
+        if not live.any():
+            break
+
+        # Among servers ready at the same moment the one idle the longest takes the car (FIFO getters)
+        server = (free_at + (start != now) * FAR).argmin(axis=0)
+        station = server_station[server]
+
+        # Highest priority first, FIFO among equal priorities; masks are additive FAR penalties (branch-free)
+        waiting = queued[station, :, rows]
+        car = (waiting - priority_bonus + (waiting > now[:, None]) * FAR).argmin(axis=1)
+
+        r, car, server, station, now = (a[live] for a in (rows, car, server, station, now))
+        queued[station, car, r] = np.inf
+
+        repair_time = service_time[car_class[car, r] - original_class[car, r], car, r] / efficiency[server]
+        accepted = now + repair_time <= shift_end[server] + 1  # refuses more than one hour of overtime
+        # A refused car goes back to the queue when the mechanic's shift ends, another mechanic may still take it
+        refused = ~accepted
+        queued[station[refused], car[refused], r[refused]] = np.maximum(shift_end[server[refused]], now[refused])
+        r, car, server, station, now, repair_time = (a[accepted] for a in (r, car, server, station, now, repair_time))
+        repairs += np.bincount(r, minlength=R)
+
+        done_at = now + repair_time + 0.1  # mechanic takes a 0.1 hour break before routing the car
+        busy[server, r] += repair_time
+        free_at[server, r] = done_at
+
+        outcome = routing.sample(routing_u[station, car, r], station, car_class[car, r])
+        car_class[car, r] = np.minimum(car_class[car, r] + 1, PINK)
+        moving = outcome < len(STATIONS)
+        queued[outcome[moving], car[moving], r[moving]] = done_at[moving]
+        finished = ~moving
+        end_time[car[finished], r[finished]] = done_at[finished]
+
+    time_in_system = end_time - arrival
+    mean_time = _class_means(time_in_system, original_class)
+    # For the percentile, a car still in the garage at the end of the day stays at least until the garage
+    # opens the next morning, so rosters do not look faster by leaving cars unrepaired
+    entered = ~destroyed & (original_class != PINK)
+    censored = np.where(np.isnan(time_in_system), np.maximum(DAY_HOURS, shift_end.max() + 1) - arrival, time_in_system)
+    censored[~entered] = np.nan
+    # Time on duty: the shift, or until the last repair and break when they ran into overtime
+    on_duty = np.maximum(shift_end[:, None], free_at)
+
+    return {
+        'time_in_system': mean_time,
+        'destruction_rate': destroyed.mean(axis=0),
+        'utilisation': (busy / on_duty).T,
+        'p95_time_in_system': _nan_percentile(censored, 95),
+        'repairs_per_replication': repairs,
+        'repairs': int(repairs.sum()),
+        'cars': R * N,
+    }
+
+
+def _nan_percentile(values, q):
+    # np.nanpercentile(values, q, axis=0) without its per-column Python loop: NaNs sort last, so each
+    # column's finished cars are the first `counts` entries (linear interpolation, NaN where none finished)
+    ordered = np.sort(values, axis=0)
+    counts = np.sum(~np.isnan(values), axis=0)
+    position = (np.maximum(counts, 1) - 1) * q / 100
+    low = np.floor(position).astype(int)
+    high = np.minimum(low + 1, np.maximum(counts - 1, 0))
+    lower = np.take_along_axis(ordered, low[None], axis=0)[0]
+    upper = np.take_along_axis(ordered, high[None], axis=0)[0]
+    return np.where(counts > 0, lower + (upper - lower) * (position - low), np.nan)
+
+
+def _class_means(time_in_system, original_class):
+    # Mean time in system per replication and reported class, NaN where no car of the class finished
+    means = np.full((time_in_system.shape[1], len(REPORTED_CLASSES)), np.nan)
+    for column, object_class in enumerate(REPORTED_CLASSES):
+        values = np.where(original_class == object_class.value - 1, time_in_system, np.nan)
+        counts = np.sum(~np.isnan(values), axis=0)
+        sums = np.nansum(values, axis=0)
+        means[:, column] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    return means
+
+
+def _simulate_chunk(args):
+    replications, num_cars, roster, seed_sequence, routing = args
+    return simulate_batch(replications, num_cars, roster, RandomStreams(seed_sequence, STATIONS), routing)
+
+
+def simulate_parallel(replications, num_cars=15, roster=DEFAULT_ROSTER, seed=0, processes=None, batch_size=50_000, routing=ROUTING):
+    """Dzieli replikacje na paczki po `batch_size` i liczy je w puli procesów, wynik jak z simulate_batch."""
+    batches = [min(batch_size, replications - i) for i in range(0, replications, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    chunks = [(size, num_cars, roster, seed_sequence, routing) for size, seed_sequence in zip(batches, seeds)]
+    processes = min(processes or os.cpu_count(), len(chunks))
+    if processes == 1:
+        results = [_simulate_chunk(chunk) for chunk in chunks]
+    else:
+        with process_pool(processes) as executor:
+            results = list(executor.map(_simulate_chunk, chunks))
+    return {
+        'time_in_system': np.concatenate([result['time_in_system'] for result in results]),
+        'destruction_rate': np.concatenate([result['destruction_rate'] for result in results]),
+        'utilisation': np.concatenate([result['utilisation'] for result in results]),
+        'p95_time_in_system': np.concatenate([result['p95_time_in_system'] for result in results]),
+        'repairs_per_replication': np.concatenate([result['repairs_per_replication'] for result in results]),
+        'repairs': sum(result['repairs'] for result in results),
+        'cars': sum(result['cars'] for result in results),
+    }
+
+
+def summarize_batch(batch, roster=DEFAULT_ROSTER, level=0.95):
+    # Same layout as replications.summarize, so both engines print and compare alike
+    return {
+        'replications': len(batch['destruction_rate']),
+        'time_in_system': {object_class: confidence_interval(batch['time_in_system'][:, column], level)
+                           for column, object_class in enumerate(REPORTED_CLASSES)},
+        'destruction_rate': confidence_interval(batch['destruction_rate'], level),
+        'utilisation': {entry['name']: confidence_interval(batch['utilisation'][:, column], level)
+                        for column, entry in enumerate(roster)},
+    }
+
+
+def _welch_z(a, b):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    a, b = a[~np.isnan(a)], b[~np.isnan(b)]
+    return (a.mean() - b.mean()) / np.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b))
+
+
+def validate(scenario=None, replications=2000, seed=0, threshold=3.0):
+    """Porównuje statystycznie wyniki z wersją asyncio (test Welcha dla każdej metryki)."""
+    scenario = scenario or Scenario()
+    reference = collect_replications(scenario, replications, base_seed=seed)
+    batch = simulate_batch(replications, scenario.num_cars, scenario.roster, RandomStreams(seed, STATIONS), scenario.routing)
+
+    metrics = {}
+    for column, object_class in enumerate(REPORTED_CLASSES):
+        metrics[f'time_in_system[{object_class}]'] = ([r['time_in_system'][object_class] for r in reference],
+                                                      batch['time_in_system'][:, column])
+    metrics['destruction_rate'] = ([r['destruction_rate'] for r in reference], batch['destruction_rate'])
+    for column, entry in enumerate(scenario.roster):
+        metrics[f"utilisation[{entry['name']}]"] = ([r['utilisation'][entry['name']] for r in reference],
+                                                    batch['utilisation'][:, column])
+
+    passed = True
+    print(f"{'metric':<30} {'asyncio':>9} {'numpy':>9} {'z':>7}")
+    for name, (asyncio_values, numpy_values) in metrics.items():
+        z = _welch_z(asyncio_values, numpy_values)
+        passed &= abs(z) < threshold
+        print(f"{name:<30} {np.nanmean(asyncio_values):9.3f} {np.nanmean(numpy_values):9.3f} {z:7.2f}{'' if abs(z) < threshold else '  <-- differs'}")
+    return passed
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['validate']:
+        sys.exit(0 if validate(replications=int(sys.argv[2]) if len(sys.argv) > 2 else 2000) else 1)
+
+    replications = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    scenario = Scenario()
+    start = perf_counter()
+    batch = simulate_parallel(replications, scenario.num_cars, scenario.roster)
+    elapsed = perf_counter() - start
+    print_summary(summarize_batch(batch, scenario.roster))
+    print(f"{batch['cars'] / elapsed:,.0f} cars per second ({replications / elapsed:,.0f} replications per second)")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The tests import the package as projekt2.<module>, like the benchmarks do
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
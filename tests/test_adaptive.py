@@ -0,0 +1,36 @@
+import numpy as np
+
+from projekt2.adaptive import batch_means, mser, relative_half_width, sequential_replications
+
+
+def test_mser_finds_a_known_transient():
+    rng = np.random.default_rng(1)
+    series = np.r_[np.linspace(10, 0, 100), rng.normal(0, 1, 900)]
+    truncated, detected = mser(series)
+    assert detected
+    assert 80 <= truncated <= 120
+    assert truncated % 5 == 0  # MSER-5 truncates whole batches
+
+
+def test_mser_keeps_a_stationary_series():
+    truncated, detected = mser(np.random.default_rng(2).normal(5, 1, 1000))
+    assert detected
+    assert truncated < 100
+
+
+def test_mser_on_a_short_series_detects_nothing():
+    assert mser(np.arange(15.0)) == (0, False)
+    # A trend over the whole series puts the minimum on the half-way limit
+    assert mser(np.linspace(10, 0, 200))[1] is False
+
+
+def test_batch_means_interval():
+    values = np.random.default_rng(3).normal(4, 1, 20_000)
+    mean, low, high = batch_means(values)
+    assert low < 4 < high
+    assert relative_half_width((mean, low, high)) < 0.01
+
+
+def test_precision_without_a_detected_warm_up_is_not_reached():
+    result = sequential_replications(100, precision=0.1, max_cars=100, processes=1)
+    assert result['warmup']['detected'] or not result['reached']
@@ -0,0 +1,21 @@
+from projekt2.cache import ResultCache, scenario_hash
+from projekt2.main import DEFAULT_ROSTER
+from projekt2.replications import Scenario
+
+
+def test_equivalent_rosters_share_a_key():
+    written_differently = [{**entry, 'work_hours': int(entry['work_hours']), 'start': 0} for entry in DEFAULT_ROSTER]
+    assert scenario_hash(Scenario(roster=written_differently)) == scenario_hash(Scenario())
+
+
+def test_roster_order_changes_the_key():
+    # The order decides which idle mechanic takes a car, so the results differ
+    assert scenario_hash(Scenario(roster=DEFAULT_ROSTER[::-1])) != scenario_hash(Scenario())
+
+
+def test_reordered_roster_misses_the_cache(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache.sqlite'))
+    cache.put_many(Scenario(), {1: 'default order', 2: 'default order'})
+    assert cache.get_many(Scenario(), [1, 2]) == {1: 'default order', 2: 'default order'}
+    assert cache.get_many(Scenario(roster=DEFAULT_ROSTER[::-1]), [1, 2]) == {}
+    cache.close()
@@ -0,0 +1,58 @@
+import asyncio
+import csv
+
+import numpy as np
+import pytest
+
+from projekt2 import events
+from projekt2.clock import VirtualEventLoop
+from projekt2.events import BinarySink, CsvSink, EventType, NullSink, event_log, read_binary
+from projekt2.main import STATIONS, run, simulate
+from projekt2.rng import RandomStreams
+
+
+def simulate_day(seed=0):
+    with asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+        return runner.run(simulate(15, streams=RandomStreams(seed, STATIONS)))
+
+
+@pytest.fixture
+def sinks():
+    # Sinks attached by a test are always detached again, the log is shared
+    yield event_log
+    event_log.close()
+
+
+def test_no_events_are_built_without_sinks(monkeypatch, sinks):
+    def fail(*args):
+        raise AssertionError('event built with no sinks attached')
+
+    monkeypatch.setattr(events, 'Event', fail)
+    simulate_day()
+    event_log.add_sink(NullSink())  # a null sink keeps the log disabled
+    assert not event_log.enabled
+    simulate_day()
+
+
+def test_run_without_sinks_prints_nothing(capsys):
+    run(random_seed=1, sinks=[], report_dir=None)
+    assert capsys.readouterr().out == ''
+
+
+def test_csv_and_binary_sinks_write_the_same_events(tmp_path, sinks):
+    csv_path, binary_path = tmp_path / 'events.csv', tmp_path / 'events.bin'
+    event_log.add_sink(CsvSink(csv_path, buffer_size=7))  # small buffers, so the files are written in several chunks
+    event_log.add_sink(BinarySink(binary_path, buffer_size=7))
+    simulate_day(3)
+    event_log.close()
+
+    with open(csv_path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    records, names = read_binary(binary_path)
+    assert len(rows) == len(records) > 7
+    assert [row['event_type'] for row in rows] == [EventType(value).name for value in records['event_type']]
+    assert np.array_equal([float(row['time']) for row in rows], records['time'])
+    assert [int(row['car_id']) for row in rows] == records['car_id'].tolist()
+    stations = [names['station'].get(code, '') for code in records['station'].tolist()]
+    assert [row['station'] for row in rows] == stations
+    assert rows[0]['event_type'] == 'ARRIVED' and rows[-1]['event_type'] == 'SHIFT_END'
@@ -0,0 +1,24 @@
+import numpy as np
+
+from projekt2.fleet import LocalFleet, ProcessFleet
+
+
+def test_local_and_process_fleets_agree():
+    # A high transfer rate, so every site sends and receives cars across process boundaries
+    arguments = dict(sites=5, days=3, seed=2, transfer_probability=0.3)
+    local = LocalFleet(**arguments).run()
+    parallel = ProcessFleet(**arguments, processes=2).run()
+    np.testing.assert_equal(local, parallel)
+    assert local['sent'] > 0
+    assert local['sent'] == local['received'] and local['in_transit'] == 0
+
+
+def test_only_the_receiving_site_records_the_visit():
+    fleet = LocalFleet(sites=3, days=2, seed=4, transfer_probability=0.5)
+    fleet.run()
+    for site in fleet._sites:
+        # The origin sent the car on from its parking, so the car never visited a station there
+        assert all(site.store.route(index) == [] for index in site.sent)
+    received = [index for site in fleet._sites for index in range(len(site.store))
+                if site.store.id[index] >= 1_000_000]
+    assert received
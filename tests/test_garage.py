@@ -0,0 +1,37 @@
+import numpy as np
+
+from projekt2.garage import Garage, daily_calendar, load_snapshot
+
+COLUMNS = ['arrival', 'end', 'priority', 'original_class', 'object_class', 'destroyed']
+
+
+def state(garage):
+    cars = len(garage.store)
+    return {
+        'time': garage.time,
+        'days': garage.days,
+        'waiting': garage.waiting,
+        'stats': garage.stats.summary(garage.time),
+        **{column: np.array(getattr(garage.store, column)[:cars]) for column in COLUMNS},
+    }
+
+
+def test_resumed_snapshot_equals_one_long_run(tmp_path):
+    calendar = daily_calendar(28, num_cars=25)
+    straight = Garage(seed=5).run(calendar)
+
+    snapshot = tmp_path / 'garage.gz'
+    Garage(seed=5).run(calendar, 14).save(snapshot)
+    resumed = load_snapshot(snapshot)
+    assert resumed.day == 14
+    resumed.run(calendar, 14)
+
+    assert resumed.day == straight.day == 28
+    # assert_equal compares exactly, NaN included (cars still in a queue have no end time)
+    np.testing.assert_equal(state(resumed), state(straight))
+
+
+def test_cars_wait_for_the_next_day():
+    garage = Garage(seed=5).run(daily_calendar(7, num_cars=40))
+    assert any(day['carried_over'] for day in garage.days)
+    assert [day['arrived'] for day in garage.days] == [40] * 5 + [0, 0]
@@ -0,0 +1,14 @@
+import pytest
+
+from projekt2.optimize import optimize
+
+
+def test_max_rounds_must_be_positive():
+    with pytest.raises(ValueError):
+        optimize(max_rounds=0)
+
+
+def test_no_roster_left_after_the_prefilter():
+    result = optimize(max_utilisation=0.0, processes=1)
+    assert result['rounds'] == 0
+    assert result['best'] is None and result['candidates'] == []
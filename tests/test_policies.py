@@ -0,0 +1,19 @@
+import pytest
+
+from projekt2.policies import POLICIES, KeyPolicy
+
+
+def test_key_policy_needs_a_key():
+    with pytest.raises(TypeError):
+        KeyPolicy()
+
+    class Incomplete(KeyPolicy):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.parametrize('name', sorted(POLICIES))
+def test_every_registered_policy_can_be_created(name):
+    assert POLICIES[name]().name == name
@@ -0,0 +1,53 @@
+import pytest
+
+from projekt2.pqueue import BucketQueue, StableHeap
+
+
+def drain(queue):
+    return [queue.pop() for _ in range(len(queue))]
+
+
+@pytest.mark.parametrize('make', [StableHeap, BucketQueue], ids=['heap', 'buckets'])
+def test_equal_priorities_are_served_first_come_first_served(make):
+    queue = make()
+    for item, priority in enumerate([1, 0, 1, 2, 0, 1, 2]):
+        queue.push(item, priority)
+    assert list(queue) == [3, 6, 0, 2, 5, 1, 4]
+    assert drain(queue) == [3, 6, 0, 2, 5, 1, 4]
+
+
+@pytest.mark.parametrize('make', [StableHeap, lambda aging: BucketQueue(3, aging)], ids=['heap', 'buckets'])
+def test_aging_lets_a_long_waiting_car_overtake(make):
+    # Priority 0 at time 0 against priority 2 at time 5: with one level per two hours of waiting the old car wins
+    queue = make(0.5)
+    queue.push('late, high', 2, 5.0)
+    queue.push('early, low', 0, 0.0)
+    queue.push('late, low', 0, 6.0)
+    assert queue.peek() == 'early, low'
+    assert list(queue) == ['early, low', 'late, high', 'late, low']
+    assert drain(queue) == ['early, low', 'late, high', 'late, low']
+
+
+def test_aging_buckets_keep_time_order_for_cars_put_back():
+    # A refused car goes back with its old entry time and must be served before later arrivals of its level
+    queue = BucketQueue(3, aging=0.1)
+    for item, time in [('a', 1.0), ('b', 2.0), ('c', 3.0), ('put back', 0.5), ('tie', 2.0)]:
+        queue.push(item, 1, time)
+    assert drain(queue) == ['put back', 'a', 'b', 'tie', 'c']
+
+
+def test_bucket_queue_rejects_unknown_priorities():
+    with pytest.raises(ValueError):
+        BucketQueue(3).push('car', 3)
+
+
+def test_pop_where_takes_the_best_accepted_item():
+    queue = StableHeap()
+    for item in range(20):
+        queue.push_key(item, key=(item * 7) % 20)
+    taken = queue.pop_where(lambda item: item % 2 == 1)
+    assert taken == min((item for item in range(20) if item % 2 == 1), key=lambda item: (item * 7) % 20)
+    assert queue.pop_where(lambda item: False) is None
+    rest = drain(queue)
+    assert taken not in rest
+    assert rest == sorted(rest, key=lambda item: (item * 7) % 20)
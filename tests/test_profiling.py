@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from projekt2.clock import VirtualEventLoop
+from projekt2.events import EventLog
+from projekt2.main import PriorityQueue, simulate
+from projekt2.profiling import Profiler
+from projekt2.routing import RoutingTable
+from projekt2.station import Station
+
+HOOKED = [(Station, '_next_car'), (Station, '_finish_repair'), (Station, '_route'), (Station, '_end_shift'),
+          (Station, '_dispatch'), (Station, 'enqueue'), (PriorityQueue, '_put'), (PriorityQueue, '_get'),
+          (PriorityQueue, 'get_for'), (RoutingTable, 'next_hop'), (EventLog, 'emit'), (asyncio.events.Handle, '_run')]
+
+
+def originals():
+    return {(cls, name): cls.__dict__[name] for cls, name in HOOKED}
+
+
+def simulate_day():
+    with asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+        runner.run(simulate(30))
+
+
+def test_disable_restores_every_hooked_method():
+    before = originals()
+    profiler = Profiler()
+    with profiler.profile():
+        assert all(cls.__dict__[name] is not before[cls, name] for cls, name in HOOKED)
+        simulate_day()
+    assert originals() == before
+    calls = profiler.summary()['calls']
+    assert any(label.startswith('Station._finish_repair[') for label in calls)
+    assert any(label.startswith('task:') for label in calls)
+
+
+def test_methods_are_restored_after_an_error():
+    before = originals()
+    with pytest.raises(RuntimeError):
+        with Profiler().profile():
+            raise RuntimeError('simulation failed')
+    assert originals() == before
@@ -0,0 +1,39 @@
+import pytest
+
+from projekt2.main import ObjectClass
+from projekt2.replay import COLUMNS, read_trace
+
+
+def write_csv(path, rows):
+    path.write_text('\n'.join([','.join(COLUMNS), *(','.join(map(str, row)) for row in rows)]) + '\n')
+    return path
+
+
+def test_reads_arrivals_in_order(tmp_path):
+    path = write_csv(tmp_path / 'trace.csv', [
+        [0.5, 2, 'RED', 1.0, 2.0, 3.0],
+        [1.25, 0, 'GREEN', 0.5, '', ''],
+        [3.0, 1, 'PINK', '', '', ''],
+    ])
+    arrivals = list(read_trace(path))
+    assert [arrival.object_class for arrival in arrivals] == [ObjectClass.RED, ObjectClass.GREEN, ObjectClass.PINK]
+    assert [arrival.repair_times for arrival in arrivals] == [[1.0, 2.0, 3.0], [0.5], []]
+    assert [arrival.time for arrival in arrivals] == [0.5, 1.25, 3.0]
+
+
+@pytest.mark.parametrize('row', [
+    [0.0, 1, 'GREEN', '', '', ''],  # a GREEN car has one repair stage
+    [0.0, 1, 'RED', 1.0, '', ''],  # a RED car has three
+    [0.0, 1, 'PINK', 1.0, '', ''],  # a PINK car has none
+    [0.0, 1, 'ORANGE', 1.0, -2.0, ''],
+    [0.0, 3, 'GREEN', 1.0, '', ''],
+])
+def test_rejects_invalid_rows(tmp_path, row):
+    with pytest.raises(ValueError):
+        list(read_trace(write_csv(tmp_path / 'trace.csv', [row])))
+
+
+def test_rejects_unsorted_arrivals(tmp_path):
+    path = write_csv(tmp_path / 'trace.csv', [[2.0, 0, 'PINK', '', '', ''], [1.0, 0, 'PINK', '', '', '']])
+    with pytest.raises(ValueError):
+        list(read_trace(path))
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from projekt2.replications import Scenario, confidence_interval, run_replication, t_quantile
+
+
+@pytest.mark.parametrize('df, expected', [(1, 12.7062), (2, 4.3027), (3, 3.1824), (10, 2.2281), (29, 2.0452),
+                                          (30, 2.0423), (120, 1.9799)])
+def test_t_quantile_matches_tables(df, expected):
+    assert t_quantile(0.975, df) == pytest.approx(expected, abs=1e-4)
+
+
+def test_t_quantile_rejects_no_degrees_of_freedom():
+    with pytest.raises(ValueError):
+        t_quantile(0.975, 0)
+
+
+def test_two_values_use_the_df1_quantile():
+    mean, low, high = confidence_interval([1.0, 3.0, np.nan])
+    assert mean == 2.0
+    # standard error 1, so the half-width is the t quantile itself
+    assert high - mean == pytest.approx(12.7062, abs=1e-4)
+    assert mean - low == pytest.approx(high - mean)
+
+
+def test_utilisation_counts_overtime_as_time_on_duty():
+    # Short shifts under a heavy load end in overtime repairs, which must not push utilisation above 1
+    utilisation = [value for seed in range(20)
+                   for value in run_replication(Scenario(num_cars=40, shift_hours=4), seed)['utilisation'].values()]
+    assert max(utilisation) <= 1.0
+    assert max(utilisation) > 0.8
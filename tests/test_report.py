@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+
+from projekt2.report import FigureCache
+
+
+class Drawing:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, plt, values):
+        self.calls += 1
+        figure = plt.figure()
+        plt.plot(values)
+        return figure
+
+
+def test_unchanged_figures_are_not_redrawn(tmp_path):
+    draw = Drawing()
+    cache = FigureCache(str(tmp_path))
+    assert cache.render('line', draw, np.arange(5.0))
+    assert not cache.render('line', draw, np.arange(5.0))
+    assert draw.calls == 1
+    # The digests are kept on disk, a new cache (another run) skips the figure too
+    assert not FigureCache(str(tmp_path)).render('line', draw, np.arange(5.0))
+    assert draw.calls == 1
+
+
+def test_changed_or_missing_figures_are_redrawn(tmp_path):
+    draw = Drawing()
+    cache = FigureCache(str(tmp_path))
+    cache.render('line', draw, np.arange(5.0))
+    assert cache.render('line', draw, np.arange(6.0))  # other data
+    os.remove(tmp_path / 'line.png')
+    assert cache.render('line', draw, np.arange(6.0))  # file deleted
+    assert FigureCache(str(tmp_path), force=True).render('line', draw, np.arange(6.0))
+    assert draw.calls == 4
+    assert (tmp_path / 'line.png').exists()
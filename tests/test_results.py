@@ -0,0 +1,57 @@
+import pickle
+
+import numpy as np
+
+from projekt2.results import TABLES, ResultsWriter, load_results
+
+
+def queue_rows(start, stop):
+    return [(float(row), row % 5, row * 10) for row in range(start, stop)]
+
+
+def test_rows_round_trip_across_chunks(tmp_path):
+    writer = ResultsWriter(tmp_path / 'run', chunk_rows=4, metadata={'seed': 1})
+    for row in queue_rows(0, 10):  # two full chunks and a partial one
+        writer.append_row('queue_changes', row)
+    cars = np.zeros(9, TABLES['cars'])
+    cars['id'] = np.arange(1, 10)
+    writer.append('cars', cars)  # a bulk append is split at the chunk size too
+    writer.close()
+
+    results = load_results(tmp_path / 'run')
+    changes = results['queue_changes']
+    assert len(changes) == 10 and list(changes) == list(TABLES['queue_changes'].names)
+    assert isinstance(changes['time'], np.memmap)
+    assert changes['time'].tolist() == [row[0] for row in queue_rows(0, 10)]
+    assert changes['length'].tolist() == [row[2] for row in queue_rows(0, 10)]
+    assert results['cars']['id'].tolist() == list(range(1, 10))
+    assert len(results['visits']) == 0 and len(results['visits']['car_id']) == 0
+    assert results['metadata'] == {'seed': 1}
+
+
+def test_in_memory_writer_matches_the_directory(tmp_path):
+    on_disk, in_memory = ResultsWriter(tmp_path / 'run', chunk_rows=3), ResultsWriter(chunk_rows=3)
+    for writer in (on_disk, in_memory):
+        for row in queue_rows(0, 8):
+            writer.append_row('queue_changes', row)
+    for column in TABLES['queue_changes'].names:
+        assert np.array_equal(on_disk.table('queue_changes')[column], in_memory.table('queue_changes')[column])
+
+
+def test_restored_writer_drops_rows_written_after_the_snapshot(tmp_path):
+    writer = ResultsWriter(tmp_path / 'run', chunk_rows=4)
+    for row in queue_rows(0, 6):  # one chunk on disk, two rows in the buffer
+        writer.append_row('queue_changes', row)
+    snapshot = pickle.dumps(writer)
+    assert len(pickle.loads(snapshot).buffers['queue_changes']) == 4  # the buffer is rebuilt at full size
+
+    for row in queue_rows(100, 105):  # this run goes on and flushes more rows, then is abandoned
+        writer.append_row('queue_changes', row)
+    restored = pickle.loads(snapshot)
+    assert restored.counts['queue_changes'] == 2 and restored.rows['queue_changes'] == 4
+    for row in queue_rows(6, 9):
+        restored.append_row('queue_changes', row)
+    restored.close()
+
+    changes = load_results(tmp_path / 'run')['queue_changes']
+    assert changes['time'].tolist() == [row[0] for row in queue_rows(0, 9)]
@@ -0,0 +1,48 @@
+import asyncio
+
+import numpy as np
+
+from projekt2.clock import VirtualEventLoop
+from projekt2.main import DEFAULT_ROSTER, STATIONS, ObjectClass, simulate
+from projekt2.replications import Scenario, collect_replications
+from projekt2.rng import RandomStreams
+
+COLUMNS = ['arrival', 'end', 'priority', 'original_class', 'destroyed']
+
+
+def run_store(seed, num_cars=40):
+    with asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+        store = runner.run(simulate(num_cars, DEFAULT_ROSTER, streams=RandomStreams(seed, STATIONS)))[0]
+    cars = len(store)
+    columns = {column: np.array(getattr(store, column)[:cars]) for column in COLUMNS}
+    # Only the stages a car has are drawn, the rest of the preallocated row is never written
+    stages = ObjectClass.PINK.value - columns['original_class']
+    columns['repair_times'] = np.concatenate([store.repair_times[car, :stages[car]] for car in range(cars)])
+    return columns
+
+
+def test_same_seed_gives_a_bit_identical_run():
+    first, second = run_store(7), run_store(7)
+    for column in first:
+        assert np.array_equal(first[column], second[column], equal_nan=True), column
+
+
+def test_different_seeds_give_different_runs():
+    assert not np.array_equal(run_store(7)['arrival'], run_store(8)['arrival'])
+
+
+def test_streams_do_not_depend_on_each_other():
+    # Drawing from one stream leaves the others where they were
+    used, fresh = RandomStreams(3, STATIONS), RandomStreams(3, STATIONS)
+    used.service.random(100)
+    assert used.arrivals.random() == fresh.arrivals.random()
+    assert used.routing['warsztat'].random() == fresh.routing['warsztat'].random()
+
+
+def test_serial_and_parallel_replications_match():
+    serial = collect_replications(Scenario(), 8, base_seed=1, processes=1)
+    parallel = collect_replications(Scenario(), 8, base_seed=1, processes=2)
+    # assert_equal treats NaN (no car of a class finished) as equal to NaN
+    np.testing.assert_equal([result['time_in_system'] for result in serial], [result['time_in_system'] for result in parallel])
+    np.testing.assert_equal([result['destruction_rate'] for result in serial],
+                            [result['destruction_rate'] for result in parallel])
@@ -0,0 +1,69 @@
+import copy
+import json
+
+import numpy as np
+import pytest
+
+from projekt2.carstore import CarStore
+from projekt2.main import STATIONS, ObjectClass
+from projekt2.routing import DEFAULT_ROUTING, RoutingTable, load_routing
+
+CLASSES = [object_class.name for object_class in ObjectClass]
+
+
+def table(routing, max_route=CarStore.MAX_ROUTE):
+    return RoutingTable(routing, STATIONS, CLASSES, max_route)
+
+
+def test_default_routing_is_valid():
+    routing = table(DEFAULT_ROUTING)
+    assert np.allclose(routing.probabilities.sum(axis=2), 1.0)
+
+
+def test_sampled_hops_follow_the_table():
+    routing = table(DEFAULT_ROUTING)
+    red = CLASSES.index('RED')
+    # Outcomes are ordered stations first: warsztat below 0.8, destroyed above
+    assert routing.next_hop('parking', red, 0.5) == 'warsztat'
+    assert routing.next_hop('parking', red, 0.9) == 'destroyed'
+
+
+def test_rejects_a_car_sent_on_after_its_last_stage():
+    # GREEN has one repair: warsztat -> lakiernik would need a second one
+    routing = copy.deepcopy(DEFAULT_ROUTING)
+    routing['warsztat']['GREEN'] = {'lakiernik': 1.0}
+    with pytest.raises(ValueError, match='past their last repair stage'):
+        table(routing)
+
+
+def test_rejects_pink_cars_sent_to_a_station():
+    routing = copy.deepcopy(DEFAULT_ROUTING)
+    routing['parking']['PINK'] = {'tapicer': 1.0}
+    with pytest.raises(ValueError, match='PINK'):
+        table(routing)
+
+
+def test_rejects_routes_longer_than_max_route():
+    with pytest.raises(ValueError, match='more than 2 stations'):
+        table(DEFAULT_ROUTING, max_route=2)
+
+
+def test_load_routing_validates_the_file(tmp_path):
+    routing = copy.deepcopy(DEFAULT_ROUTING)
+    routing['lakiernik']['GREEN'] = {'tapicer': 1.0}
+    path = tmp_path / 'routing.json'
+    path.write_text(json.dumps(routing))
+    with pytest.raises(ValueError):
+        load_routing(path, STATIONS, CLASSES, CarStore.MAX_ROUTE)
+
+
+@pytest.mark.parametrize('change', [
+    lambda routing: routing['warsztat'].update(RED={'lakiernik': 0.5}),  # does not sum to 1
+    lambda routing: routing['warsztat'].update(BLUE={'lakiernik': 1.0}),
+    lambda routing: routing['warsztat']['RED'].update(garage=0.0),
+])
+def test_rejects_malformed_rows(change):
+    routing = copy.deepcopy(DEFAULT_ROUTING)
+    change(routing)
+    with pytest.raises(ValueError):
+        table(routing)
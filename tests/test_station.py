@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from projekt2.carstore import CarStore
+from projekt2.clock import VirtualEventLoop, now
+from projekt2.events import EventType, event_log
+from projekt2.main import ROUTING, STATION_NAMES, STATIONS, Car, ObjectClass
+from projekt2.rng import RandomStreams
+from projekt2.station import BREAK, StationNetwork
+
+
+class Recorder:
+    active = True
+
+    def __init__(self):
+        self.events = []
+
+    def write(self, event):
+        self.events.append((event.event_type, event.car_id, event.mechanic, event.time))
+
+    def report(self, text):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def recorder():
+    sink = event_log.add_sink(Recorder())
+    yield sink
+    event_log.remove_sink(sink)
+
+
+def run_station(mechanics, cars):
+    """Mechanics (roster entries without id, name and station) at Warsztat and GREEN cars (priority, repair time)
+    waiting there at time 0. A GREEN car leaves the garage after its repair at Warsztat."""
+    async def day():
+        store = CarStore(STATION_NAMES)
+        network = StationNetwork(ROUTING, RandomStreams(0, STATIONS))
+        station = network.stations['warsztat']
+        added = [network.add_mechanic({'id': number, 'efficiency': 1, 'name': f'M{number}', 'station': 'warsztat', **entry})
+                 for number, entry in enumerate(mechanics, 1)]
+        views = []
+        for number, (priority, repair_time) in enumerate(cars, 1):
+            car = Car.view(store, store.add(number, priority, ObjectClass.GREEN.value, [repair_time]))
+            car.set_arrival_time()
+            station.enqueue(car)
+            views.append(car)
+        await network.wait()
+        return station, added, views, now()
+
+    with asyncio.Runner(loop_factory=VirtualEventLoop) as runner:
+        return runner.run(day())
+
+
+def test_break_after_every_repair():
+    station, (mechanic,), (first, second), _ = run_station([{'work_hours': 8}], [(1, 1.0), (1, 2.0)])
+    assert (first.repair_start_time, first.repair_end_time, first.end_time) == pytest.approx((0.0, 1.0, 1.0 + BREAK))
+    # The next car starts only after the break
+    assert (second.repair_start_time, second.end_time) == pytest.approx((1.0 + BREAK, 3.0 + 2 * BREAK))
+    assert mechanic.total_repairs == 2
+    assert mechanic.work_hours == pytest.approx(0.0)  # a free mechanic stops at the end of the shift
+
+
+def test_overtime_repair_ends_the_shift(recorder):
+    station, (mechanic,), (first, second, third), end = run_station(
+        [{'work_hours': 2}], [(2, 1.5), (1, 0.9), (0, 3.0)])
+    # 1.6 h into the shift the 0.9 h repair runs 0.5 h over, which is accepted
+    assert second.repair_start_time == pytest.approx(1.5 + BREAK)
+    assert (EventType.OVERTIME, second.id, 'M1') in [event[:3] for event in recorder.events]
+    # The shift is over after that repair and its break, the last car waits for the next day
+    assert end == pytest.approx(2.5 + BREAK)
+    assert mechanic.work_hours == pytest.approx(2 - end)
+    assert third.repair_start_time is None and station.qsize() == 1
+
+
+def test_refused_car_is_put_back_for_another_mechanic(recorder):
+    # M1 refuses a repair ending two hours after their shift; M2 starts at hour 3 and takes the car
+    station, (first, second), (car,), end = run_station(
+        [{'work_hours': 2}, {'work_hours': 8, 'start': 3}], [(1, 4.0)])
+    assert (EventType.REFUSED, car.id, 'M1', 0.0) in recorder.events
+    assert first.total_repairs == 0 and second.total_repairs == 1
+    assert car.repair_start_time == pytest.approx(3.0)
+    assert station.qsize() == 0
+
+
+def test_refused_car_waits_for_the_next_day():
+    station, (mechanic,), (car,), end = run_station([{'work_hours': 2}], [(1, 4.0)])
+    assert end == pytest.approx(2.0)
+    assert car.repair_start_time is None
+    assert station.qsize() == 1 and mechanic.refused == []
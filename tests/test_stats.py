@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from projekt2.stats import P2Quantile, TimeWeighted, Welford, resample
+
+
+def samples(n, seed=0):
+    return np.random.default_rng(seed).exponential(2.0, n)
+
+
+def test_welford_matches_numpy():
+    values = samples(10_000) + 1e6  # a large offset breaks the naive sum of squares, not Welford
+    moments = Welford()
+    for x in values:
+        moments.add(x)
+    assert moments.count == len(values)
+    assert moments.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert moments.variance == pytest.approx(values.var(ddof=1), rel=1e-9)
+
+
+def test_welford_merge_equals_one_pass():
+    values = samples(5000)
+    whole, parts = Welford(), [Welford() for _ in range(3)]
+    for i, x in enumerate(values):
+        whole.add(x)
+        parts[i % 3].add(x)
+    merged = parts[0].merge(parts[1]).merge(parts[2]).merge(Welford())
+    assert merged.count == whole.count
+    assert merged.mean == pytest.approx(whole.mean, rel=1e-12)
+    assert merged.variance == pytest.approx(whole.variance, rel=1e-9)
+
+
+@pytest.mark.parametrize('p', [0.5, 0.95, 0.99])
+def test_p2_quantile_is_close_to_numpy(p):
+    values = samples(100_000, seed=1)
+    quantile = P2Quantile(p)
+    for x in values:
+        quantile.add(x)
+    assert quantile.value() == pytest.approx(np.quantile(values, p), rel=0.02)
+
+
+def test_p2_quantile_is_exact_while_buffering():
+    values = samples(50, seed=2)
+    quantile = P2Quantile(0.95)
+    for x in values:
+        quantile.add(x)
+    assert quantile.value() == pytest.approx(np.quantile(values, 0.95), rel=1e-12)
+
+
+def test_time_weighted_mean_and_resample_agree():
+    rng = np.random.default_rng(3)
+    times = np.cumsum(rng.exponential(0.5, 200))
+    values = rng.integers(0, 10, 200)
+    average = TimeWeighted(start=0.0)
+    for time, value in zip(times, values):
+        average.update(time, value)
+    end = times[-1] + 1.0
+    expected = np.sum(values * np.diff(np.append(times, end))) / end
+    assert average.mean(end) == pytest.approx(expected)
+    assert average.max == values.max()
+    assert resample(times, values, [0.0, end])[0] == pytest.approx(expected)
@@ -0,0 +1,9 @@
+from projekt2 import vectorized
+
+
+def test_vectorized_engine_agrees_with_asyncio(capsys):
+    # validate prints a Welch z per metric and passes when every |z| is below the threshold
+    assert vectorized.validate(replications=300, seed=1, threshold=4.0)
+    rows = capsys.readouterr().out.splitlines()[1:]
+    assert len(rows) == 10
+    assert all(abs(float(row.split()[-1])) < 4.0 for row in rows)